@@ -4,6 +4,7 @@ from .models import (
     ContractSpec,
     FieldSpec,
     FieldType,
+    FieldUsage,
     RecordSpec,
     SelectorSpec,
     StructureRule,
@@ -14,6 +15,7 @@ __all__ = [
     "ContractSpec",
     "FieldSpec",
     "FieldType",
+    "FieldUsage",
     "RecordSpec",
     "SelectorSpec",
     "StructureRule",
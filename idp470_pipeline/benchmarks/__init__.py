@@ -0,0 +1,39 @@
+"""Benchmarks of the IDP470RA pipeline on synthetic FACDEMAT files."""
+
+from .memory import format_memory_report, run_memory_benchmark
+from .micro import format_micro_report, run_micro_benchmark
+from .pipeline import (
+    BENCH_STAGES,
+    MEMORY_STAGES,
+    MICRO_FUNCTIONS,
+    BenchmarkConfig,
+    compare_reports,
+    find_regressions,
+    format_report,
+    load_report,
+    run_pipeline_benchmark,
+    save_report,
+)
+from .synthetic import SIZE_PRESETS, ensure_dataset, iter_synthetic_lines, parse_size, synthesize_facdemat
+
+__all__ = [
+    "BENCH_STAGES",
+    "MEMORY_STAGES",
+    "MICRO_FUNCTIONS",
+    "SIZE_PRESETS",
+    "BenchmarkConfig",
+    "compare_reports",
+    "ensure_dataset",
+    "find_regressions",
+    "format_memory_report",
+    "format_micro_report",
+    "format_report",
+    "iter_synthetic_lines",
+    "load_report",
+    "parse_size",
+    "run_memory_benchmark",
+    "run_micro_benchmark",
+    "run_pipeline_benchmark",
+    "save_report",
+    "synthesize_facdemat",
+]
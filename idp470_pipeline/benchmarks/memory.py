@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import gc
+import logging
+import tempfile
+import threading
+import tracemalloc
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from ..exporters import (
+    _SHEET_ALL,
+    _records_dataframe,
+    export_accounting_summary_pdf,
+    export_first_invoice_pdf,
+    export_to_excel,
+)
+from ..models import ContractSpec
+from ..parsing_engine import FixedWidthParser, save_jsonl
+from ..run_metrics import current_rss_bytes
+from .pipeline import _EXCEL_MAX_RECORDS, BenchmarkConfig, StageComparison, _load_or_extract_contract, new_report
+from .synthetic import ensure_dataset, size_label
+
+LOGGER = logging.getLogger(__name__)
+
+_RSS_SAMPLE_SECONDS = 0.005
+
+
+# Samples the process RSS in a background thread while a block runs: the peak
+# of that block alone, which ru_maxrss (a lifetime high-water mark) cannot
+# give. Samples are taken between GIL releases, so very short spikes inside a
+# C call can be missed. Linux only (/proc); values are None elsewhere.
+class RssSampler:
+    def __init__(self, interval: float = _RSS_SAMPLE_SECONDS) -> None:
+        self.interval = interval
+        self.before: int | None = None
+        self.peak: int | None = None
+        self.after: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> RssSampler:
+        self.before = current_rss_bytes()
+        self.peak = self.before
+        if self.before is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        self.after = current_rss_bytes()
+
+
+def _per_record(value: int | None, records: int) -> float | None:
+    if value is None or records <= 0:
+        return None
+    return round(value / records, 1)
+
+
+def _measure_memory(name: str, records: int, function: Callable[[], Any], trace: bool) -> tuple[dict[str, Any], Any]:
+    # peak_bytes: extra memory needed while the stage ran (tracemalloc peak over
+    # what was traced before, or the RSS rise without tracemalloc).
+    # retained_bytes: what the stage result still holds once it returned.
+    gc.collect()
+    traced_before = 0
+    if trace:
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+    with RssSampler() as rss:
+        result = function()
+    gc.collect()
+    rss_rise = rss.peak - rss.before if rss.peak is not None and rss.before is not None else None
+    if trace:
+        traced_now, traced_peak = tracemalloc.get_traced_memory()
+        peak_bytes: int | None = traced_peak - traced_before
+        retained_bytes: int | None = traced_now - traced_before
+    else:
+        peak_bytes = rss_rise
+        retained_bytes = rss.after - rss.before if rss.after is not None and rss.before is not None else None
+    stage = {
+        "name": name,
+        "records": records,
+        "peak_bytes": peak_bytes,
+        "retained_bytes": retained_bytes,
+        "peak_bytes_per_record": _per_record(peak_bytes, records),
+        "retained_bytes_per_record": _per_record(retained_bytes, records),
+        "rss_before_bytes": rss.before,
+        "rss_peak_bytes": rss.peak,
+        "rss_after_bytes": rss.after,
+        "rss_rise_bytes": rss_rise,
+    }
+    LOGGER.info(
+        "Memoire %s: pic %s octets, retenu %s octets",
+        name,
+        peak_bytes if peak_bytes is not None else "?",
+        retained_bytes if retained_bytes is not None else "?",
+    )
+    return stage, result
+
+
+def _write_main_sheet(frame: pd.DataFrame, output_path: Path) -> None:
+    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+        frame.to_excel(writer, index=False, sheet_name=_SHEET_ALL, startrow=3)
+
+
+def _memory_dataset(
+    config: BenchmarkConfig,
+    contract: ContractSpec,
+    parser: FixedWidthParser,
+    target_lines: int,
+    trace: bool,
+) -> dict[str, Any]:
+    input_path = ensure_dataset(
+        contract,
+        config.data_dir,
+        target_lines,
+        lig_per_invoice=config.lig_per_invoice,
+        seed=config.seed,
+        template_path=config.template_path,
+    )
+    result: dict[str, Any] = {
+        "size": size_label(target_lines),
+        "bytes": input_path.stat().st_size,
+        "path": str(input_path),
+        "stages": [],
+        "skipped": {},
+    }
+    stages: list[dict[str, Any]] = result["stages"]
+    skipped: dict[str, str] = result["skipped"]
+    wanted = set(config.stages)
+
+    def _parse() -> list[dict[str, Any]]:
+        records, _ = parser.parse_file(
+            input_path=input_path,
+            continue_on_error=True,
+            workers=config.workers,
+            reader=config.reader,
+        )
+        return records
+
+    # The records list is measured even when parsing is not wanted: every
+    # other stage starts from it.
+    parsing, records = _measure_memory("parsing", 0, _parse, trace)
+    count = len(records)
+    parsing.update(
+        records=count,
+        peak_bytes_per_record=_per_record(parsing["peak_bytes"], count),
+        retained_bytes_per_record=_per_record(parsing["retained_bytes"], count),
+    )
+    result["records"] = count
+    if "parsing" in wanted:
+        stages.append(parsing)
+    over_excel_limit = count > _EXCEL_MAX_RECORDS
+
+    with tempfile.TemporaryDirectory(prefix="bench_", dir=config.data_dir) as temp_dir:
+        output_dir = Path(temp_dir)
+        if wanted & {"dataframe", "excel_workbook"}:
+            stage, frame = _measure_memory("dataframe", count, lambda: _records_dataframe(records), trace)
+            if "dataframe" in wanted:
+                stages.append(stage)
+            if "excel_workbook" in wanted:
+                if over_excel_limit:
+                    skipped["excel_workbook"] = f"{count} enregistrements > limite Excel ({_EXCEL_MAX_RECORDS})"
+                else:
+                    stage, _ = _measure_memory(
+                        "excel_workbook",
+                        count,
+                        lambda: _write_main_sheet(frame, output_dir / "feuille.xlsx"),
+                        trace,
+                    )
+                    stages.append(stage)
+            frame = None  # the excel stage builds its own DataFrame
+
+        exports: list[tuple[str, Callable[[], Any]]] = [
+            (
+                "excel",
+                lambda: export_to_excel(
+                    records=records,
+                    output_path=output_dir / "parsed_records.xlsx",
+                    contract=contract,
+                    fast_mode=config.fast_excel,
+                ),
+            ),
+            ("jsonl", lambda: save_jsonl(records=records, output_path=output_dir / "parsed_records.jsonl")),
+            ("pdf", lambda: export_first_invoice_pdf(records=records, output_path=output_dir / "facture_exemple.pdf")),
+            (
+                "pdf_summary",
+                lambda: export_accounting_summary_pdf(records=records, output_path=output_dir / "synthese_comptable.pdf"),
+            ),
+        ]
+        for name, function in exports:
+            if name not in wanted:
+                continue
+            if name == "excel" and over_excel_limit:
+                skipped[name] = f"{count} enregistrements > limite Excel ({_EXCEL_MAX_RECORDS})"
+                continue
+            try:
+                stage, _ = _measure_memory(name, count, function, trace)
+            except (RuntimeError, ValueError) as error:
+                skipped[name] = str(error)
+                continue
+            stages.append(stage)
+    return result
+
+
+def run_memory_benchmark(config: BenchmarkConfig, trace: bool = True) -> dict[str, Any]:
+    # Memory counterpart of run_pipeline_benchmark, on the same synthetic files:
+    # per stage and size, the peak and retained memory and their share per
+    # record. tracemalloc counts Python allocations exactly but slows the stages
+    # several times; trace=False keeps only the RSS figures.
+    report = new_report("memory", config)
+    report["tracemalloc"] = trace
+    contract = _load_or_extract_contract(config, {})
+    parser = FixedWidthParser(contract, decimal_mode=config.decimal_mode)
+    if trace:
+        tracemalloc.start()
+    try:
+        for target_lines in config.sizes:
+            report["datasets"].append(_memory_dataset(config, contract, parser, target_lines, trace))
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return report
+
+
+def _format_megabytes(value: int | None) -> str:
+    return "-" if value is None else f"{value / (1024 * 1024):.1f}"
+
+
+def format_memory_report(report: dict[str, Any], comparisons: Sequence[StageComparison] = ()) -> str:
+    by_key = {(item.size, item.stage): item for item in comparisons}
+    source = "tracemalloc" if report.get("tracemalloc") else "RSS"
+    header = (
+        f"{'Taille':>6}  {'Etape':<16} {'Pic Mo':>9} {'Retenu Mo':>10} {'RSS pic Mo':>11}"
+        f" {'Pic o/enr':>10} {'Retenu o/enr':>13}"
+    )
+    if comparisons:
+        header += f" {'vs base':>9}"
+    environment = report["environment"]
+    out = [
+        f"Benchmark memoire IDP470 ({source}) - Python {environment['python']} - {environment['platform']} - "
+        f"revision {environment['git_revision'] or '?'}",
+        header,
+        "-" * len(header),
+    ]
+    for dataset in report["datasets"]:
+        for stage in dataset["stages"]:
+            peak_per_record = stage["peak_bytes_per_record"]
+            retained_per_record = stage["retained_bytes_per_record"]
+            row = (
+                f"{dataset['size']:>6}  {stage['name']:<16} {_format_megabytes(stage['peak_bytes']):>9}"
+                f" {_format_megabytes(stage['retained_bytes']):>10} {_format_megabytes(stage['rss_peak_bytes']):>11}"
+                f" {('-' if peak_per_record is None else f'{peak_per_record:,.0f}'):>10}"
+                f" {('-' if retained_per_record is None else f'{retained_per_record:,.0f}'):>13}"
+            )
+            change = by_key.get((dataset["size"], stage["name"]))
+            if change is not None:
+                row += f" {change.change_pct:>+8.1f}%"
+            out.append(row)
+        for name, reason in dataset["skipped"].items():
+            out.append(f"{dataset['size']:>6}  {name:<16} ignore: {reason}")
+        out.append(f"{'':>6}  {dataset['records']} enregistrements, {dataset['bytes'] / (1024 * 1024):.1f} Mo: {dataset['path']}")
+    return "\n".join(out)
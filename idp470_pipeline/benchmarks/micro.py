@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import logging
+import statistics
+import timeit
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ..exporters import _infer_numeric_kind, _set_column_widths
+from ..models import FieldType
+from ..parsing_engine import FixedWidthParser, _coerce_value, _normalize_numeric
+from .pipeline import BenchmarkConfig, StageComparison, _load_or_extract_contract, new_report
+
+LOGGER = logging.getLogger(__name__)
+
+# Second bundled sample (three invoices): more ENT lines than the template alone.
+_EXTRA_SAMPLE_NAME = "facdemat_test_3_factures_multi_lignes.txt"
+_MIN_ROUNDS = 7
+# Rounds whose spread (stdev / median) exceeds this are flagged as unstable.
+_UNSTABLE_SPREAD_PCT = 5.0
+_LINE_TYPES = ("ENT", "LIG")
+
+
+# One timed case: run() makes `calls` calls of the measured function over
+# fixed inputs, so ns/call = round time / (number * calls).
+@dataclass(frozen=True)
+class _MicroCase:
+    function: str
+    label: str
+    calls: int
+    run: Callable[[], Any]
+    inputs: str
+
+
+def _sample_paths(config: BenchmarkConfig) -> list[Path]:
+    paths: list[Path] = []
+    if config.template_path is not None:
+        paths.append(config.template_path)
+        paths.append(config.template_path.with_name(_EXTRA_SAMPLE_NAME))
+    return [path for path in dict.fromkeys(paths) if path.exists()]
+
+
+def _read_lines(path: Path) -> list[str]:
+    # Lines as the text reader hands them to the parser.
+    return path.read_text(encoding="latin-1").splitlines()
+
+
+def _lines_by_type(paths: Sequence[Path], parser: FixedWidthParser) -> dict[str, list[str]]:
+    by_type: dict[str, list[str]] = {}
+    for path in paths:
+        for line in _read_lines(path):
+            record = parser._record_for_line(line, len(line))
+            if record is not None:
+                by_type.setdefault(record.name, []).append(line)
+    return by_type
+
+
+def _worksheet_of(records: list[dict[str, Any]]):
+    # Same layout as export_to_excel: labels on row 3, header on row 4, data from row 5.
+    from openpyxl import Workbook
+
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    worksheet = Workbook().active
+    for col_idx, name in enumerate(columns, start=1):
+        worksheet.cell(3, col_idx, name.lower())
+        worksheet.cell(4, col_idx, name)
+    for row_idx, record in enumerate(records, start=5):
+        for col_idx, name in enumerate(columns, start=1):
+            value = record.get(name)
+            if value is not None:
+                worksheet.cell(row_idx, col_idx, value)
+    return worksheet
+
+
+def _build_cases(config: BenchmarkConfig, parser: FixedWidthParser, paths: Sequence[Path]) -> list[_MicroCase]:
+    contract = parser.contract
+    lines = _lines_by_type(paths, parser)
+    records_spec = {record.name: record for record in contract.record_types}
+    wanted = set(config.stages)
+    cases: list[_MicroCase] = []
+
+    def _add(function: str, label: str, inputs: Sequence[Any], run: Callable[[], Any], description: str) -> None:
+        if function in wanted and inputs:
+            cases.append(_MicroCase(function, label, len(inputs), run, description))
+
+    numeric_slices: list[str] = []
+    for record_type in _LINE_TYPES:
+        record = records_spec.get(record_type)
+        typed_lines = [line.ljust(contract.line_length) for line in lines.get(record_type, [])]
+        if record is None or not typed_lines:
+            continue
+        pairs = [
+            (line[field.start - 1 : field.start - 1 + field.length], field)
+            for line in typed_lines
+            for field in record.fields
+        ]
+        numeric_slices.extend(
+            raw for raw, field in pairs if field.type in {FieldType.INTEGER, FieldType.DECIMAL} and not field.is_binary
+        )
+        # The same slices through the coercers of the compiled plan, which are
+        # the ones parse_line calls: _coerce_value only serves callers outside
+        # the parser and adds its cache lookup.
+        plan_pairs = [
+            (line[start:end], coerce)
+            for line in typed_lines
+            for _, start, end, coerce in parser._compiled[record_type].plan
+        ]
+        numbered = list(enumerate(lines[record_type], start=1))
+
+        def _coerce(pairs: list[tuple[str, Any]] = pairs) -> None:
+            for raw, field in pairs:
+                _coerce_value(raw, field)
+
+        def _coerce_plan(plan_pairs: list[tuple[str, Callable[[str], Any]]] = plan_pairs) -> None:
+            for raw, coerce in plan_pairs:
+                coerce(raw)
+
+        def _dispatch(numbered: list[tuple[int, str]] = numbered) -> None:
+            record_for_line = parser._record_for_line
+            for _, line in numbered:
+                record_for_line(line, len(line))
+
+        def _parse(numbered: list[tuple[int, str]] = numbered) -> None:
+            parse_line = parser.parse_line
+            for line_number, line in numbered:
+                parse_line(line, line_number)
+
+        count = f"{len(typed_lines)} lignes {record_type}"
+        fields_count = f"{count}, {len(record.fields)} champs"
+        _add("_coerce_value", f"_coerce_value[{record_type}]", pairs, _coerce, f"{fields_count}, hors parse_line")
+        _add(
+            "plan_coercer",
+            f"plan_coercer[{record_type}]",
+            plan_pairs,
+            _coerce_plan,
+            f"{fields_count}, chemin chaud (plan)",
+        )
+        _add("_record_for_line", f"_record_for_line[{record_type}]", numbered, _dispatch, count)
+        _add("parse_line", f"parse_line[{record_type}]", numbered, _parse, count)
+
+    def _normalize() -> None:
+        for raw in numeric_slices:
+            _normalize_numeric(raw)
+
+    _add("_normalize_numeric", "_normalize_numeric", numeric_slices, _normalize, "champs numeriques ENT/LIG")
+
+    # Whole-file functions run on every record of the first sample, in file
+    # order, as in the pipeline.
+    ordered, _ = parser.parse_file(input_path=paths[0], continue_on_error=True)
+    if not ordered:
+        return cases
+    _add(
+        "_validate_structure",
+        "_validate_structure",
+        [ordered],
+        lambda: parser._validate_structure(ordered),
+        f"{len(ordered)} enregistrements",
+    )
+    columns = list(dict.fromkeys(key for record in ordered for key in record))
+    column_values = [[record.get(name) for record in ordered] for name in columns]
+
+    def _infer() -> None:
+        for values in column_values:
+            _infer_numeric_kind(values)
+
+    _add("_infer_numeric_kind", "_infer_numeric_kind", column_values, _infer, f"1 colonne de {len(ordered)} valeurs")
+    if "_set_column_widths" in wanted:
+        worksheet = _worksheet_of(ordered)
+        _add(
+            "_set_column_widths",
+            "_set_column_widths",
+            [worksheet],
+            lambda: _set_column_widths(worksheet),
+            f"{len(columns)} colonnes x {len(ordered)} lignes",
+        )
+    return cases
+
+
+def _time_case(case: _MicroCase, rounds: int) -> dict[str, Any]:
+    # timeit switches the garbage collector off while timing; autorange picks
+    # the loop count for a round of at least 0.2 s, then `rounds` rounds are
+    # taken. The best round is the least disturbed one.
+    timer = timeit.Timer(case.run)
+    number, _ = timer.autorange()
+    per_call = [seconds / (number * case.calls) * 1e9 for seconds in timer.repeat(repeat=rounds, number=number)]
+    median = statistics.median(per_call)
+    spread = statistics.stdev(per_call) / median * 100 if median > 0 else 0.0
+    LOGGER.info("Micro-benchmark %s: %.0f ns/appel (dispersion %.1f%%)", case.label, min(per_call), spread)
+    return {
+        "name": case.label,
+        "function": case.function,
+        "inputs": case.inputs,
+        "calls_per_run": case.calls,
+        "number": number,
+        "rounds": rounds,
+        "ns_per_call": round(min(per_call), 1),
+        "ns_per_call_median": round(median, 1),
+        "spread_pct": round(spread, 2),
+    }
+
+
+def run_micro_benchmark(config: BenchmarkConfig) -> dict[str, Any]:
+    # ns per call of the parser and Excel hot functions on the ENT/LIG lines of
+    # the bundled samples (no synthetic file): a finer-grained check than the
+    # stage timings when working on one of them. Rounds = max(repeat, 7).
+    report = new_report("micro", config)
+    contract = _load_or_extract_contract(config, {})
+    parser = FixedWidthParser(contract, decimal_mode=config.decimal_mode)
+    paths = _sample_paths(config)
+    if not paths:
+        raise ValueError(f"Aucun echantillon FACDEMAT trouve pour le micro-benchmark: {config.template_path}")
+    report["samples"] = [str(path) for path in paths]
+    rounds = max(config.repeat, _MIN_ROUNDS)
+    report["functions"] = [_time_case(case, rounds) for case in _build_cases(config, parser, paths)]
+    return report
+
+
+def format_micro_report(report: dict[str, Any], comparisons: Sequence[StageComparison] = ()) -> str:
+    by_name = {item.stage: item for item in comparisons}
+    header = f"{'Fonction':<26} {'ns/appel':>15} {'Median':>15} {'Disp %':>7}  {'Entree':<32}"
+    if comparisons:
+        header += f" {'vs base':>9}"
+    environment = report["environment"]
+    out = [
+        f"Micro-benchmark IDP470 - Python {environment['python']} - {environment['platform']} - "
+        f"revision {environment['git_revision'] or '?'}",
+        header,
+        "-" * len(header),
+    ]
+    for item in report["functions"]:
+        flag = "!" if item["spread_pct"] > _UNSTABLE_SPREAD_PCT else " "
+        row = (
+            f"{item['name']:<26} {item['ns_per_call']:>15,.1f} {item['ns_per_call_median']:>15,.1f}"
+            f" {item['spread_pct']:>6.1f}{flag} {item['inputs']:<32}"
+        )
+        change = by_name.get(item["name"])
+        if change is not None:
+            row += f" {change.change_pct:>+8.1f}%"
+        out.append(row)
+    out.append(f"Echantillons: {', '.join(report['samples'])}")
+    out.append(f"! dispersion > {_UNSTABLE_SPREAD_PCT:.0f} %: relancer sur une machine au repos ou avec plus de --repeat")
+    return "\n".join(out)
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from ..deterministic_extractor import extract_contract_deterministic
+from ..exporters import export_accounting_summary_pdf, export_first_invoice_pdf, export_to_excel
+from ..models import ContractSpec
+from ..parsing_engine import FixedWidthParser, save_jsonl
+from ..run_metrics import StageMetrics, count_record_types, measure_stage, validation_stage
+from .synthetic import DEFAULT_LIG_PER_INVOICE, DEFAULT_SEED, DEFAULT_TEMPLATE_PATH, ensure_dataset, size_label
+
+LOGGER = logging.getLogger(__name__)
+
+# validation re-runs the structure check alone over the parsed records; the
+# structure_validation row under parsing is the share of it timed inside parse_file.
+BENCH_STAGES = ("extraction", "parsing", "validation", "jsonl", "excel", "pdf", "pdf_summary")
+# Memory mode: dataframe is the pd.DataFrame(records) built by export_to_excel
+# and excel_workbook the openpyxl writing of its main sheet, which together
+# split the excel stage; pdf / pdf_summary are dominated by the reportlab story.
+MEMORY_STAGES = ("parsing", "dataframe", "excel_workbook", "excel", "jsonl", "pdf", "pdf_summary")
+# Micro mode: functions timed per call on the bundled sample lines.
+MICRO_FUNCTIONS = (
+    "_coerce_value",
+    "plan_coercer",
+    "_normalize_numeric",
+    "_record_for_line",
+    "parse_line",
+    "_validate_structure",
+    "_infer_numeric_kind",
+    "_set_column_widths",
+)
+REPORT_FORMAT = 1
+# Figure compared against a baseline report, per report mode.
+_COMPARED_METRIC = {"timing": "wall_seconds", "memory": "peak_bytes", "micro": "ns_per_call"}
+# Rows of an Excel sheet, minus the title block and header written by export_to_excel.
+_EXCEL_MAX_RECORDS = 1_048_576 - 4
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class BenchmarkConfig:
+    sizes: list[int]
+    data_dir: Path
+    source_path: Path = _PROJECT_ROOT / "IDP470RA.pli"
+    program: str = "IDP470RA"
+    spec_pdf_path: Path | None = None
+    contract_path: Path | None = None
+    stages: tuple[str, ...] | None = None
+    repeat: int = 1
+    lig_per_invoice: int = DEFAULT_LIG_PER_INVOICE
+    seed: int = DEFAULT_SEED
+    template_path: Path | None = DEFAULT_TEMPLATE_PATH
+    workers: int = 1
+    reader: str = "text"
+    decimal_mode: str = "decimal"
+    fast_excel: bool = False
+    streaming: bool = False
+    memory: bool = False
+    micro: bool = False
+
+    def __post_init__(self) -> None:
+        if self.memory and self.micro:
+            raise ValueError("Les modes memoire et micro-benchmark sont exclusifs.")
+        known = MICRO_FUNCTIONS if self.micro else MEMORY_STAGES if self.memory else BENCH_STAGES
+        if self.stages is None:
+            self.stages = known
+        unknown = sorted(set(self.stages) - set(known))
+        if unknown:
+            allowed = ", ".join(known)
+            raise ValueError(f"Etape(s) de benchmark inconnue(s): {', '.join(unknown)}. Valeurs autorisees: {allowed}")
+        if self.repeat < 1:
+            raise ValueError("Le nombre de repetitions doit etre au moins 1.")
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=_PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def _environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": _git_revision(),
+    }
+
+
+def _summarize(runs: list[StageMetrics]) -> dict[str, Any]:
+    # Best run (lowest wall time) is the comparable figure; the median shows
+    # how noisy the machine was.
+    best = min(runs, key=lambda run: run.wall_seconds)
+    payload = best.as_dict()
+    payload["runs"] = len(runs)
+    payload["wall_seconds_median"] = round(statistics.median(run.wall_seconds for run in runs), 6)
+    peaks = [run.peak_rss_bytes for run in runs if run.peak_rss_bytes is not None]
+    payload["peak_rss_bytes"] = max(peaks) if peaks else None
+    return payload
+
+
+def _measure(name: str, repeat: int, lines: int | None, function: Callable[[], Any]) -> tuple[dict[str, Any], Any]:
+    runs: list[StageMetrics] = []
+    result: Any = None
+    for _ in range(repeat):
+        result = None  # drop the previous run's records before measuring again
+        gc.collect()
+        with measure_stage(name) as stage:
+            result = function()
+        stage.lines = lines
+        runs.append(stage)
+    LOGGER.info("Benchmark %s: %.3f s (meilleur de %s)", name, min(run.wall_seconds for run in runs), repeat)
+    return _summarize(runs), result
+
+
+def _load_or_extract_contract(config: BenchmarkConfig, report: dict[str, Any]) -> ContractSpec:
+    if config.contract_path is not None:
+        return ContractSpec.model_validate_json(config.contract_path.read_text(encoding="utf-8"))
+
+    def _extract() -> ContractSpec:
+        return extract_contract_deterministic(
+            source_path=config.source_path,
+            source_program=config.program,
+            spec_pdf_path=config.spec_pdf_path,
+        )
+
+    if "extraction" not in config.stages:
+        return _extract()
+    report["extraction"], contract = _measure("extraction", config.repeat, None, _extract)
+    return contract
+
+
+def _bench_dataset(
+    config: BenchmarkConfig,
+    contract: ContractSpec,
+    parser: FixedWidthParser,
+    target_lines: int,
+) -> dict[str, Any]:
+    input_path = ensure_dataset(
+        contract,
+        config.data_dir,
+        target_lines,
+        lig_per_invoice=config.lig_per_invoice,
+        seed=config.seed,
+        template_path=config.template_path,
+    )
+    with input_path.open("rb") as handle:
+        lines = sum(chunk.count(b"\n") for chunk in iter(lambda: handle.read(1 << 20), b""))
+    result: dict[str, Any] = {
+        "size": size_label(target_lines),
+        "lines": lines,
+        "bytes": input_path.stat().st_size,
+        "path": str(input_path),
+        "stages": [],
+        "skipped": {},
+    }
+    stages: list[dict[str, Any]] = result["stages"]
+    skipped: dict[str, str] = result["skipped"]
+    wanted = set(config.stages)
+    parse_options = {
+        "input_path": input_path,
+        "continue_on_error": True,
+        "workers": config.workers,
+        "reader": config.reader,
+    }
+
+    if config.streaming:
+        # Records are consumed as they are parsed: constant memory, but nothing
+        # is left for the JSONL / Excel / PDF stages.
+        def _stream() -> int:
+            return sum(1 for _ in parser.iter_records(**parse_options))
+
+        if "parsing" in wanted:
+            summary, _ = _measure("parsing", config.repeat, lines, _stream)
+            stages.append(summary)
+        for name in ("validation", "jsonl", "excel", "pdf", "pdf_summary"):
+            if name in wanted:
+                skipped[name] = "mode streaming"
+        return result
+
+    stats: dict[str, Any] = {}
+
+    def _parse() -> list[dict[str, Any]]:
+        stats.clear()
+        records, _ = parser.parse_file(**parse_options, stats=stats)
+        return records
+
+    if not wanted & {"parsing", "validation", "jsonl", "excel", "pdf", "pdf_summary"}:
+        return result
+    summary, records = _measure("parsing", config.repeat if "parsing" in wanted else 1, lines, _parse)
+    if "parsing" in wanted:
+        summary["records_by_type"] = dict(sorted(count_record_types(records).items()))
+        stages.append(summary)
+        validation = validation_stage(stats)
+        if validation is not None:
+            stages.append(validation.as_dict())
+    if "validation" in wanted:
+        summary, issues = _measure("validation", config.repeat, lines, lambda: parser._validate_structure(records))
+        summary["issues"] = len(issues)
+        stages.append(summary)
+
+    with tempfile.TemporaryDirectory(prefix="bench_", dir=config.data_dir) as temp_dir:
+        output_dir = Path(temp_dir)
+        exports: list[tuple[str, Callable[[], Any]]] = [
+            ("jsonl", lambda: save_jsonl(records=records, output_path=output_dir / "parsed_records.jsonl")),
+            (
+                "excel",
+                lambda: export_to_excel(
+                    records=records,
+                    output_path=output_dir / "parsed_records.xlsx",
+                    contract=contract,
+                    fast_mode=config.fast_excel,
+                ),
+            ),
+            ("pdf", lambda: export_first_invoice_pdf(records=records, output_path=output_dir / "facture_exemple.pdf")),
+            (
+                "pdf_summary",
+                lambda: export_accounting_summary_pdf(records=records, output_path=output_dir / "synthese_comptable.pdf"),
+            ),
+        ]
+        for name, function in exports:
+            if name not in wanted:
+                continue
+            if name == "excel" and len(records) > _EXCEL_MAX_RECORDS:
+                skipped[name] = f"{len(records)} enregistrements > limite Excel ({_EXCEL_MAX_RECORDS})"
+                continue
+            try:
+                summary, _ = _measure(name, config.repeat, lines, function)
+            except (RuntimeError, ValueError) as error:
+                skipped[name] = str(error)
+                continue
+            stages.append(summary)
+    return result
+
+
+def new_report(mode: str, config: BenchmarkConfig) -> dict[str, Any]:
+    config.data_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        "format": REPORT_FORMAT,
+        "mode": mode,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in asdict(config).items()},
+        "datasets": [],
+    }
+
+
+def run_pipeline_benchmark(config: BenchmarkConfig) -> dict[str, Any]:
+    # Times contract extraction once, then parsing, structure validation (timed
+    # inside parsing, and alone as the validation stage), JSONL, Excel and both PDFs on one synthetic file per
+    # size. The returned report is what --output-json writes and --baseline reads.
+    report = new_report("timing", config)
+    report["extraction"] = None
+    contract = _load_or_extract_contract(config, report)
+    parser = FixedWidthParser(contract, decimal_mode=config.decimal_mode)
+    for target_lines in config.sizes:
+        report["datasets"].append(_bench_dataset(config, contract, parser, target_lines))
+    return report
+
+
+def save_report(report: dict[str, Any], output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+
+
+def load_report(path: Path) -> dict[str, Any]:
+    report = json.loads(path.read_text(encoding="utf-8"))
+    if report.get("format") != REPORT_FORMAT:
+        raise ValueError(f"Format de rapport de benchmark non supporte: {path}")
+    return report
+
+
+# One stage figure (wall seconds for timing reports, peak bytes for memory
+# reports, ns per call for micro reports) against the same stage of the
+# baseline report.
+@dataclass
+class StageComparison:
+    size: str
+    stage: str
+    value: float
+    baseline_value: float
+
+    @property
+    def change_pct(self) -> float:
+        if self.baseline_value <= 0:
+            return 0.0
+        return (self.value - self.baseline_value) / self.baseline_value * 100
+
+
+def _stage_values(report: dict[str, Any], metric: str) -> dict[tuple[str, str], float]:
+    values: dict[tuple[str, str], float] = {}
+    if report.get("extraction"):
+        values[("-", "extraction")] = report["extraction"][metric]
+    for dataset in report.get("datasets", []):
+        for stage in dataset["stages"]:
+            if "included_in" not in stage and stage.get(metric) is not None:
+                values[(dataset["size"], stage["name"])] = stage[metric]
+    for function in report.get("functions", []):
+        values[("-", function["name"])] = function[metric]
+    return values
+
+
+def compare_reports(report: dict[str, Any], baseline: dict[str, Any]) -> list[StageComparison]:
+    # Stages present in both reports, matched by dataset size label and name.
+    mode = report.get("mode", "timing")
+    if baseline.get("mode", "timing") != mode:
+        raise ValueError("Le rapport de reference doit etre du meme mode (temps, memoire ou micro).")
+    metric = _COMPARED_METRIC[mode]
+    base_values = _stage_values(baseline, metric)
+    return [
+        StageComparison(size, stage, value, base_values[(size, stage)])
+        for (size, stage), value in _stage_values(report, metric).items()
+        if (size, stage) in base_values
+    ]
+
+
+def _format_bytes(value: int | None) -> str:
+    return "-" if value is None else f"{value / (1024 * 1024):.0f}"
+
+
+def _format_row(size: str, stage: dict[str, Any], change: StageComparison | None) -> str:
+    rate = stage.get("lines_per_second")
+    name = stage["name"] + (" *" if "included_in" in stage else "")
+    row = (
+        f"{size:>6}  {name:<22} {stage['wall_seconds']:>10.3f} {stage.get('wall_seconds_median', stage['wall_seconds']):>10.3f}"
+        f" {stage['cpu_seconds']:>9.3f} {('-' if rate is None else f'{rate:,.0f}'):>12} {_format_bytes(stage.get('peak_rss_bytes')):>8}"
+    )
+    if change is not None:
+        row += f" {change.change_pct:>+8.1f}%"
+    return row
+
+
+def format_report(report: dict[str, Any], comparisons: Sequence[StageComparison] = ()) -> str:
+    by_key = {(item.size, item.stage): item for item in comparisons}
+    header = (
+        f"{'Taille':>6}  {'Etape':<22} {'Meilleur s':>10} {'Median s':>10} {'CPU s':>9} {'Lignes/s':>12} {'RSS Mo':>8}"
+    )
+    if comparisons:
+        header += f" {'vs base':>9}"
+    environment = report["environment"]
+    out = [
+        f"Benchmark IDP470 - Python {environment['python']} - {environment['platform']} - "
+        f"{environment['cpu_count']} CPU - revision {environment['git_revision'] or '?'}",
+        header,
+        "-" * len(header),
+    ]
+    if report.get("extraction"):
+        out.append(_format_row("-", report["extraction"], by_key.get(("-", "extraction"))))
+    for dataset in report["datasets"]:
+        for stage in dataset["stages"]:
+            out.append(_format_row(dataset["size"], stage, by_key.get((dataset["size"], stage["name"]))))
+        for name, reason in dataset["skipped"].items():
+            out.append(f"{dataset['size']:>6}  {name:<22} ignore: {reason}")
+        out.append(f"{'':>6}  {dataset['lines']} lignes, {dataset['bytes'] / (1024 * 1024):.1f} Mo: {dataset['path']}")
+    out.append("* inclus dans le temps de parsing")
+    return "\n".join(out)
+
+
+def find_regressions(comparisons: Sequence[StageComparison], max_regression_pct: float) -> list[StageComparison]:
+    return [item for item in comparisons if item.change_pct > max_regression_pct]
+
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from ..models import ContractSpec, FieldSpec, FieldType, FieldUsage, RecordSpec
+from ..parse_cache import contract_fingerprint
+
+LOGGER = logging.getLogger(__name__)
+
+# Bundled FACDEMAT sample used as line templates (one invoice of 495 lines).
+DEFAULT_TEMPLATE_PATH = Path(__file__).resolve().parents[2] / "facdemat_20251021_nufac29501954.txt"
+
+SIZE_PRESETS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_LIG_PER_INVOICE = 20
+DEFAULT_SEED = 470
+
+_SIZE_RE = re.compile(r"^(\d+)([km]?)$")
+_VARIANTS_PER_TEMPLATE = 16
+_FIRST_INVOICE_NUMBER = 30_000_000
+_CLIENTS_PER_INVOICE = 0.25
+# Invoice block of a contract-only file (no template): the IDIL 3.2 order.
+_DEFAULT_BLOCK = (("ENT", 1), ("ECH", 1), ("COM", 2), ("REF", 2), ("ADR", 1), ("AD2", 1), ("LIG", 1), ("PIE", 1))
+
+
+def parse_size(text: str) -> int:
+    # "10k", "1m", "250000" -> number of lines.
+    value = text.strip().lower()
+    if value in SIZE_PRESETS:
+        return SIZE_PRESETS[value]
+    match = _SIZE_RE.match(value)
+    if match is None:
+        raise ValueError(f"Taille de jeu de donnees invalide '{text}' (ex: 10k, 100k, 1m, 250000).")
+    number, unit = match.groups()
+    return int(number) * {"": 1, "k": 1_000, "m": 1_000_000}[unit]
+
+
+def size_label(lines: int) -> str:
+    for label, value in SIZE_PRESETS.items():
+        if value == lines:
+            return label
+    return str(lines)
+
+
+@dataclass(frozen=True)
+class _Patch:
+    start: int
+    end: int
+
+
+def _patch(record: RecordSpec, name: str) -> _Patch | None:
+    for field in record.fields:
+        if field.name == name:
+            return _Patch(field.start - 1, field.start - 1 + field.length)
+    return None
+
+
+def _is_amount(field: FieldSpec) -> bool:
+    return field.type == FieldType.DECIMAL and field.usage == FieldUsage.DISPLAY
+
+
+def _blank_line(record: RecordSpec, line_length: int) -> str:
+    # Contract-only line: zero-filled numbers, blank strings, selector value.
+    chars = [" "] * line_length
+    for field in record.fields:
+        if field.type in {FieldType.INTEGER, FieldType.DECIMAL}:
+            chars[field.start - 1 : field.start - 1 + field.length] = "0" * field.length
+    selector = record.selector
+    chars[selector.start - 1 : selector.end] = selector.value
+    return "".join(chars)
+
+
+# Line templates of one record type: each sample line comes in a few variants
+# whose amount digits (DISPLAY decimals) are redrawn, so the generated file
+# does not repeat the same values while keeping the sample's byte layout.
+class _TemplatePool:
+    def __init__(self, record: RecordSpec, lines: list[str], rng: random.Random) -> None:
+        amount_slices = [(field.start - 1, field.start - 1 + field.length) for field in record.fields if _is_amount(field)]
+        self.variants: list[str] = []
+        for line in lines:
+            for _ in range(_VARIANTS_PER_TEMPLATE if amount_slices else 1):
+                chars = list(line)
+                for start, end in amount_slices:
+                    for index in range(start, min(end, len(chars))):
+                        if chars[index].isdigit():
+                            chars[index] = str(rng.randrange(10))
+                self.variants.append("".join(chars))
+
+    def take(self, rng: random.Random) -> str:
+        return self.variants[rng.randrange(len(self.variants))]
+
+
+def _record_type_of(line: str, contract: ContractSpec) -> str | None:
+    for record in contract.record_types:
+        selector = record.selector
+        if line[selector.start - 1 : selector.end] == selector.value:
+            return record.name
+    return None
+
+
+def _template_block(template_lines: list[str], contract: ContractSpec) -> list[tuple[str, int]]:
+    # Record type runs of the first invoice of the template (ENT up to the next ENT).
+    block: list[tuple[str, int]] = []
+    started = False
+    for line in template_lines:
+        record_type = _record_type_of(line, contract)
+        if record_type == "ENT":
+            if started:
+                break
+            started = True
+        if not started or record_type is None:
+            continue
+        if block and block[-1][0] == record_type:
+            block[-1] = (record_type, block[-1][1] + 1)
+        else:
+            block.append((record_type, 1))
+    return block
+
+
+def iter_synthetic_lines(
+    contract: ContractSpec,
+    lines: int,
+    lig_per_invoice: int = DEFAULT_LIG_PER_INVOICE,
+    seed: int = DEFAULT_SEED,
+    template_path: Path | None = DEFAULT_TEMPLATE_PATH,
+) -> Iterator[str]:
+    # Deterministic FACDEMAT lines (same arguments -> same file): whole invoice
+    # blocks shaped like the template's first invoice, with lig_per_invoice LIG
+    # lines, until at least `lines` lines. Each invoice gets its own NUFAC, LIG
+    # lines are numbered (NULIG) and ADR lines point to a pool of clients.
+    # Without a template file, lines are built from the contract alone.
+    if lines < 1 or lig_per_invoice < 1:
+        raise ValueError("Le nombre de lignes et de LIG par facture doit etre positif.")
+    rng = random.Random(seed)
+    records = {record.name: record for record in contract.record_types}
+    template_lines: list[str] = []
+    if template_path is not None and template_path.exists():
+        template_lines = template_path.read_text(encoding="latin-1").splitlines()
+    else:
+        LOGGER.warning("Modele FACDEMAT introuvable (%s): lignes generees depuis le contrat seul.", template_path)
+
+    by_type: dict[str, list[str]] = {}
+    for line in template_lines:
+        record_type = _record_type_of(line, contract)
+        if record_type is not None and len(line) == contract.line_length:
+            by_type.setdefault(record_type, []).append(line)
+    block = _template_block(template_lines, contract) if template_lines else []
+    if not block:
+        block = [(name, count) for name, count in _DEFAULT_BLOCK if name in records]
+    block = [(name, lig_per_invoice if name == "LIG" else count) for name, count in block]
+
+    pools = {
+        name: _TemplatePool(
+            records[name],
+            by_type.get(name) or [_blank_line(records[name], contract.line_length)],
+            rng,
+        )
+        for name, _ in block
+    }
+    nufac = {name: _patch(records[name], "NUFAC") for name, _ in block}
+    nulig = _patch(records["LIG"], "NULIG") if "LIG" in records else None
+    noclient = _patch(records["ADR"], "CLLIV_NOCLI") if "ADR" in records else None
+
+    block_lines = sum(count for _, count in block)
+    client_count = max(1, int(-(-lines // block_lines) * _CLIENTS_PER_INVOICE))
+    emitted = 0
+    invoice = 0
+    while emitted < lines:
+        invoice_number = f"{_FIRST_INVOICE_NUMBER + invoice:08d}"
+        for name, count in block:
+            pool = pools[name]
+            patch = nufac[name]
+            for index in range(count):
+                line = pool.take(rng)
+                if patch is not None:
+                    value = invoice_number.ljust(patch.end - patch.start)
+                    line = line[: patch.start] + value + line[patch.end :]
+                if name == "LIG" and nulig is not None:
+                    width = nulig.end - nulig.start
+                    line = line[: nulig.start] + f"{index + 1:0{width}d}" + line[nulig.end :]
+                elif name == "ADR" and noclient is not None:
+                    value = f"CLIENT {rng.randrange(client_count):06d}".ljust(noclient.end - noclient.start)
+                    line = line[: noclient.start] + value + line[noclient.end :]
+                yield line
+        emitted += block_lines
+        invoice += 1
+
+
+def synthesize_facdemat(
+    contract: ContractSpec,
+    output_path: Path,
+    lines: int,
+    lig_per_invoice: int = DEFAULT_LIG_PER_INVOICE,
+    seed: int = DEFAULT_SEED,
+    template_path: Path | None = DEFAULT_TEMPLATE_PATH,
+) -> int:
+    # Writes the synthetic file (latin-1, LF line ends); returns its line count.
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f"{output_path.name}.tmp")
+    count = 0
+    with temp_path.open("w", encoding="latin-1", newline="\n") as handle:
+        for line in iter_synthetic_lines(contract, lines, lig_per_invoice, seed, template_path):
+            handle.write(line)
+            handle.write("\n")
+            count += 1
+    temp_path.replace(output_path)
+    return count
+
+
+def ensure_dataset(
+    contract: ContractSpec,
+    data_dir: Path,
+    lines: int,
+    lig_per_invoice: int = DEFAULT_LIG_PER_INVOICE,
+    seed: int = DEFAULT_SEED,
+    template_path: Path | None = DEFAULT_TEMPLATE_PATH,
+) -> Path:
+    # Generated files are kept in data_dir and reused by later runs (the name
+    # carries every generation parameter, including the contract fingerprint).
+    fingerprint = contract_fingerprint(contract)[:8]
+    path = data_dir / f"facdemat_synth_{size_label(lines)}_lig{lig_per_invoice}_seed{seed}_{fingerprint}.txt"
+    if path.exists():
+        return path
+    LOGGER.info("Generation du jeu synthetique %s", path)
+    synthesize_facdemat(contract, path, lines, lig_per_invoice, seed, template_path)
+    return path
@@ -4,13 +4,45 @@ import argparse
 import json
 import logging
 from pathlib import Path
-
+from typing import Any
+
+from .benchmarks import (
+    BENCH_STAGES,
+    MEMORY_STAGES,
+    MICRO_FUNCTIONS,
+    BenchmarkConfig,
+    compare_reports,
+    find_regressions,
+    format_memory_report,
+    format_micro_report,
+    format_report,
+    load_report,
+    parse_size,
+    run_memory_benchmark,
+    run_micro_benchmark,
+    run_pipeline_benchmark,
+    save_report,
+)
+from .benchmarks.synthetic import DEFAULT_LIG_PER_INVOICE, DEFAULT_SEED
 from .deterministic_extractor import extract_contract_deterministic
+from .export_stage import PDF_RECORD_TYPES, ExportTask, records_for_types, run_exports
 from .exporters import export_accounting_summary_pdf, export_first_invoice_pdf, export_to_excel
 from .genai_extractor import GenAIExtractionError, GenAISettings, extract_contract_with_genai
 from .idil_structure_rules import attach_idil_structure_rules
 from .models import ContractSpec
-from .parsing_engine import ContractValidationError, FixedWidthParser, ParsingError, load_jsonl, save_jsonl
+from .parse_cache import DEFAULT_CACHE_MAX_BYTES, ParseCache
+from .parsing_engine import (
+    ContractValidationError,
+    FixedWidthParser,
+    IssueLog,
+    ParsingError,
+    SUPPORTED_DECIMAL_MODES,
+    SUPPORTED_READERS,
+    load_jsonl,
+    parse_field_projection,
+    save_jsonl,
+)
+from .run_metrics import RUN_METRICS_FILE_NAME, RunMetrics, fill_parse_stage, validation_stage
 
 LOGGER = logging.getLogger(__name__)
 
@@ -78,20 +110,66 @@ def _extract_command(args: argparse.Namespace) -> int:
     return 0
 
 
+def _field_projection(args: argparse.Namespace) -> dict[str, list[str]] | None:
+    return parse_field_projection(args.fields) if args.fields else None
+
+
+def _record_type_filter(args: argparse.Namespace) -> list[str] | None:
+    if not args.record_types:
+        return None
+    return [item.strip() for item in args.record_types.split(",") if item.strip()]
+
+
+def _parse_cache(args: argparse.Namespace) -> ParseCache | None:
+    if not args.cache_dir:
+        return None
+    return ParseCache(Path(args.cache_dir), max_bytes=args.cache_max_mb * 1024 * 1024)
+
+
+def _log_issues(issues: IssueLog) -> None:
+    if not issues:
+        return
+    LOGGER.warning("Parsing issues: %s", len(issues))
+    for message_class, count in issues.counts.most_common():
+        LOGGER.warning("  %s x %s", count, message_class)
+    if issues.output_path is not None:
+        LOGGER.info("Parsing issues written to %s", issues.output_path)
+
+
 def _parse_command(args: argparse.Namespace) -> int:
     contract = _load_contract(Path(args.contract))
-    parser = FixedWidthParser(contract)
-    records, issues = parser.parse_file(
-        input_path=Path(args.input),
-        encoding=args.input_encoding,
-        continue_on_error=args.continue_on_error,
-    )
-
+    parser = FixedWidthParser(contract, decimal_mode=args.decimal_mode, fields=_field_projection(args))
+    cache = _parse_cache(args)
+    issues_path = Path(args.issues_jsonl) if args.issues_jsonl else None
     output_jsonl = Path(args.output_jsonl)
-    save_jsonl(records=records, output_path=output_jsonl)
-    LOGGER.info("Parsed %s records into %s", len(records), output_jsonl)
-    if issues:
-        LOGGER.warning("Parsing issues: %s", len(issues))
+    if cache is not None:
+        records, issues = cache.parse_file(
+            parser,
+            input_path=Path(args.input),
+            encoding=args.input_encoding,
+            continue_on_error=args.continue_on_error,
+            workers=args.workers,
+            reader=args.reader,
+            record_types=_record_type_filter(args),
+            max_issue_samples=args.max_issue_samples,
+            issues_path=issues_path,
+        )
+        count = save_jsonl(records=records, output_path=output_jsonl)
+    else:
+        with IssueLog(max_samples=args.max_issue_samples, output_path=issues_path) as issues:
+            records = parser.iter_records(
+                input_path=Path(args.input),
+                encoding=args.input_encoding,
+                continue_on_error=args.continue_on_error,
+                on_issue=issues.add,
+                workers=args.workers,
+                reader=args.reader,
+                record_types=_record_type_filter(args),
+            )
+            count = save_jsonl(records=records, output_path=output_jsonl)
+
+    LOGGER.info("Parsed %s records into %s", count, output_jsonl)
+    _log_issues(issues)
     return 0
 
 
@@ -116,6 +194,26 @@ def _pdf_summary_command(args: argparse.Namespace) -> int:
     return 0
 
 
+def _extract_or_load_contract(args: argparse.Namespace, source_path: Path, contract_path: Path) -> ContractSpec:
+    if contract_path.exists() and not args.force_extract:
+        LOGGER.info("Using existing contract: %s", contract_path)
+        return _load_contract(contract_path)
+    extract_args = argparse.Namespace(
+        source=str(source_path),
+        output=str(contract_path),
+        provider=args.provider,
+        model=args.model,
+        program=args.program,
+        source_encoding=args.source_encoding,
+        temperature=args.temperature,
+        fallback_deterministic=args.fallback_deterministic,
+        disable_strict_length_validation=args.disable_strict_length_validation,
+        spec_pdf=args.spec_pdf,
+    )
+    _extract_command(extract_args)
+    return _load_contract(contract_path)
+
+
 def _run_command(args: argparse.Namespace) -> int:
     source_path = Path(args.source)
     input_path = Path(args.input)
@@ -124,39 +222,53 @@ def _run_command(args: argparse.Namespace) -> int:
 
     contract_path = Path(args.contract) if args.contract else output_dir / "idp470ra_contract.json"
     parsed_path = output_dir / "parsed_records.jsonl"
+    issues_path = output_dir / "issues.jsonl"
     excel_path = output_dir / "parsed_records.xlsx"
     pdf_path = output_dir / "facture_exemple.pdf"
     accounting_pdf_path = output_dir / "synthese_comptable.pdf"
+    metrics = RunMetrics()
 
-    if contract_path.exists() and not args.force_extract:
-        contract = _load_contract(contract_path)
-        LOGGER.info("Using existing contract: %s", contract_path)
-    else:
-        extract_args = argparse.Namespace(
-            source=str(source_path),
-            output=str(contract_path),
-            provider=args.provider,
-            model=args.model,
-            program=args.program,
-            source_encoding=args.source_encoding,
-            temperature=args.temperature,
-            fallback_deterministic=args.fallback_deterministic,
-            disable_strict_length_validation=args.disable_strict_length_validation,
-            spec_pdf=args.spec_pdf,
-        )
-        _extract_command(extract_args)
-        contract = _load_contract(contract_path)
+    with metrics.stage("extraction") as stage:
+        contract = _extract_or_load_contract(args, source_path, contract_path)
+        stage.details["record_types"] = len(contract.record_types)
 
-    def _parse_with_contract(active_contract: ContractSpec) -> tuple[list[dict], list]:
-        parser = FixedWidthParser(active_contract)
+    def _parse_with_contract(active_contract: ContractSpec, stats: dict[str, Any]) -> tuple[list[dict], IssueLog]:
+        parser = FixedWidthParser(
+            active_contract,
+            decimal_mode=args.decimal_mode,
+            fields=_field_projection(args),
+        )
+        cache = _parse_cache(args)
+        if cache is not None:
+            return cache.parse_file(
+                parser,
+                input_path=input_path,
+                encoding=args.input_encoding,
+                continue_on_error=args.continue_on_error,
+                workers=args.workers,
+                reader=args.reader,
+                record_types=_record_type_filter(args),
+                max_issue_samples=args.max_issue_samples,
+                issues_path=issues_path,
+                stats=stats,
+            )
         return parser.parse_file(
             input_path=input_path,
             encoding=args.input_encoding,
             continue_on_error=args.continue_on_error,
+            workers=args.workers,
+            reader=args.reader,
+            record_types=_record_type_filter(args),
+            max_issue_samples=args.max_issue_samples,
+            issues_path=issues_path,
+            stats=stats,
         )
 
+    parse_stats: dict[str, Any] = {}
     try:
-        records, issues = _parse_with_contract(contract)
+        with metrics.stage("parsing") as stage:
+            records, issues = _parse_with_contract(contract, parse_stats)
+            fill_parse_stage(stage, parse_stats, records, len(issues))
     except (ParsingError, ContractValidationError):
         if not args.fallback_deterministic or args.provider == "deterministic":
             raise
@@ -171,26 +283,98 @@ def _run_command(args: argparse.Namespace) -> int:
             spec_pdf_path=Path(args.spec_pdf) if args.spec_pdf else None,
         )
         _save_contract(contract=contract, output_path=contract_path)
-        records, issues = _parse_with_contract(contract)
-    save_jsonl(records=records, output_path=parsed_path)
+        parse_stats = {}
+        with metrics.stage("parsing") as stage:
+            records, issues = _parse_with_contract(contract, parse_stats)
+            fill_parse_stage(stage, parse_stats, records, len(issues))
+    metrics.add(validation_stage(parse_stats))
+    with metrics.stage("jsonl") as stage:
+        stage.lines = save_jsonl(records=records, output_path=parsed_path)
     LOGGER.info("JSONL exported: %s (%s records)", parsed_path, len(records))
-    if issues:
-        LOGGER.warning("Parsing issues encountered: %s", len(issues))
-
-    export_to_excel(records=records, output_path=excel_path, contract=contract)
+    _log_issues(issues)
 
-    try:
-        logo = Path(args.logo) if args.logo else None
-        export_first_invoice_pdf(records=records, output_path=pdf_path, logo_path=logo)
-    except (RuntimeError, ValueError) as error:
-        LOGGER.warning("PDF not generated: %s", error)
+    logo = Path(args.logo) if args.logo else None
+    pdf_records = records_for_types(records, PDF_RECORD_TYPES) if args.export_workers > 1 else records
+    with metrics.stage("exports"):
+        export_errors = run_exports(
+            [
+                ExportTask(
+                    "excel",
+                    export_to_excel,
+                    {"records": records, "output_path": excel_path, "contract": contract},
+                ),
+                ExportTask(
+                    "pdf",
+                    export_first_invoice_pdf,
+                    {"records": pdf_records, "output_path": pdf_path, "logo_path": logo},
+                    tolerated=(RuntimeError, ValueError),
+                ),
+                ExportTask(
+                    "accounting_pdf",
+                    export_accounting_summary_pdf,
+                    {"records": pdf_records, "output_path": accounting_pdf_path, "logo_path": logo},
+                    tolerated=(RuntimeError, ValueError),
+                ),
+            ],
+            workers=args.export_workers,
+            metrics=metrics,
+        )
+    if "pdf" in export_errors:
+        LOGGER.warning("PDF not generated: %s", export_errors["pdf"])
+    if "accounting_pdf" in export_errors:
+        LOGGER.warning("Accounting summary PDF not generated: %s", export_errors["accounting_pdf"])
+
+    metrics_path = output_dir / RUN_METRICS_FILE_NAME
+    metrics.save(metrics_path)
+    LOGGER.info("Run metrics saved to %s", metrics_path)
+    return 0
 
-    try:
-        logo = Path(args.logo) if args.logo else None
-        export_accounting_summary_pdf(records=records, output_path=accounting_pdf_path, logo_path=logo)
-    except (RuntimeError, ValueError) as error:
-        LOGGER.warning("Accounting summary PDF not generated: %s", error)
 
+def _bench_command(args: argparse.Namespace) -> int:
+    config = BenchmarkConfig(
+        sizes=[parse_size(item) for item in args.sizes.split(",") if item.strip()],
+        data_dir=Path(args.data_dir),
+        source_path=Path(args.source),
+        program=args.program,
+        spec_pdf_path=Path(args.spec_pdf) if args.spec_pdf else None,
+        contract_path=Path(args.contract) if args.contract else None,
+        stages=tuple(item.strip() for item in args.stages.split(",") if item.strip()) if args.stages else None,
+        repeat=args.repeat,
+        lig_per_invoice=args.lig_per_invoice,
+        seed=args.seed,
+        workers=args.workers,
+        reader=args.reader,
+        decimal_mode=args.decimal_mode,
+        fast_excel=args.fast_excel,
+        streaming=args.streaming,
+        memory=args.memory,
+        micro=args.micro,
+    )
+    if args.memory:
+        report = run_memory_benchmark(config, trace=not args.no_tracemalloc)
+    elif args.micro:
+        report = run_micro_benchmark(config)
+    else:
+        report = run_pipeline_benchmark(config)
+    comparisons = compare_reports(report, load_report(Path(args.baseline))) if args.baseline else []
+    formatter = {"memory": format_memory_report, "micro": format_micro_report}.get(report["mode"], format_report)
+    print(formatter(report, comparisons))
+    if args.output_json:
+        save_report(report, Path(args.output_json))
+        LOGGER.info("Benchmark report saved to %s", args.output_json)
+    if args.max_regression is not None and comparisons:
+        regressions = find_regressions(comparisons, args.max_regression)
+        for item in regressions:
+            LOGGER.error(
+                "Regression %s/%s: %s vs %s (%+.1f%%)",
+                item.size,
+                item.stage,
+                item.value,
+                item.baseline_value,
+                item.change_pct,
+            )
+        if regressions:
+            return 1
     return 0
 
 
@@ -230,6 +414,47 @@ def build_parser() -> argparse.ArgumentParser:
     parse.add_argument("--output-jsonl", required=True, help="Output JSONL path.")
     parse.add_argument("--input-encoding", default="latin-1", help="Input file encoding.")
     parse.add_argument("--continue-on-error", action="store_true", help="Continue parsing when a line fails.")
+    parse.add_argument(
+        "--max-issue-samples",
+        type=int,
+        default=100,
+        help="Failing lines kept in memory (all issues are still counted per class).",
+    )
+    parse.add_argument("--issues-jsonl", default=None, help="Optional JSONL path receiving every parsing issue.")
+    parse.add_argument("--workers", type=int, default=1, help="Parsing processes (1 = sequential).")
+    parse.add_argument(
+        "--reader",
+        default="text",
+        choices=sorted(SUPPORTED_READERS),
+        help=(
+            "Input reader: text lines, mmap byte slicing (single-byte encodings), "
+            "fixed records of line_length bytes without line breaks (EBCDIC, COMP-3/COMP fields), "
+            "or RECFM=VB records behind BDW/RDW descriptors."
+        ),
+    )
+    parse.add_argument(
+        "--decimal-mode",
+        default="decimal",
+        choices=sorted(SUPPORTED_DECIMAL_MODES),
+        help="DECIMAL fields as Decimal, or as exact fixed-point scaled integers.",
+    )
+    parse.add_argument(
+        "--fields",
+        default=None,
+        help="Fields to keep per record type, e.g. ENT.NUFAC,ENT.MONHT (other types keep all fields).",
+    )
+    parse.add_argument(
+        "--record-types",
+        default=None,
+        help="Record types to output, e.g. ENT,ADR (other lines are skipped after dispatch).",
+    )
+    parse.add_argument("--cache-dir", default=None, help="Parse result cache directory (disabled if omitted).")
+    parse.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="Parse cache size limit in MB (least recently used entries are evicted).",
+    )
     parse.set_defaults(handler=_parse_command)
 
     excel = subparsers.add_parser("excel", help="Export parsed JSONL to Excel.")
@@ -269,6 +494,52 @@ def build_parser() -> argparse.ArgumentParser:
     run.add_argument("--source-encoding", default="latin-1", help="Source file encoding.")
     run.add_argument("--input-encoding", default="latin-1", help="Input file encoding.")
     run.add_argument("--continue-on-error", action="store_true", help="Continue parsing when a line fails.")
+    run.add_argument(
+        "--max-issue-samples",
+        type=int,
+        default=100,
+        help="Failing lines kept in memory (every issue is written to issues.jsonl).",
+    )
+    run.add_argument("--workers", type=int, default=1, help="Parsing processes (1 = sequential).")
+    run.add_argument(
+        "--export-workers",
+        type=int,
+        default=1,
+        help="Exporters run at the same time (Excel, invoice PDF, accounting PDF; 1 = sequential).",
+    )
+    run.add_argument(
+        "--reader",
+        default="text",
+        choices=sorted(SUPPORTED_READERS),
+        help=(
+            "Input reader: text lines, mmap byte slicing (single-byte encodings), "
+            "fixed records of line_length bytes without line breaks (EBCDIC, COMP-3/COMP fields), "
+            "or RECFM=VB records behind BDW/RDW descriptors."
+        ),
+    )
+    run.add_argument(
+        "--decimal-mode",
+        default="decimal",
+        choices=sorted(SUPPORTED_DECIMAL_MODES),
+        help="DECIMAL fields as Decimal, or as exact fixed-point scaled integers.",
+    )
+    run.add_argument(
+        "--fields",
+        default=None,
+        help="Fields to keep per record type, e.g. ENT.NUFAC,ENT.MONHT (other types keep all fields).",
+    )
+    run.add_argument(
+        "--record-types",
+        default=None,
+        help="Record types to output, e.g. ENT,ADR (other lines are skipped after dispatch).",
+    )
+    run.add_argument("--cache-dir", default=None, help="Parse result cache directory (disabled if omitted).")
+    run.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="Parse cache size limit in MB (least recently used entries are evicted).",
+    )
     run.add_argument("--logo", default=None, help="Optional logo path for PDF.")
     run.add_argument(
         "--disable-strict-length-validation",
@@ -277,6 +548,72 @@ def build_parser() -> argparse.ArgumentParser:
     )
     run.set_defaults(handler=_run_command)
 
+    bench = subparsers.add_parser("bench", help="Benchmark the pipeline stages on synthetic FACDEMAT files.")
+    bench.add_argument(
+        "--sizes",
+        default="10k,100k",
+        help="Synthetic file sizes in lines, e.g. 10k,100k,1m,10m (1m and more need several GB of RAM).",
+    )
+    bench.add_argument("--lig-per-invoice", type=int, default=DEFAULT_LIG_PER_INVOICE, help="LIG lines per ENT block.")
+    bench.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the synthetic data (same seed = same file).")
+    bench.add_argument("--data-dir", default="bench_data", help="Directory of the generated files (reused across runs).")
+    bench.add_argument("--source", default="IDP470RA.pli", help="Source code path for contract extraction.")
+    bench.add_argument("--program", default="IDP470RA", help="Source program name.")
+    bench.add_argument("--spec-pdf", default=None, help="Optional DOCTECHN PDF path for structure rules.")
+    bench.add_argument("--contract", default=None, help="Contract JSON path (skips the extraction stage).")
+    bench.add_argument(
+        "--stages",
+        default=None,
+        help=(
+            f"Stages to measure (all by default), among {','.join(BENCH_STAGES)}, "
+            f"with --memory among {','.join(MEMORY_STAGES)}, "
+            f"or with --micro among {','.join(MICRO_FUNCTIONS)}."
+        ),
+    )
+    bench.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Runs per stage; the best run is reported (with --micro: timing rounds, at least 7).",
+    )
+    bench.add_argument("--workers", type=int, default=1, help="Parsing processes (1 = sequential).")
+    bench.add_argument("--reader", default="text", choices=sorted(SUPPORTED_READERS), help="Input reader.")
+    bench.add_argument("--decimal-mode", default="decimal", choices=sorted(SUPPORTED_DECIMAL_MODES))
+    bench.add_argument("--fast-excel", action="store_true", help="Excel export in fast mode (web default).")
+    bench.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Parse without keeping records (constant memory; JSONL, Excel and PDF stages are skipped).",
+    )
+    mode = bench.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--memory",
+        action="store_true",
+        help="Measure peak and retained memory per stage (tracemalloc + RSS sampling) instead of time.",
+    )
+    mode.add_argument(
+        "--micro",
+        action="store_true",
+        help="Time the parser and Excel hot functions in ns per call on the bundled sample lines.",
+    )
+    bench.add_argument(
+        "--no-tracemalloc",
+        action="store_true",
+        help="With --memory: RSS figures only (tracemalloc slows the stages several times).",
+    )
+    bench.add_argument("--output-json", default=None, help="Write the report as JSON (to compare later runs).")
+    bench.add_argument("--baseline", default=None, help="Previous JSON report to compare with.")
+    bench.add_argument(
+        "--max-regression",
+        type=float,
+        default=None,
+        help=(
+            "With --baseline: exit with code 1 if a stage (or, with --micro, a function) is slower "
+            "(or, with --memory, needs more memory) than the baseline by more than this percent."
+        ),
+    )
+    bench.set_defaults(handler=_bench_command)
+
     return parser
 
 
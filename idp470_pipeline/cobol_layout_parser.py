@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
-from .models import ContractSpec, FieldSpec, FieldType, RecordSpec, SelectorSpec
+from .models import ContractSpec, FieldSpec, FieldType, FieldUsage, RecordSpec, SelectorSpec, SignPosition
 
 
 _COBOL_LINE_SEQ_RE = re.compile(r"^\s*\d{6}")
@@ -12,11 +12,22 @@ _COBOL_INLINE_COMMENT_RE = re.compile(r"\*>.*$")
 _LEVEL_RE = re.compile(r"^\s*(\d{1,2})\s+([A-Z0-9-]+)(.*)$", re.IGNORECASE)
 _PIC_RE = re.compile(r"\bPIC(?:TURE)?\s+([A-Z0-9\(\)V\+\-\.,/SBZAXP]+)", re.IGNORECASE)
 _USAGE_RE = re.compile(
-    r"\b(?:USAGE\s+IS\s+|USAGE\s+)?(COMP-3|COMP-1|COMP-2|COMP-4|COMP|BINARY|DISPLAY)\b",
+    r"\b(?:USAGE\s+IS\s+|USAGE\s+)?(COMP-3|COMP-1|COMP-2|COMP-4|COMP-5|COMP|BINARY|DISPLAY)\b",
     re.IGNORECASE,
 )
 _OCCURS_RE = re.compile(r"\bOCCURS\s+(\d+)(?:\s+TO\s+(\d+))?\b", re.IGNORECASE)
 _REDEFINES_RE = re.compile(r"\bREDEFINES\b", re.IGNORECASE)
+_SIGN_RE = re.compile(r"\b(LEADING|TRAILING)?\s*(SEPARATE)\b|\b(LEADING|TRAILING)\b", re.IGNORECASE)
+_USAGE_MAP = {
+    "COMP-3": FieldUsage.PACKED,
+    "COMP": FieldUsage.BINARY,
+    "COMP-4": FieldUsage.BINARY,
+    "COMP-5": FieldUsage.BINARY,
+    "BINARY": FieldUsage.BINARY,
+    "COMP-1": FieldUsage.FLOAT,
+    "COMP-2": FieldUsage.FLOAT,
+}
+_FLOAT_LENGTHS = {"COMP-1": 4, "COMP-2": 8}
 
 
 @dataclass
@@ -36,6 +47,9 @@ class _ParsedType:
     length: int
     field_type: FieldType
     decimals: int | None
+    usage: FieldUsage = FieldUsage.DISPLAY
+    signed: bool = False
+    sign_position: SignPosition = SignPosition.TRAILING
 
 
 def _normalize_identifier(value: str) -> str:
@@ -107,6 +121,7 @@ def _parse_picture(pic: str, usage: str | None) -> _ParsedType | None:
     physical_length = 0
     decimal_part = False
     has_alpha = False
+    signed = "S" in tokens
 
     for token in tokens:
         if token == "V":
@@ -127,7 +142,7 @@ def _parse_picture(pic: str, usage: str | None) -> _ParsedType | None:
     if numeric_positions > 0:
         if normalized_usage == "COMP-3":
             physical_length = max(1, (numeric_positions + 1) // 2)
-        elif normalized_usage in {"COMP", "COMP-4", "BINARY"}:
+        elif normalized_usage in {"COMP", "COMP-4", "COMP-5", "BINARY"}:
             if numeric_positions <= 4:
                 physical_length = 2
             elif numeric_positions <= 9:
@@ -142,14 +157,47 @@ def _parse_picture(pic: str, usage: str | None) -> _ParsedType | None:
     if has_alpha or numeric_positions == 0:
         return _ParsedType(length=max(1, physical_length), field_type=FieldType.STRING, decimals=None)
 
+    # A signed DISPLAY number is zoned: the sign is overpunched on the last digit
+    # unless a SIGN clause says otherwise (_apply_sign_clause).
+    field_usage = _USAGE_MAP.get(normalized_usage, FieldUsage.ZONED if signed else FieldUsage.DISPLAY)
     if decimal_positions > 0:
         return _ParsedType(
             length=max(1, physical_length),
             field_type=FieldType.DECIMAL,
             decimals=decimal_positions,
+            usage=field_usage,
+            signed=signed,
         )
 
-    return _ParsedType(length=max(1, physical_length), field_type=FieldType.INTEGER, decimals=None)
+    return _ParsedType(
+        length=max(1, physical_length),
+        field_type=FieldType.INTEGER,
+        decimals=None,
+        usage=field_usage,
+        signed=signed,
+    )
+
+
+def _apply_sign_clause(parsed: _ParsedType, remainder: str) -> _ParsedType:
+    # SIGN IS LEADING moves the overpunch to the first digit; SIGN ... SEPARATE
+    # makes the sign its own '+'/'-' character (one more position), trailing
+    # unless LEADING is given.
+    match = _SIGN_RE.search(remainder)
+    if match is None:
+        return parsed
+    leading = (match.group(1) or match.group(3) or "").upper() == "LEADING"
+    if match.group(2):
+        position = SignPosition.LEADING_SEPARATE if leading else SignPosition.TRAILING_SEPARATE
+        return replace(parsed, length=parsed.length + 1, sign_position=position)
+    return replace(parsed, sign_position=SignPosition.LEADING if leading else SignPosition.TRAILING)
+
+
+def _parse_float_usage(usage: str | None) -> _ParsedType | None:
+    # COMP-1/COMP-2 items have no PICTURE clause: 4- or 8-byte hexadecimal floats.
+    length = _FLOAT_LENGTHS.get((usage or "").upper())
+    if length is None:
+        return None
+    return _ParsedType(length=length, field_type=FieldType.DECIMAL, decimals=0, usage=FieldUsage.FLOAT, signed=True)
 
 
 def _build_tree(source_text: str) -> list[_CobolNode]:
@@ -200,6 +248,9 @@ def _append_field(
     field_type: FieldType,
     decimals: int | None,
     used_names: set[str],
+    usage: FieldUsage = FieldUsage.DISPLAY,
+    signed: bool = False,
+    sign_position: SignPosition = SignPosition.TRAILING,
 ) -> None:
     base = _normalize_identifier(name)
     candidate = base
@@ -216,6 +267,9 @@ def _append_field(
             length=length,
             type=field_type,
             decimals=decimals,
+            usage=usage,
+            signed=signed,
+            sign_position=sign_position,
         )
     )
 
@@ -234,10 +288,12 @@ def _emit_fields(
     qualified_name = f"{prefix}_{node.name}" if prefix else node.name
     occurs = max(1, node.occurs)
 
-    if node.pic:
-        parsed = _parse_picture(node.pic, node.usage)
+    if node.pic or (not node.children and node.usage in _FLOAT_LENGTHS):
+        parsed = _parse_picture(node.pic, node.usage) if node.pic else _parse_float_usage(node.usage)
         if parsed is None:
             return position
+        if parsed.usage == FieldUsage.ZONED:
+            parsed = _apply_sign_clause(parsed, node.remainder)
         for index in range(occurs):
             suffix = f"_{index + 1}" if occurs > 1 else ""
             _append_field(
@@ -248,6 +304,9 @@ def _emit_fields(
                 field_type=parsed.field_type,
                 decimals=parsed.decimals,
                 used_names=used_names,
+                usage=parsed.usage,
+                signed=parsed.signed,
+                sign_position=parsed.sign_position,
             )
             position += parsed.length
         return position
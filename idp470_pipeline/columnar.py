@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .models import FieldSpec, FieldType, FieldUsage, SignPosition
+
+_BUILDER_CHUNK_ROWS = 8_192
+
+
+# Column-oriented result for one record type. INTEGER columns are int64 and
+# DECIMAL columns float64, with null_masks flagging blank values (0 / NaN in the
+# array); a numeric column holding a non-numeric value falls back to object.
+# STRING, DATE and SIGN columns are object arrays of str.
+@dataclass
+class ColumnBatch:
+    record_type: str
+    line_numbers: np.ndarray
+    columns: dict[str, np.ndarray]
+    null_masks: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        data: dict[str, Any] = {
+            "record_type": np.full(len(self), self.record_type, dtype=object),
+            "line_number": self.line_numbers,
+        }
+        for name, values in self.columns.items():
+            mask = self.null_masks.get(name)
+            if mask is not None and values.dtype.kind == "i" and mask.any():
+                data[name] = pd.arrays.IntegerArray(values, mask)
+            else:
+                data[name] = values
+        return pd.DataFrame(data)
+
+    def to_arrow(self) -> Any:
+        try:
+            import pyarrow as pa
+        except ModuleNotFoundError as error:
+            raise RuntimeError("Arrow export requires pyarrow. Install with: pip install pyarrow") from error
+
+        arrays = [pa.array(np.full(len(self), self.record_type, dtype=object)), pa.array(self.line_numbers)]
+        names = ["record_type", "line_number"]
+        for name, values in self.columns.items():
+            mask = self.null_masks.get(name)
+            if values.dtype == object:
+                arrays.append(pa.array(values.tolist()))
+            else:
+                arrays.append(pa.array(values, mask=mask))
+            names.append(name)
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def to_records(self) -> list[dict[str, Any]]:
+        columns: list[list[Any]] = []
+        for name, values in self.columns.items():
+            items = values.tolist()
+            mask = self.null_masks.get(name)
+            if mask is not None and values.dtype != object:
+                items = [None if blank else item for item, blank in zip(items, mask.tolist())]
+            columns.append(items)
+        keys = ("record_type", "line_number", *self.columns)
+        return [
+            dict(zip(keys, (self.record_type, line_number, *values)))
+            for line_number, *values in zip(self.line_numbers.tolist(), *columns)
+        ]
+
+
+def _string_column(values: Sequence[Any]) -> np.ndarray:
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _digit_codes(encoding: str | None) -> tuple[int, int] | None:
+    # Code of "0" and of the space in the line matrix; None when the digits of the
+    # encoding are not contiguous (every value then goes through the coercer).
+    if encoding is None:
+        return ord("0"), ord(" ")
+    digits = "0123456789".encode(encoding)
+    if len(digits) != 10 or digits != bytes(range(digits[0], digits[0] + 10)):
+        return None
+    return digits[0], " ".encode(encoding)[0]
+
+
+_POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+# int64 holds any 18-digit value; float64 is exact for integers below 2**53.
+_MAX_INTEGER_DIGITS = 18
+_MAX_DECIMAL_DIGITS = 15
+
+
+def _decode_digit_block(block: np.ndarray, zero: int, space: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Mirrors _normalize_numeric + int() for rows made only of digits and spaces:
+    # spaces are dropped, so each digit weighs 10 ** (digits to its right).
+    # Returns (values, blank rows, rows that need the scalar coercer).
+    digits = (block >= zero) & (block <= zero + 9)
+    decodable = (digits | (block == space)).all(axis=1)
+    blank = decodable & ~digits.any(axis=1)
+    units = np.where(digits, block.astype(np.int64) - zero, 0)
+    if digits.all():
+        values = units @ _POWERS_OF_TEN[block.shape[1] - 1 :: -1]
+    else:
+        exponents = np.cumsum(digits[:, ::-1], axis=1)[:, ::-1] - digits
+        values = (units * _POWERS_OF_TEN[exponents]).sum(axis=1)
+    return values, blank, ~decodable
+
+
+# Column of the overpunched sign within a zoned field; separate signs have none.
+_OVERPUNCH_COLUMNS = {SignPosition.TRAILING: -1, SignPosition.LEADING: 0}
+
+
+def _overpunch_tables(encoding: str | None, source_encoding: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+    # Code of the overpunched character -> digit (-1 when not an overpunch) and
+    # sign. EBCDIC byte lines are indexed by the zone bytes themselves (0xC0-0xC9
+    # positive, 0xD0-0xD9 negative); str lines by the code points the source
+    # encoding decodes them to, and ASCII byte lines by the cp037-convention
+    # characters, which are single ASCII bytes.
+    from .parsing_engine import _is_ebcdic, _overpunch_table
+
+    digits = np.full(256, -1, dtype=np.int64)
+    negative = np.zeros(256, dtype=bool)
+    if encoding is not None and _is_ebcdic(encoding):
+        for digit in range(10):
+            digits[0xC0 | digit] = digits[0xD0 | digit] = digit
+            negative[0xD0 | digit] = True
+        return digits, negative
+    for char, (digit, is_negative) in _overpunch_table(encoding or source_encoding).items():
+        code = ord(char)
+        if code < len(digits):
+            digits[code] = digit
+            negative[code] = is_negative
+    return digits, negative
+
+
+def _decode_zoned_block(
+    block: np.ndarray,
+    zero: int,
+    space: int,
+    tables: tuple[np.ndarray, np.ndarray],
+    column: int = -1,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # The overpunched column (last, or first for a leading sign) is looked up in
+    # the tables and replaced by its digit, then the block decodes like unsigned
+    # digits and negative rows flip.
+    digits, negative = tables
+    sign = block[:, column]
+    in_table = sign < len(digits)
+    codes = np.where(in_table, sign, 0)
+    punched = in_table & (digits[codes] >= 0)
+    if punched.any():
+        block = block.copy()
+        block[punched, column] = zero + digits[codes[punched]]
+    values, blank, fallback = _decode_digit_block(block, zero, space)
+    return np.where(punched & negative[codes], -values, values), blank, fallback
+
+
+# Accumulates the dispatched lines of one record type and decodes them every
+# _BUILDER_CHUNK_ROWS lines: numeric fields are converted column-wise from a 2-D
+# code matrix, rows with signs, separators or other characters fall back to the
+# parser coercers so values match parse_file. Lines are str (text reader) or
+# bytes in the given single-byte encoding (mmap and fixed readers);
+# source_encoding is the file encoding str lines were decoded from. Zoned
+# fields decode their overpunched sign column-wise too (separate signs are rows
+# with a sign, so they fall back); binary fields (COMP-3, COMP...) always go
+# through their byte coercer.
+class ColumnBatchBuilder:
+    def __init__(
+        self,
+        record_type: str,
+        fields: Sequence[FieldSpec],
+        encoding: str | None = None,
+        source_encoding: str | None = None,
+    ) -> None:
+        from .parsing_engine import _bytes_coercer, _field_coercer
+
+        self.record_type = record_type
+        self._encoding = encoding
+        self._codes = _digit_codes(encoding)
+        self._overpunch = (
+            _overpunch_tables(encoding, source_encoding)
+            if any(field.usage == FieldUsage.ZONED for field in fields)
+            else None
+        )
+        sign_encoding = encoding or source_encoding
+        self._fields = [
+            (
+                field.name,
+                field.type,
+                field.decimals or 0,
+                field.start - 1,
+                field.start - 1 + field.length,
+                (
+                    _bytes_coercer(field, encoding, False)
+                    if field.is_binary and encoding is not None
+                    else _field_coercer(field, "decimal", sign_encoding)
+                ),
+                field.is_binary,
+                _OVERPUNCH_COLUMNS.get(field.sign_position) if field.usage == FieldUsage.ZONED else None,
+            )
+            for field in fields
+        ]
+        self._line_numbers: list[int] = []
+        self._lines: list[str | bytes] = []
+        self._line_chunks: list[np.ndarray] = []
+        self._column_chunks: list[list[np.ndarray]] = [[] for _ in self._fields]
+        self._mask_chunks: list[list[np.ndarray | None]] = [[] for _ in self._fields]
+
+    def append(self, line_number: int, line: str | bytes) -> None:
+        self._line_numbers.append(line_number)
+        self._lines.append(line)
+        if len(self._lines) >= _BUILDER_CHUNK_ROWS:
+            self._flush()
+
+    def _text_values(self, start: int, end: int, binary: bool = False) -> list[str | bytes]:
+        if self._encoding is None or binary:
+            return [line[start:end] for line in self._lines]
+        encoding = self._encoding
+        return [line[start:end].decode(encoding) for line in self._lines]
+
+    def _code_matrix(self) -> np.ndarray:
+        lines = self._lines
+        width = len(lines[0])
+        if self._encoding is not None:
+            return np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(len(lines), width)
+        joined = "".join(lines)
+        if joined.isascii():
+            return np.frombuffer(joined.encode("ascii"), dtype=np.uint8).reshape(len(lines), width)
+        return np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).reshape(len(lines), width)
+
+    def _numeric_column(
+        self,
+        matrix: np.ndarray | None,
+        field_type: FieldType,
+        decimals: int,
+        start: int,
+        end: int,
+        coerce: Any,
+        binary: bool = False,
+        zoned: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray | None]:
+        count = len(self._lines)
+        is_decimal = field_type == FieldType.DECIMAL
+        max_digits = _MAX_DECIMAL_DIGITS if is_decimal else _MAX_INTEGER_DIGITS
+        if matrix is not None and self._codes is not None and not binary and end - start <= max_digits:
+            if zoned is not None and self._overpunch is not None:
+                values, blank, fallback = _decode_zoned_block(
+                    matrix[:, start:end], *self._codes, self._overpunch, zoned
+                )
+            else:
+                values, blank, fallback = _decode_digit_block(matrix[:, start:end], *self._codes)
+            fallback_rows = np.flatnonzero(fallback).tolist()
+        else:
+            values = np.zeros(count, dtype=np.int64)
+            blank = np.zeros(count, dtype=bool)
+            fallback_rows = list(range(count))
+
+        if is_decimal:
+            column = values / float(10**decimals)
+            column[blank] = np.nan
+        else:
+            column = values
+        if not fallback_rows:
+            return column, blank
+
+        text_rows = [self._lines[index][start:end] for index in fallback_rows]
+        if self._encoding is not None and not binary:
+            text_rows = [raw.decode(self._encoding) for raw in text_rows]
+        scalar_values = [coerce(raw) for raw in text_rows]
+        if not any(type(value) is str for value in scalar_values):
+            try:
+                for index, value in zip(fallback_rows, scalar_values):
+                    blank[index] = value is None
+                    if value is None:
+                        column[index] = np.nan if is_decimal else 0
+                    else:
+                        column[index] = float(value) if is_decimal else value
+                return column, blank
+            except OverflowError:
+                pass
+
+        # A non-numeric or out-of-range value keeps the whole column as the
+        # coercer's Python values (None for blanks), as parse_file returns them.
+        return _string_column([coerce(raw) for raw in self._text_values(start, end, binary)]), None
+
+    def _flush(self) -> None:
+        if not self._lines:
+            return
+        numeric_types = {FieldType.INTEGER, FieldType.DECIMAL}
+        matrix = None
+        if self._codes is not None and any(field[1] in numeric_types for field in self._fields):
+            matrix = self._code_matrix()
+
+        self._line_chunks.append(np.array(self._line_numbers, dtype=np.int64))
+        for index, (_, field_type, decimals, start, end, coerce, binary, zoned) in enumerate(self._fields):
+            mask: np.ndarray | None = None
+            if field_type in numeric_types:
+                column, mask = self._numeric_column(matrix, field_type, decimals, start, end, coerce, binary, zoned)
+            else:
+                column = _string_column([value.rstrip() for value in self._text_values(start, end)])
+            self._column_chunks[index].append(column)
+            self._mask_chunks[index].append(mask)
+        self._line_numbers = []
+        self._lines = []
+
+    def build(self) -> ColumnBatch:
+        self._flush()
+        columns: dict[str, np.ndarray] = {}
+        null_masks: dict[str, np.ndarray] = {}
+        for index, (name, field_type, *_) in enumerate(self._fields):
+            chunks = self._column_chunks[index]
+            if not chunks:
+                columns[name] = _string_column([])
+                continue
+            column = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+            masks = self._mask_chunks[index]
+            if column.dtype == object and field_type in {FieldType.INTEGER, FieldType.DECIMAL}:
+                # One chunk fell back to object: bring the typed chunks back to
+                # Python values (None for blanks) so the column stays uniform.
+                column = _string_column(
+                    [
+                        value
+                        for chunk, mask in zip(chunks, masks)
+                        for value in (
+                            chunk.tolist()
+                            if mask is None
+                            else [None if blank else item for item, blank in zip(chunk.tolist(), mask.tolist())]
+                        )
+                    ]
+                )
+            elif field_type in {FieldType.INTEGER, FieldType.DECIMAL}:
+                null_masks[name] = np.concatenate(masks) if len(masks) > 1 else masks[0]
+            columns[name] = column
+
+        if self._line_chunks:
+            line_numbers = np.concatenate(self._line_chunks)
+        else:
+            line_numbers = np.empty(0, dtype=np.int64)
+        return ColumnBatch(
+            record_type=self.record_type,
+            line_numbers=line_numbers,
+            columns=columns,
+            null_masks=null_masks,
+        )
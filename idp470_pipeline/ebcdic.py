@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import codecs
+import re
+from functools import lru_cache
+
+# EBCDIC code pages of the mainframe extracts. cp037 (US) and cp1140 (cp037 with
+# the euro sign) ship with Python; cp297 (France) is cp037 with the national
+# characters below moved, and cp1147 is cp297 with the euro sign.
+EBCDIC_CODE_PAGES = frozenset({"cp037", "cp1140", "cp297", "cp1147"})
+
+_CP297_FROM_CP037 = {
+    0x44: "@",
+    0x48: "\\",
+    0x4A: "°",
+    0x4F: "!",
+    0x51: "{",
+    0x54: "}",
+    0x5A: "§",
+    0x5F: "^",
+    0x6A: "ù",
+    0x79: "µ",
+    0x7B: "£",
+    0x7C: "à",
+    0x90: "[",
+    0xA0: "`",
+    0xA1: "¨",
+    0xB0: "¢",
+    0xB1: "#",
+    0xB5: "]",
+    0xBA: "¬",
+    0xBB: "|",
+    0xBD: "~",
+    0xC0: "é",
+    0xD0: "è",
+    0xDD: "¦",
+    0xE0: "ç",
+}
+_EURO_BYTE = 0x9F
+_EURO_SLOT = 0xA4  # latin-1 slot of the currency sign, which the euro pages drop.
+_NEL = "\x85"
+_CODE_PAGE_NAME_RE = re.compile(r"^(?:cp|ibm|ebcdic)?[-_ ]?0*(37|297|1140|1147)$")
+
+
+def ebcdic_code_page(encoding: str) -> str | None:
+    # "cp1147", "IBM-1147", "ibm297", "CP037"... -> canonical name, None otherwise.
+    match = _CODE_PAGE_NAME_RE.match(encoding.strip().lower())
+    if match is None:
+        return None
+    number = match.group(1)
+    return "cp037" if number == "37" else f"cp{number}"
+
+
+@lru_cache(maxsize=None)
+def decoding_table(code_page: str) -> str:
+    # 256 characters, one per EBCDIC byte value.
+    if code_page in {"cp037", "cp1140"}:
+        return bytes(range(256)).decode(code_page)
+    if code_page not in EBCDIC_CODE_PAGES:
+        raise ValueError(f"Page de code EBCDIC non supportee '{code_page}'.")
+    table = list(bytes(range(256)).decode("cp037"))
+    for byte, char in _CP297_FROM_CP037.items():
+        table[byte] = char
+    if code_page == "cp1147":
+        table[_EURO_BYTE] = "€"
+    return "".join(table)
+
+
+@lru_cache(maxsize=None)
+def translation_table(code_page: str) -> bytes:
+    # bytes.translate table from the code page to latin-1. NEL (the z/OS line
+    # end) becomes \n so the result splits like a transferred text file; the
+    # euro sign goes to the latin-1 currency slot, unused by the euro pages.
+    table = bytearray(256)
+    for byte, char in enumerate(decoding_table(code_page)):
+        if char == _NEL:
+            table[byte] = 0x0A
+        elif char == "€":
+            table[byte] = _EURO_SLOT
+        else:
+            table[byte] = ord(char)
+    return bytes(table)
+
+
+def transcode(data: bytes, code_page: str) -> str:
+    # Whole-buffer decoding: one C-level translate, then a latin-1 decode.
+    text = data.translate(translation_table(code_page)).decode("latin-1")
+    if code_page in {"cp1140", "cp1147"} and "¤" in text:
+        text = text.replace("¤", "€")
+    return text
+
+
+def _search_codec(name: str) -> codecs.CodecInfo | None:
+    # Makes cp297 / cp1147 usable as regular encodings (byte readers, raw
+    # line decoding) where Python has no codec for them.
+    code_page = ebcdic_code_page(name.replace("_", "-"))
+    if code_page not in {"cp297", "cp1147"}:
+        return None
+    decoding = decoding_table(code_page)
+    encoding = codecs.charmap_build(decoding)
+
+    def _encode(text: str, errors: str = "strict") -> tuple[bytes, int]:
+        return codecs.charmap_encode(text, errors, encoding)
+
+    def _decode(data: bytes, errors: str = "strict") -> tuple[str, int]:
+        return codecs.charmap_decode(data, errors, decoding)
+
+    class _IncrementalEncoder(codecs.IncrementalEncoder):
+        def encode(self, text: str, final: bool = False) -> bytes:
+            return codecs.charmap_encode(text, self.errors, encoding)[0]
+
+    class _IncrementalDecoder(codecs.IncrementalDecoder):
+        def decode(self, data: bytes, final: bool = False) -> str:
+            return codecs.charmap_decode(data, self.errors, decoding)[0]
+
+    return codecs.CodecInfo(
+        name=code_page,
+        encode=_encode,
+        decode=_decode,
+        incrementalencoder=_IncrementalEncoder,
+        incrementaldecoder=_IncrementalDecoder,
+    )
+
+
+codecs.register(_search_codec)
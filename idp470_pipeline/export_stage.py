@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+from .run_metrics import RunMetrics, StageMetrics, measure_stage
+
+LOGGER = logging.getLogger(__name__)
+
+# Record types read by the PDF exporters (invoice headers, addresses, lines).
+PDF_RECORD_TYPES = frozenset({"ENT", "ADR", "LIG"})
+
+
+# One exporter call of the export stage. Errors of a type listed in `tolerated`
+# are returned to the caller (reported as warnings); any other error is raised
+# once every exporter has finished.
+@dataclass(frozen=True)
+class ExportTask:
+    name: str
+    function: Callable[..., Any]
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    tolerated: tuple[type[BaseException], ...] = ()
+
+
+def records_for_types(records: Sequence[Any], record_types: frozenset[str]) -> list[Any]:
+    # Exporters only read some record types: sending the others to a worker
+    # process would only add pickling time.
+    return [record for record in records if record.get("record_type") in record_types]
+
+
+def _run_task(task: ExportTask) -> StageMetrics:
+    # Measured in the process that runs the exporter (CPU and peak RSS of the
+    # worker for pooled tasks).
+    with measure_stage(task.name) as stage:
+        task.function(**task.kwargs)
+    return stage
+
+
+# Runs the exporters concurrently: the first task runs in the calling process
+# (no copy of its records) while the others run in a process pool of up to
+# workers - 1 processes. workers <= 1 keeps today's sequential order. The pool
+# spawns its processes: the web backend calls this from a thread of a
+# multi-threaded server, where a forked child could inherit a lock held by
+# another thread and deadlock. Returns
+# the tolerated error of each failed task, by name. With metrics, each
+# exporter that succeeded is added as a stage named after its task.
+def run_exports(
+    tasks: Sequence[ExportTask],
+    workers: int = 1,
+    on_done: Callable[[str], None] | None = None,
+    metrics: RunMetrics | None = None,
+) -> dict[str, BaseException]:
+    errors: dict[str, BaseException] = {}
+
+    def _finish(task: ExportTask, error: BaseException | None, stage: StageMetrics | None = None) -> None:
+        if error is not None:
+            errors[task.name] = error
+        if stage is not None and metrics is not None:
+            metrics.add(stage)
+        if on_done is not None:
+            on_done(task.name)
+
+    pool_size = min(workers - 1, len(tasks) - 1)
+    if pool_size < 1:
+        for task in tasks:
+            try:
+                stage = _run_task(task)
+            except Exception as error:  # noqa: BLE001
+                if not isinstance(error, task.tolerated):
+                    raise
+                _finish(task, error)
+            else:
+                _finish(task, None, stage)
+        return errors
+
+    local_task, *pool_tasks = tasks
+    failures: list[tuple[ExportTask, BaseException]] = []
+    with ProcessPoolExecutor(max_workers=pool_size, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures: dict[Future[StageMetrics], ExportTask] = {
+            executor.submit(_run_task, task): task for task in pool_tasks
+        }
+        LOGGER.debug("Exports en parallele: %s processus + processus courant", pool_size)
+
+        def _collect(done: set[Future[StageMetrics]]) -> None:
+            for future in done:
+                task = futures.pop(future)
+                error = future.exception()
+                if error is not None:
+                    failures.append((task, error))
+                    _finish(task, error)
+                else:
+                    _finish(task, None, future.result())
+
+        try:
+            stage = _run_task(local_task)
+        except Exception as error:  # noqa: BLE001
+            failures.append((local_task, error))
+            _finish(local_task, error)
+        else:
+            _finish(local_task, None, stage)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            _collect(done)
+
+    # Untolerated errors are raised in task order, after all exporters ran.
+    order = {task.name: index for index, task in enumerate(tasks)}
+    for task, error in sorted(failures, key=lambda item: order[item[0].name]):
+        if not isinstance(error, task.tolerated):
+            raise error
+    return errors
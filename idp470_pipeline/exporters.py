@@ -11,6 +11,7 @@ from typing import Any
 
 import pandas as pd
 
+from .fixed_point import FixedPoint
 from .models import ContractSpec
 
 LOGGER = logging.getLogger(__name__)
@@ -597,6 +598,27 @@ def _build_context_sheet(
     ws.column_dimensions["E"].width = 56
 
 
+def _fixed_point_columns_to_float(df: pd.DataFrame) -> None:
+    # openpyxl only writes native numbers; a float carries the same digits as the
+    # Decimal of decimal mode for the 14-digit amounts of the contracts.
+    # FixedPoint values only come from decimal_mode="fixed", where every value of
+    # a DECIMAL column is one: the first non-null value of a column is enough to
+    # tell, so decimal mode pays no Python-level pass per column.
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object:
+            continue
+        first = values.first_valid_index()
+        if first is not None and isinstance(values.at[first], FixedPoint):
+            df[column] = values.map(lambda value: float(value) if isinstance(value, FixedPoint) else value)
+
+
+def _records_dataframe(records: list[dict[str, Any]]) -> pd.DataFrame:
+    all_df = pd.DataFrame([record if isinstance(record, dict) else dict(record) for record in records])
+    _fixed_point_columns_to_float(all_df)
+    return all_df
+
+
 def export_to_excel(
     records: list[dict[str, Any]],
     output_path: Path,
@@ -609,7 +631,7 @@ def export_to_excel(
         raise ValueError("Aucun enregistrement a exporter vers Excel.")
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    all_df = pd.DataFrame(records)
+    all_df = _records_dataframe(records)
     generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     ordered_columns, labels_by_record = _build_contract_maps(contract)
     dictionary_df = _build_dictionary_df(contract)
@@ -713,14 +735,17 @@ def _first_non_empty(record: dict[str, Any], keys: list[str]) -> Any:
     return ""
 
 
-def _signed_value(sign: Any, value: Any) -> Decimal:
+def _signed_value(sign: Any, value: Any) -> Decimal | FixedPoint:
     if value in (None, ""):
         return Decimal(0)
+    if isinstance(value, FixedPoint):
+        # Parsed with decimal_mode="fixed": stays a scaled integer, sums stay exact.
+        return -value if str(sign).strip() == "-" else value
     decimal_value = Decimal(str(value))
     return -decimal_value if str(sign).strip() == "-" else decimal_value
 
 
-def _fmt_amount(value: Decimal) -> str:
+def _fmt_amount(value: Decimal | FixedPoint) -> str:
     return f"{value:,.2f}".replace(",", " ").replace(".", ",")
 
 
@@ -1016,9 +1041,9 @@ def export_accounting_summary_pdf(
         lambda: {
             "client_label": "",
             "count": 0,
-            "total_ht": Decimal(0),
-            "total_tva": Decimal(0),
-            "total_ttc": Decimal(0),
+            "total_ht": 0,
+            "total_tva": 0,
+            "total_ttc": 0,
             "invoices": [],
         }
     )
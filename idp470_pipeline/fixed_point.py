@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import Any
+
+
+# Exact amount stored as a scaled integer: value = units / 10 ** scale, where
+# scale is the implied decimals of the FieldSpec. Sums of values with the same
+# scale stay plain int additions; str() and to_decimal() give the same text and
+# value as the Decimal the parser produces in decimal mode.
+class FixedPoint:
+    __slots__ = ("units", "scale")
+
+    def __init__(self, units: int, scale: int = 0) -> None:
+        self.units = units
+        self.scale = scale
+
+    @classmethod
+    def from_decimal(cls, value: Decimal, scale: int = 0) -> FixedPoint:
+        exponent = value.as_tuple().exponent
+        if isinstance(exponent, int) and -exponent > scale:
+            scale = -exponent
+        return cls(int(value.scaleb(scale)), scale)
+
+    @classmethod
+    def total(cls, values: Iterable[FixedPoint], scale: int = 0) -> FixedPoint:
+        # Exact sum done on the integer units (C-level int additions); None and
+        # blank values are skipped like in the exporters.
+        units_by_scale: dict[int, list[int]] = {}
+        for value in values:
+            if value is not None:
+                units_by_scale.setdefault(value.scale, []).append(value.units)
+        result = cls(0, scale)
+        for value_scale, units in units_by_scale.items():
+            result = result + cls(sum(units), value_scale)
+        return result
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.units) / (Decimal(10) ** self.scale)
+
+    def _aligned(self, other: FixedPoint) -> tuple[int, int, int]:
+        if self.scale == other.scale:
+            return self.units, other.units, self.scale
+        if self.scale > other.scale:
+            return self.units, other.units * 10 ** (self.scale - other.scale), self.scale
+        return self.units * 10 ** (other.scale - self.scale), other.units, other.scale
+
+    def _coerce_other(self, other: Any) -> FixedPoint | None:
+        if isinstance(other, FixedPoint):
+            return other
+        if isinstance(other, int) and not isinstance(other, bool):
+            return FixedPoint(other, 0)
+        return None
+
+    def __add__(self, other: Any) -> Any:
+        if type(other) is FixedPoint and other.scale == self.scale:
+            return FixedPoint(self.units + other.units, self.scale)
+        if type(other) is int and other == 0:
+            return self
+        fixed = self._coerce_other(other)
+        if fixed is None:
+            if isinstance(other, Decimal):
+                return self.to_decimal() + other
+            return NotImplemented
+        left, right, scale = self._aligned(fixed)
+        return FixedPoint(left + right, scale)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> Any:
+        if type(other) is FixedPoint and other.scale == self.scale:
+            return FixedPoint(self.units - other.units, self.scale)
+        fixed = self._coerce_other(other)
+        if fixed is None:
+            if isinstance(other, Decimal):
+                return self.to_decimal() - other
+            return NotImplemented
+        left, right, scale = self._aligned(fixed)
+        return FixedPoint(left - right, scale)
+
+    def __rsub__(self, other: Any) -> Any:
+        return (-self).__add__(other)
+
+    def __neg__(self) -> FixedPoint:
+        return FixedPoint(-self.units, self.scale)
+
+    def __abs__(self) -> FixedPoint:
+        return FixedPoint(abs(self.units), self.scale)
+
+    def __bool__(self) -> bool:
+        return self.units != 0
+
+    def __float__(self) -> float:
+        # int / int is correctly rounded, like float(Decimal) of the same value.
+        return self.units / 10**self.scale
+
+    def __int__(self) -> int:
+        quotient = abs(self.units) // 10**self.scale
+        return -quotient if self.units < 0 else quotient
+
+    def _compare_key(self, other: Any) -> tuple[int, int] | None:
+        fixed = self._coerce_other(other)
+        if fixed is None:
+            return None
+        left, right, _ = self._aligned(fixed)
+        return left, right
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Decimal):
+            return self.to_decimal() == other
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] == key[1]
+
+    def __lt__(self, other: Any) -> bool:
+        if isinstance(other, Decimal):
+            return self.to_decimal() < other
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] < key[1]
+
+    def __le__(self, other: Any) -> bool:
+        if isinstance(other, Decimal):
+            return self.to_decimal() <= other
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] <= key[1]
+
+    def __gt__(self, other: Any) -> bool:
+        if isinstance(other, Decimal):
+            return self.to_decimal() > other
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] > key[1]
+
+    def __ge__(self, other: Any) -> bool:
+        if isinstance(other, Decimal):
+            return self.to_decimal() >= other
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] >= key[1]
+
+    def __hash__(self) -> int:
+        return hash(self.to_decimal())
+
+    def __str__(self) -> str:
+        scale = self.scale
+        units = self.units
+        if not scale:
+            return str(units)
+        digits = str(-units if units < 0 else units).rjust(scale + 1, "0")
+        fraction = digits[-scale:].rstrip("0")
+        text = f"{digits[:-scale]}.{fraction}" if fraction else digits[:-scale]
+        return f"-{text}" if units < 0 else text
+
+    def __repr__(self) -> str:
+        return f"FixedPoint('{self}')"
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.to_decimal(), format_spec)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (FixedPoint, (self.units, self.scale))
@@ -14,6 +14,30 @@ class FieldType(str, Enum):
     SIGN = "sign"
 
 
+# Storage of a field in the record: DISPLAY is one character per position and
+# ZONED the same with a sign at the place given by sign_position, by default
+# overpunched on the last digit (COBOL S9 DISPLAY: '{', 'A'-'I' positive, '}',
+# 'J'-'R' negative); the others are mainframe
+# binary encodings (COMP-3, COMP/COMP-4/BINARY, COMP-1/COMP-2) and are only
+# decoded by the byte readers.
+class FieldUsage(str, Enum):
+    DISPLAY = "display"
+    ZONED = "zoned"
+    PACKED = "packed"
+    BINARY = "binary"
+    FLOAT = "float"
+
+
+# Where the sign of a ZONED field is: overpunched on the last (TRAILING) or first
+# (LEADING) digit, or a '+'/'-' character of its own at either end (COBOL SIGN
+# ... SEPARATE, counted in the field length).
+class SignPosition(str, Enum):
+    TRAILING = "trailing"
+    LEADING = "leading"
+    TRAILING_SEPARATE = "trailing_separate"
+    LEADING_SEPARATE = "leading_separate"
+
+
 class StructureScope(str, Enum):
     FILE = "file"
     INVOICE = "invoice"
@@ -26,6 +50,9 @@ class FieldSpec(BaseModel):
     length: int = Field(ge=1)
     type: FieldType = Field(default=FieldType.STRING)
     decimals: int | None = Field(default=None, ge=0)
+    usage: FieldUsage = Field(default=FieldUsage.DISPLAY)
+    signed: bool = False
+    sign_position: SignPosition = Field(default=SignPosition.TRAILING)
     description: str | None = None
 
     @model_validator(mode="after")
@@ -38,6 +65,20 @@ class FieldSpec(BaseModel):
             )
         return self
 
+    @model_validator(mode="after")
+    def validate_usage(self) -> "FieldSpec":
+        if self.usage != FieldUsage.DISPLAY and self.type not in {FieldType.INTEGER, FieldType.DECIMAL}:
+            raise ValueError(f"Field {self.name}: usage {self.usage.value} requires an integer or decimal type.")
+        if self.usage == FieldUsage.FLOAT and self.length not in {4, 8}:
+            raise ValueError(f"Field {self.name}: float usage requires a length of 4 or 8.")
+        if self.sign_position != SignPosition.TRAILING and self.usage != FieldUsage.ZONED:
+            raise ValueError(f"Field {self.name}: sign_position {self.sign_position.value} requires zoned usage.")
+        return self
+
+    @property
+    def is_binary(self) -> bool:
+        return self.usage in {FieldUsage.PACKED, FieldUsage.BINARY, FieldUsage.FLOAT}
+
     @property
     def end(self) -> int:
         return self.start + self.length - 1
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import zlib
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from .models import ContractSpec
+from .parsing_engine import FixedWidthParser, IssueLog, ParseIssue
+
+LOGGER = logging.getLogger(__name__)
+
+_CACHE_FORMAT = 2
+_CACHE_SUFFIX = ".parse"
+_HASH_BLOCK_BYTES = 1024 * 1024
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_sha256(input_path: Path) -> str:
+    digest = hashlib.sha256()
+    with input_path.open("rb") as handle:
+        while block := handle.read(_HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def contract_fingerprint(contract: ContractSpec) -> str:
+    # generated_at_utc changes on every extraction of an identical layout.
+    payload = contract.model_dump_json(exclude={"generated_at_utc"})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode_result(
+    records: Iterable[Mapping[str, Any]],
+    issues: IssueLog,
+    issues_jsonl: bytes | None = None,
+) -> bytes:
+    # Keys are stored once per distinct key tuple (one per record type in
+    # practice); each record becomes (key_index, values). Issues keep the
+    # bounded samples with the full counts, plus the complete JSONL when the
+    # samples were truncated and the caller asked for it.
+    key_tables: dict[tuple[str, ...], int] = {}
+    rows: list[tuple[int, tuple[Any, ...]]] = []
+    for record in records:
+        keys = tuple(record.keys())
+        index = key_tables.setdefault(keys, len(key_tables))
+        rows.append((index, tuple(record.values())))
+    payload = {
+        "format": _CACHE_FORMAT,
+        "keys": list(key_tables),
+        "rows": rows,
+        "issues": [(issue.line_number, issue.message, issue.raw_line) for issue in issues.samples],
+        "issue_counts": dict(issues.counts),
+        "issue_total": issues.total,
+        "max_samples": issues.max_samples,
+        "issues_jsonl": issues_jsonl,
+    }
+    return zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def _decode_result(blob: bytes) -> tuple[list[dict[str, Any]], IssueLog, bytes | None] | None:
+    payload = pickle.loads(zlib.decompress(blob))
+    if payload.get("format") != _CACHE_FORMAT:
+        return None
+    key_tables = payload["keys"]
+    records = [dict(zip(key_tables[index], values)) for index, values in payload["rows"]]
+    issues = IssueLog(max_samples=payload["max_samples"])
+    issues.samples = [
+        ParseIssue(line_number=line_number, message=message, raw_line=raw_line)
+        for line_number, message, raw_line in payload["issues"]
+    ]
+    issues.counts = Counter(payload["issue_counts"])
+    issues.total = payload["issue_total"]
+    return records, issues, payload["issues_jsonl"]
+
+
+# On-disk cache of parse results keyed by the input bytes, the contract and the
+# options that change the output. Entries are zlib-compressed pickles; the least
+# recently used ones (by mtime, refreshed on hit) are evicted above max_bytes.
+# Only trusted directories should be used: entries are unpickled on load.
+class ParseCache:
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, input_path: Path, contract: ContractSpec, options: Mapping[str, Any]) -> str:
+        material = json.dumps(
+            {
+                "format": _CACHE_FORMAT,
+                "input": file_sha256(input_path),
+                "contract": contract_fingerprint(contract),
+                "options": options,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_CACHE_SUFFIX}"
+
+    def load(self, key: str) -> tuple[list[dict[str, Any]], IssueLog, bytes | None] | None:
+        path = self._entry_path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            result = _decode_result(blob)
+        except Exception:
+            LOGGER.warning("Entree de cache illisible supprimee: %s", path)
+            path.unlink(missing_ok=True)
+            return None
+        if result is not None:
+            os.utime(path)
+        return result
+
+    def store(
+        self,
+        key: str,
+        records: Iterable[Mapping[str, Any]],
+        issues: IssueLog,
+        issues_jsonl: bytes | None = None,
+    ) -> None:
+        blob = _encode_result(records, issues, issues_jsonl)
+        if len(blob) > self.max_bytes:
+            LOGGER.info("Resultat trop volumineux pour le cache (%s octets), non conserve.", len(blob))
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_bytes(blob)
+            temp_path.replace(path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        self._evict(keep=path)
+
+    def _evict(self, keep: Path) -> None:
+        entries = []
+        for path in self.cache_dir.glob(f"*{_CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            LOGGER.debug("Cache de parsing: entree evincee %s", path.name)
+
+    def parse_file(
+        self,
+        parser: FixedWidthParser,
+        input_path: Path,
+        encoding: str = "latin-1",
+        continue_on_error: bool = False,
+        workers: int = 1,
+        reader: str = "text",
+        record_types: Iterable[str] | None = None,
+        max_issue_samples: int | None = None,
+        issues_path: Path | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> tuple[list[dict[str, Any]], IssueLog]:
+        # Same result as parser.parse_file; workers only changes how it is computed.
+        # The key includes max_issue_samples so a hit returns the same bounded
+        # samples and full counts. When the samples were truncated, the complete
+        # issues_path file is kept in the entry to be rewritten on a hit; an entry
+        # stored without it is parsed again if issues_path is requested.
+        options = {
+            "encoding": encoding,
+            "continue_on_error": continue_on_error,
+            "reader": reader,
+            "decimal_mode": parser.decimal_mode,
+            "fields": parser.fields,
+            "record_types": sorted(record_types) if record_types is not None else None,
+            "max_issue_samples": max_issue_samples,
+        }
+        key = self.key(input_path, parser.contract, options)
+        cached = self.load(key)
+        if cached is not None and issues_path is not None and cached[1].truncated and cached[2] is None:
+            LOGGER.info("Cache de parsing: liste complete des anomalies absente, nouveau parsing de %s", input_path)
+            cached = None
+        if cached is not None:
+            LOGGER.info("Cache de parsing: resultat reutilise pour %s", input_path)
+            records, issues, issues_jsonl = cached
+            if stats is not None:
+                stats["cache_hit"] = True
+            if issues_path is not None:
+                if issues_jsonl is not None:
+                    issues_path.parent.mkdir(parents=True, exist_ok=True)
+                    issues_path.write_bytes(issues_jsonl)
+                else:
+                    with IssueLog(output_path=issues_path) as writer:
+                        for issue in issues.samples:
+                            writer.add(issue)
+                issues.output_path = issues_path
+            return records, issues
+
+        records, issues = parser.parse_file(
+            input_path=input_path,
+            encoding=encoding,
+            continue_on_error=continue_on_error,
+            workers=workers,
+            reader=reader,
+            record_types=record_types,
+            max_issue_samples=max_issue_samples,
+            issues_path=issues_path,
+            stats=stats,
+        )
+        issues_jsonl = None
+        if issues.truncated and issues_path is not None:
+            issues_jsonl = issues_path.read_bytes()
+        self.store(key, records, issues, issues_jsonl)
+        return records, issues
@@ -1,17 +1,45 @@
 from __future__ import annotations
 
+import codecs
+import io
 import json
 import logging
-from collections import Counter
-from dataclasses import dataclass
+import math
+import mmap
+import re
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, TextIO
 
-from .models import ContractSpec, FieldSpec, FieldType, RecordSpec
+from .ebcdic import ebcdic_code_page, transcode
+from .fixed_point import FixedPoint
+from .models import ContractSpec, FieldSpec, FieldType, FieldUsage, RecordSpec, SignPosition, StructureRule
+
+if TYPE_CHECKING:
+    from .columnar import ColumnBatch
 
 LOGGER = logging.getLogger(__name__)
 
+_PARALLEL_MIN_CHUNK_BYTES = 1024 * 1024
+_PARALLEL_MAX_CHUNK_BYTES = 4 * 1024 * 1024
+_PARALLEL_BOUNDARY_PROBE_BYTES = 64 * 1024
+_TRANSCODE_BLOCK_BYTES = 4 * 1024 * 1024
+SUPPORTED_READERS = {"text", "mmap", "fixed", "vb"}
+_BYTE_READERS = {"mmap", "fixed", "vb"}
+SUPPORTED_DECIMAL_MODES = {"decimal", "fixed"}
+
+
+# Status of a dispatched line on the non-raising path (try_parse_line).
+LINE_OK = 0
+LINE_BAD_LENGTH = 1
+LINE_UNKNOWN_TYPE = 2
+
 
 class ParsingError(RuntimeError):
     pass
@@ -28,39 +56,712 @@ class ParseIssue:
     raw_line: str
 
 
+_ISSUE_NUMBER_RE = re.compile(r"\d+")
+
+
+# Bounded collection of parse issues, used as on_issue sink by parse_file. Every
+# issue is counted under its message class (numbers masked, e.g. "Ligne #:
+# longueur=# attendue=#") and written to output_path as JSONL when given, but
+# only the first max_samples are kept in memory with their raw line (None keeps
+# them all). len() is the total number of issues; iteration yields the samples.
+class IssueLog:
+    def __init__(self, max_samples: int | None = None, output_path: Path | None = None) -> None:
+        self.max_samples = max_samples
+        self.output_path = output_path
+        self.samples: list[ParseIssue] = []
+        self.counts: Counter[str] = Counter()
+        self.total = 0
+        self._handle: TextIO | None = None
+        if output_path is not None:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = output_path.open("w", encoding="utf-8")
+
+    def add(self, issue: ParseIssue) -> None:
+        self.total += 1
+        self.counts[_ISSUE_NUMBER_RE.sub("#", issue.message)] += 1
+        if self.max_samples is None or len(self.samples) < self.max_samples:
+            self.samples.append(issue)
+        if self._handle is not None:
+            self._handle.write(json.dumps(asdict(issue), ensure_ascii=False))
+            self._handle.write("\n")
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.samples)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "samples": len(self.samples),
+            "by_class": dict(self.counts.most_common()),
+        }
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self) -> IssueLog:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self) -> Iterator[ParseIssue]:
+        return iter(self.samples)
+
+
 def _normalize_numeric(value: str) -> str:
     return value.replace(" ", "").replace(",", ".")
 
 
-def _coerce_value(raw_value: str, field: FieldSpec) -> Any:
-    value = raw_value.rstrip()
+def _coerce_string(raw_value: str) -> str:
+    return raw_value.rstrip()
 
-    if field.type in {FieldType.STRING, FieldType.DATE, FieldType.SIGN}:
-        return value
 
+def _coerce_integer(raw_value: str) -> Any:
+    value = raw_value.rstrip()
     normalized = _normalize_numeric(value)
     if normalized == "":
         return None
-
     try:
-        if field.type == FieldType.INTEGER:
-            return int(normalized)
-        if field.type == FieldType.DECIMAL:
-            decimals = field.decimals or 0
+        return int(normalized)
+    except ValueError:
+        return value
+
+
+@lru_cache(maxsize=None)
+def _decimal_coercer(decimals: int) -> Callable[[str], Any]:
+    scale = Decimal(10) ** decimals
+
+    def _coerce_decimal(raw_value: str) -> Any:
+        value = raw_value.rstrip()
+        normalized = _normalize_numeric(value)
+        if normalized == "":
+            return None
+        try:
             numeric = Decimal(normalized)
-            if "." not in normalized:
-                numeric = numeric / (Decimal(10) ** decimals)
-            return numeric
-    except (ValueError, InvalidOperation):
+        except InvalidOperation:
+            return value
+        if "." not in normalized:
+            numeric = numeric / scale
+        return numeric
+
+    return _coerce_decimal
+
+
+@lru_cache(maxsize=None)
+def _fixed_point_coercer(decimals: int) -> Callable[[str], Any]:
+    coerce_decimal = _decimal_coercer(decimals)
+
+    def _coerce_fixed_point(raw_value: str) -> Any:
+        normalized = _normalize_numeric(raw_value.rstrip())
+        if normalized == "":
+            return None
+        try:
+            return FixedPoint(int(normalized), decimals)
+        except ValueError:
+            pass
+        # Explicit separators or exponents: same value as decimal mode.
+        numeric = coerce_decimal(raw_value)
+        if isinstance(numeric, Decimal) and numeric.is_finite():
+            return FixedPoint.from_decimal(numeric, decimals)
+        return numeric
+
+    return _coerce_fixed_point
+
+
+def _unpack_decimal(raw: bytes) -> int:
+    # COMP-3: two digits per byte, the last nibble is the sign (B/D negative,
+    # A/C/E/F positive). Any other nibble raises ValueError.
+    digits = raw.hex()
+    body, sign = digits[:-1], digits[-1]
+    if sign not in "abcdef" or (body and not body.isdigit()):
+        raise ValueError(f"Packed decimal invalide: {digits}")
+    value = int(body or "0")
+    return -value if sign in "bd" else value
+
+
+def _ibm_float(raw: bytes) -> float:
+    # COMP-1/COMP-2 are IBM hexadecimal floats: sign bit, 7-bit base-16
+    # exponent biased by 64, then a 24- or 56-bit fraction.
+    bits = int.from_bytes(raw, "big")
+    width = len(raw) * 8 - 8
+    fraction = bits & ((1 << width) - 1)
+    exponent = (bits >> width) & 0x7F
+    value = math.ldexp(fraction, 4 * (exponent - 64) - width)
+    return -value if bits >> (width + 7) else value
+
+
+def _scaled_coercer(field: FieldSpec, decimal_mode: str) -> Callable[[int], Any]:
+    # Binary fields carry unscaled integers; this gives them the same value
+    # types as the DISPLAY coercers.
+    if field.type != FieldType.DECIMAL:
+        return int
+    decimals = field.decimals or 0
+    if decimal_mode == "fixed":
+        return lambda value: FixedPoint(value, decimals)
+    scale = Decimal(10) ** decimals
+    return lambda value: Decimal(value) / scale
+
+
+def _binary_coercer(field: FieldSpec, decimal_mode: str, pad: bytes) -> Callable[[bytes], Any]:
+    # Decodes COMP-3, COMP and COMP-1/COMP-2 slices. A packed field made only of
+    # padding or low-values is blank (None); undecodable bytes come back as
+    # their hex string, as the text coercers return unparsable text as is.
+    if field.usage == FieldUsage.FLOAT:
+        def _coerce_float(raw: bytes) -> Any:
+            return _ibm_float(raw) if len(raw) in (4, 8) else raw.hex().upper()
+
+        return _coerce_float
+
+    scaled = _scaled_coercer(field, decimal_mode)
+    if field.usage == FieldUsage.PACKED:
+        blanks = {pad * field.length, bytes(field.length)}
+
+        def _coerce_packed(raw: bytes) -> Any:
+            if raw in blanks:
+                return None
+            try:
+                return scaled(_unpack_decimal(raw))
+            except ValueError:
+                return raw.hex().upper()
+
+        return _coerce_packed
+
+    signed = field.signed
+
+    def _coerce_binary(raw: bytes) -> Any:
+        return scaled(int.from_bytes(raw, "big", signed=signed))
+
+    return _coerce_binary
+
+
+def _is_ebcdic(encoding: str) -> bool:
+    try:
+        return "0".encode(encoding) == b"\xf0"
+    except (LookupError, UnicodeError):
+        return False
+
+
+# Overpunched character -> (digit, negative) for the encoding the text was
+# decoded from. The sign is the zone of the byte (C positive, D negative), so
+# the characters are those the code page gives bytes 0xC0-0xC9 / 0xD0-0xD9:
+# '{', 'A'-'I' / '}', 'J'-'R' in cp037, but +0 / -0 are 'é' / 'è' in cp297 and
+# cp1147. Text from ASCII files (encoding None, latin-1...) follows the cp037
+# convention of mainframe transfers.
+@lru_cache(maxsize=None)
+def _overpunch_table(encoding: str | None = None) -> dict[str, tuple[int, bool]]:
+    code_page = "cp037"
+    if encoding is not None and _is_ebcdic(encoding):
+        code_page = ebcdic_code_page(encoding) or encoding
+    return {
+        **{bytes([0xC0 | digit]).decode(code_page): (digit, False) for digit in range(10)},
+        **{bytes([0xD0 | digit]).decode(code_page): (digit, True) for digit in range(10)},
+    }
+
+
+def _zoned_coercer(
+    coerce: Callable[[str], Any],
+    sign_position: SignPosition = SignPosition.TRAILING,
+    encoding: str | None = None,
+) -> Callable[[str], Any]:
+    # Swaps the overpunched character for its digit and negates the value;
+    # unsigned values (plain last digit) go through the DISPLAY coercer as is.
+    overpunch = _overpunch_table(encoding)
+    if sign_position != SignPosition.TRAILING:
+        return _signed_end_coercer(coerce, sign_position, overpunch)
+    digits = {char: str(digit) for char, (digit, _) in overpunch.items()}
+
+    def _coerce_zoned(raw_value: str) -> Any:
+        value = raw_value.rstrip()
+        last = value[-1:]
+        digit = digits.get(last)
+        if digit is None:
+            return coerce(raw_value)
+        numeric = coerce(value[:-1] + digit)
+        if type(numeric) is str:
+            return value
+        if numeric and overpunch[last][1]:
+            return -numeric
+        return numeric
+
+    return _coerce_zoned
+
+
+def _signed_end_coercer(
+    coerce: Callable[[str], Any],
+    sign_position: SignPosition,
+    overpunch: Mapping[str, tuple[int, bool]],
+) -> Callable[[str], Any]:
+    # Other sign positions: overpunch on the first digit (LEADING) or a '+'/'-'
+    # character of its own at either end (*_SEPARATE), which is dropped.
+    leading = sign_position in {SignPosition.LEADING, SignPosition.LEADING_SEPARATE}
+    separate = sign_position in {SignPosition.LEADING_SEPARATE, SignPosition.TRAILING_SEPARATE}
+
+    def _coerce_signed(raw_value: str) -> Any:
+        value = raw_value.rstrip()
+        sign = value[:1] if leading else value[-1:]
+        if separate:
+            if sign not in {"+", "-"}:
+                return coerce(raw_value)
+            digit, negative = "", sign == "-"
+        else:
+            punched = overpunch.get(sign)
+            if punched is None:
+                return coerce(raw_value)
+            digit, negative = str(punched[0]), punched[1]
+        numeric = coerce(digit + value[1:] if leading else value[:-1] + digit)
+        if type(numeric) is str:
+            return value
+        if numeric and negative:
+            return -numeric
+        return numeric
+
+    return _coerce_signed
+
+
+def _field_coercer(
+    field: FieldSpec,
+    decimal_mode: str = "decimal",
+    encoding: str | None = None,
+) -> Callable[[str], Any]:
+    # encoding is the one the text was decoded from; only zoned signs depend on it.
+    if field.is_binary:
+        # Text lines only carry binary fields intact when read as latin-1, which
+        # maps every byte to the code point of the same value.
+        binary = _binary_coercer(field, decimal_mode, b" ")
+        return lambda raw_value: binary(raw_value.encode("latin-1"))
+    if field.type == FieldType.INTEGER:
+        coerce = _coerce_integer
+    elif field.type == FieldType.DECIMAL:
+        if decimal_mode == "fixed":
+            coerce = _fixed_point_coercer(field.decimals or 0)
+        else:
+            coerce = _decimal_coercer(field.decimals or 0)
+    else:
+        return _coerce_string
+    if field.usage == FieldUsage.ZONED:
+        return _zoned_coercer(coerce, field.sign_position, encoding)
+    return coerce
+
+
+# Coercers of _coerce_value, shared by the fields that decode the same way
+# (FieldSpec is not hashable, so the key is built from the attributes
+# _field_coercer reads).
+_COERCERS: dict[tuple[Any, ...], Callable[[str], Any]] = {}
+
+
+def _coerce_field_key(field: FieldSpec) -> tuple[Any, ...]:
+    return (field.type, field.decimals, field.usage, field.signed, field.sign_position, field.length)
+
+
+def _coerce_value(raw_value: str, field: FieldSpec) -> Any:
+    # Kept for callers outside the parser, which uses its compiled plans.
+    key = _coerce_field_key(field)
+    coerce = _COERCERS.get(key)
+    if coerce is None:
+        coerce = _COERCERS[key] = _field_coercer(field)
+    return coerce(raw_value)
+
+
+# Parse plan of one record type, built once per parser: each entry is
+# (field_name, start, end, coerce) with 0-based slice bounds, so the per-line
+# loop never goes back to the pydantic FieldSpec objects. fields is the emitted
+# subset of spec.fields when the parser has a projection.
+@dataclass(frozen=True)
+class _CompiledRecord:
+    spec: RecordSpec
+    name: str
+    fields: tuple[FieldSpec, ...]
+    plan: tuple[tuple[str, int, int, Callable[[str], Any]], ...]
+    keys: tuple[str, ...]
+    positions: dict[str, int]
+
+
+def _compile_record(
+    record: RecordSpec,
+    decimal_mode: str = "decimal",
+    fields: Iterable[FieldSpec] | None = None,
+) -> _CompiledRecord:
+    emitted = tuple(record.fields if fields is None else fields)
+    plan = tuple(
+        (field.name, field.start - 1, field.start - 1 + field.length, _field_coercer(field, decimal_mode))
+        for field in emitted
+    )
+    keys = ("record_type", "line_number", *(name for name, _, _, _ in plan))
+    positions = {name: index for index, (name, _, _, _) in enumerate(plan)}
+    return _CompiledRecord(
+        spec=record,
+        name=record.name,
+        fields=emitted,
+        plan=plan,
+        keys=keys,
+        positions=positions,
+    )
+
+
+def parse_field_projection(text: str) -> dict[str, list[str]]:
+    # "ENT.NUFAC,ENT.MONHT,LIG.CT_NETHT" -> {"ENT": ["NUFAC", "MONHT"], "LIG": ["CT_NETHT"]}
+    projection: dict[str, list[str]] = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        record_name, separator, field_name = item.partition(".")
+        if not separator or not record_name.strip() or not field_name.strip():
+            raise ContractValidationError(f"Projection invalide '{item}': format attendu TYPE.CHAMP.")
+        names = projection.setdefault(record_name.strip(), [])
+        if field_name.strip() not in names:
+            names.append(field_name.strip())
+    return projection
+
+
+_MISSING = object()
+
+
+# Read-only record over the dispatched line: a field is sliced and coerced the
+# first time it is read, then cached. plan is the compiled text plan, or the
+# byte plan of the encoding when the line comes from the mmap reader. Behaves
+# like the dict returned by parse_line (same keys, order and values).
+class RecordView(Mapping):
+    __slots__ = ("_record", "_plan", "_line", "_line_number", "_values")
+
+    def __init__(
+        self,
+        record: _CompiledRecord,
+        plan: tuple[tuple[str, int, int, Callable[[Any], Any]], ...],
+        line: str | bytes,
+        line_number: int,
+    ) -> None:
+        self._record = record
+        self._plan = plan
+        self._line = line
+        self._line_number = line_number
+        self._values: list[Any] = [_MISSING] * len(plan)
+
+    @property
+    def record_type(self) -> str:
+        return self._record.name
+
+    @property
+    def line_number(self) -> int:
+        return self._line_number
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._record.positions.get(key)
+        if position is None:
+            if key == "record_type":
+                return self._record.name
+            if key == "line_number":
+                return self._line_number
+            raise KeyError(key)
+        value = self._values[position]
+        if value is _MISSING:
+            _, start, end, coerce = self._plan[position]
+            value = self._values[position] = coerce(self._line[start:end])
         return value
 
-    return value
+    def __contains__(self, key: object) -> bool:
+        return key in self._record.positions or key in ("record_type", "line_number")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._record.keys)
+
+    def __len__(self) -> int:
+        return len(self._record.keys)
+
+    def __repr__(self) -> str:
+        return f"RecordView({self._record.name!r}, line_number={self._line_number})"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Plans hold closures; a view pickles as the plain dict it stands for.
+        return (dict, (dict(self),))
+
+
+def _is_single_byte_encoding(encoding: str) -> bool:
+    try:
+        return len("A\n".encode(encoding)) == 2 and len(b"\xc3\xa9".decode(encoding, errors="replace")) == 2
+    except (LookupError, UnicodeError):
+        return False
+
+
+def _bytes_coercer(
+    field: FieldSpec,
+    encoding: str,
+    ascii_digits: bool,
+    decimal_mode: str = "decimal",
+) -> Callable[[bytes], Any]:
+    if field.is_binary:
+        return _binary_coercer(field, decimal_mode, " ".encode(encoding))
+    coerce = _field_coercer(field, decimal_mode, encoding)
+    if field.type == FieldType.INTEGER and ascii_digits:
+        # int() parses ASCII digits straight from bytes; anything unusual goes
+        # through the text coercer so results stay identical to the text reader.
+        def _coerce_integer_bytes(raw: bytes) -> Any:
+            try:
+                return int(raw)
+            except ValueError:
+                return coerce(raw.decode(encoding))
+
+        return _coerce_integer_bytes
+
+    if field.type == FieldType.DECIMAL and decimal_mode == "fixed" and ascii_digits:
+        decimals = field.decimals or 0
+
+        def _coerce_fixed_point_bytes(raw: bytes) -> Any:
+            try:
+                return FixedPoint(int(raw), decimals)
+            except ValueError:
+                return coerce(raw.decode(encoding))
+
+        return _coerce_fixed_point_bytes
+
+    def _coerce_bytes(raw: bytes) -> Any:
+        return coerce(raw.decode(encoding))
+
+    return _coerce_bytes
+
+
+# Byte-level view of the compiled contract for one single-byte encoding: selector
+# values and padding are pre-encoded, and each field decodes only its own slice.
+@dataclass(frozen=True)
+class _ByteLayout:
+    encoding: str
+    pad: bytes
+    newline: bytes
+    line_breaks: bytes
+    selector_groups: tuple[tuple[int, int, dict[bytes, tuple[int, _CompiledRecord]]], ...]
+    plans: dict[str, tuple[tuple[str, int, int, Callable[[bytes], Any]], ...]]
+
+
+_STRUCTURE_ORDER = {
+    "ENT": 2,
+    "ECH": 3,
+    "COM": 4,
+    "REF(E)": 5,
+    "ADR": 6,
+    "AD2": 7,
+    "LIG": 8,
+    "REF(L)": 9,
+    "LEC": 10,
+    "PIE": 11,
+}
+_BLOCK_COUNTED_LABELS = ("ECH", "COM", "REF(E)", "ADR", "AD2", "LIG", "PIE")
+_BLOCK_SIMPLE_TYPES = {"ECH", "COM", "ADR", "AD2", "PIE"}
+_LINE_SCOPE_ORDERS = {_STRUCTURE_ORDER["LIG"], _STRUCTURE_ORDER["REF(L)"], _STRUCTURE_ORDER["LEC"]}
+
+
+# Single-pass check of the section 3.2 order/occurrence rules. Records are fed
+# one at a time; the issues of an ENT block are reported through on_issue as soon
+# as the next ENT (or finish) closes it. "First record must be FIC" is reported
+# when the first FIC shows up; the checks that need the whole file (FIC
+# occurrences, empty file, no invoice block) come from finish(), so the FIC
+# occurrence issue, which the batch check put first, now comes last.
+# first_issue is still the one the batch check listed first, for the strict
+# mode error.
+class StructureValidator:
+    def __init__(self, contract: ContractSpec, on_issue: Callable[[ParseIssue], None]) -> None:
+        self._on_issue = on_issue
+        self._rules: dict[str, StructureRule] = {}
+        for rule in contract.structure_rules:
+            self._rules.setdefault(rule.label, rule)
+        self.enabled = bool(contract.structure_rules)
+        self.issue_count = 0
+        self._first_issue: ParseIssue | None = None
+        self._fic_issue: ParseIssue | None = None
+
+        self._record_count = 0
+        self._first_record: tuple[str, int] | None = None
+        self._fic_count = 0
+        self._first_fic_line = 0
+        self._block_count = 0
+
+        self._in_block = False
+        self._ent_line = 0
+        self._counts: Counter[str] = Counter()
+        self._segments: list[list[int]] = []
+        self._current_line: list[int] | None = None
+        self._seen_lig = False
+        self._last_order = _STRUCTURE_ORDER["ENT"]
+
+    @property
+    def first_issue(self) -> ParseIssue | None:
+        return self._fic_issue or self._first_issue
+
+    def _emit(self, line_number: int, message: str) -> ParseIssue:
+        issue = ParseIssue(line_number=line_number, message=message, raw_line="")
+        self.issue_count += 1
+        if self._first_issue is None:
+            self._first_issue = issue
+        self._on_issue(issue)
+        return issue
+
+    def _check_occurrence(self, label: str, count: int, line_number: int) -> ParseIssue | None:
+        rule = self._rules.get(label)
+        if rule is None:
+            return None
+        issue = None
+        if count < rule.min_occurs:
+            issue = self._emit(
+                line_number,
+                f"Regle de structure non respectee [{label}]: minimum {rule.min_occurs}, trouve {count}.",
+            )
+        if rule.max_occurs is not None and count > rule.max_occurs:
+            maximum = self._emit(
+                line_number,
+                f"Regle de structure non respectee [{label}]: maximum {rule.max_occurs}, trouve {count}.",
+            )
+            issue = issue or maximum
+        return issue
+
+    def _open_block(self, line_number: int) -> None:
+        self._in_block = True
+        self._ent_line = line_number
+        self._counts = Counter()
+        self._segments = []
+        self._current_line = None
+        self._seen_lig = False
+        self._last_order = _STRUCTURE_ORDER["ENT"]
+
+    def _close_block(self) -> None:
+        if not self._in_block:
+            return
+        self._in_block = False
+        self._block_count += 1
+        if self._current_line is not None:
+            self._segments.append(self._current_line)
+
+        ent_line = self._ent_line
+        self._check_occurrence("ENT", 1, ent_line)
+        for label in _BLOCK_COUNTED_LABELS:
+            self._check_occurrence(label, self._counts.get(label, 0), ent_line)
+        for segment_line, ref_count, lec_count in self._segments:
+            self._check_occurrence("REF(L)", ref_count, segment_line)
+            self._check_occurrence("LEC", lec_count, segment_line)
+
+    def feed(self, record_type: str, line_number: int) -> None:
+        if not self.enabled:
+            return
+        self._record_count += 1
+        if self._first_record is None:
+            self._first_record = (record_type, line_number)
+
+        if record_type == "FIC":
+            self._fic_count += 1
+            if self._fic_count == 1:
+                self._first_fic_line = line_number
+                first_type, first_line = self._first_record
+                if first_type != "FIC":
+                    self._fic_issue = self._emit(
+                        first_line,
+                        "Ordre de structure non respecte: le premier enregistrement doit etre FIC.",
+                    )
+            return
+        if record_type == "ENT":
+            self._close_block()
+            self._open_block(line_number)
+            return
+        if not self._in_block:
+            self._emit(
+                line_number,
+                f"Ordre de structure non respecte: enregistrement avant le premier ENT ({record_type}).",
+            )
+            return
+
+        if record_type == "LIG":
+            self._counts["LIG"] += 1
+            self._seen_lig = True
+            if self._current_line is not None:
+                self._segments.append(self._current_line)
+            self._current_line = [line_number, 0, 0]
+            current_order = _STRUCTURE_ORDER["LIG"]
+            if self._last_order not in _LINE_SCOPE_ORDERS and current_order < self._last_order:
+                self._emit(line_number, "Ordre de structure non respecte dans le bloc facture autour de LIG.")
+            self._last_order = current_order
+            return
+
+        if record_type == "REF":
+            if self._seen_lig:
+                current_order = _STRUCTURE_ORDER["REF(L)"]
+                if self._current_line is None:
+                    self._emit(line_number, "Regle de structure non respectee [REF(L)]: REF sans LIG parent.")
+                else:
+                    self._current_line[1] += 1
+            else:
+                current_order = _STRUCTURE_ORDER["REF(E)"]
+                self._counts["REF(E)"] += 1
+        elif record_type == "LEC":
+            current_order = _STRUCTURE_ORDER["LEC"]
+            if self._current_line is None:
+                self._emit(line_number, "Regle de structure non respectee [LEC]: LEC sans LIG parent.")
+            else:
+                self._current_line[2] += 1
+        elif record_type in _BLOCK_SIMPLE_TYPES:
+            self._counts[record_type] += 1
+            current_order = _STRUCTURE_ORDER[record_type]
+        else:
+            return
+
+        if current_order < self._last_order:
+            self._emit(
+                line_number,
+                f"Ordre de structure non respecte dans le bloc facture: {record_type} hors sequence attendue.",
+            )
+        else:
+            self._last_order = current_order
+
+    def finish(self) -> None:
+        if not self.enabled:
+            return
+        self._close_block()
+        if self._first_record is None:
+            self._emit(0, "Aucun enregistrement parse.")
+            return
+
+        self._fic_issue = self._check_occurrence("FIC", self._fic_count, self._first_fic_line) or self._fic_issue
+        if not self._block_count:
+            self._emit(0, "Regle de structure non respectee [ENT]: aucun bloc facture trouve.")
 
 
 class FixedWidthParser:
-    def __init__(self, contract: ContractSpec) -> None:
+    def __init__(
+        self,
+        contract: ContractSpec,
+        decimal_mode: str = "decimal",
+        fields: Mapping[str, Iterable[str]] | None = None,
+    ) -> None:
+        # decimal_mode="fixed" returns DECIMAL fields as FixedPoint scaled integers
+        # instead of Decimal (same values, cheaper to parse and to sum).
+        # fields restricts the emitted fields per record type ({"ENT": ["NUFAC"]});
+        # other fields are never sliced, types not listed keep all their fields.
+        if decimal_mode not in SUPPORTED_DECIMAL_MODES:
+            allowed = ", ".join(sorted(SUPPORTED_DECIMAL_MODES))
+            raise ValueError(f"Mode decimal non supporte '{decimal_mode}'. Valeurs autorisees: {allowed}")
         self.contract = contract
+        self.decimal_mode = decimal_mode
         self._validate_contract()
+        self.fields = self._validate_projection(fields)
+        self._line_length = contract.line_length
+        self._compiled: dict[str, _CompiledRecord] = {
+            record.name: _compile_record(
+                record,
+                decimal_mode,
+                self._projected_fields(record),
+            )
+            for record in contract.record_types
+        }
+        self._build_dispatch_index()
+        self._byte_layouts: dict[str, _ByteLayout] = {}
+        self._text_plans_by_encoding: dict[
+            str | None, dict[str, tuple[tuple[str, int, int, Callable[[str], Any]], ...]]
+        ] = {}
+        self._has_binary_fields = any(
+            field.is_binary for compiled in self._compiled.values() for field in compiled.fields
+        )
 
     def _validate_contract(self) -> None:
         for record in self.contract.record_types:
@@ -75,363 +776,967 @@ class FixedWidthParser:
                         f"attendu={self.contract.line_length}"
                     )
 
-    def _record_for_line(self, line: str, original_length: int) -> RecordSpec | None:
-        for record in self.contract.record_types:
+    def _validate_record_types(self, record_types: Iterable[str] | None) -> frozenset[str] | None:
+        if record_types is None:
+            return None
+        wanted = frozenset(record_types)
+        unknown = sorted(wanted - self._compiled.keys())
+        if unknown:
+            raise ContractValidationError(f"Filtre: type(s) d'enregistrement inconnu(s): {', '.join(unknown)}")
+        return wanted
+
+    def _validate_projection(self, fields: Mapping[str, Iterable[str]] | None) -> dict[str, list[str]] | None:
+        if fields is None:
+            return None
+        records = {record.name: record for record in self.contract.record_types}
+        projection: dict[str, list[str]] = {}
+        for record_name, field_names in fields.items():
+            record = records.get(record_name)
+            if record is None:
+                raise ContractValidationError(f"Projection: type d'enregistrement inconnu '{record_name}'.")
+            known = {field.name for field in record.fields}
+            names = list(dict.fromkeys(field_names))
+            unknown = [name for name in names if name not in known]
+            if unknown:
+                raise ContractValidationError(
+                    f"Projection: champ(s) inconnu(s) pour {record_name}: {', '.join(unknown)}"
+                )
+            projection[record_name] = names
+        return projection
+
+    def _projected_fields(self, record: RecordSpec) -> tuple[FieldSpec, ...] | None:
+        # Contract order is kept whatever the order of the projection.
+        if self.fields is None or record.name not in self.fields:
+            return None
+        wanted = set(self.fields[record.name])
+        return tuple(field for field in record.fields if field.name in wanted)
+
+    def _build_dispatch_index(self) -> None:
+        # Selectors sharing the same (start, length) are resolved with a single
+        # slice + dict lookup. The contract index is kept so that, when several
+        # selector positions match, the first record type in contract order wins.
+        groups: dict[tuple[int, int], dict[str, tuple[int, _CompiledRecord]]] = {}
+        for index, record in enumerate(self.contract.record_types):
             start = record.selector.start - 1
             end = start + record.selector.length
-            if line[start:end] == record.selector.value:
-                return record
-        if len(self.contract.record_types) == 1:
+            table = groups.setdefault((start, end), {})
+            table.setdefault(record.selector.value, (index, self._compiled[record.name]))
+        self._selector_groups = tuple((start, end, table) for (start, end), table in groups.items())
+        self._fallback_by_length: dict[int, _CompiledRecord | None] = {}
+
+    def _fallback_for_length(self, original_length: int) -> _CompiledRecord | None:
+        if original_length in self._fallback_by_length:
+            return self._fallback_by_length[original_length]
+
+        fallback: _CompiledRecord | None = None
+        record_types = self.contract.record_types
+        if len(record_types) == 1:
             # Fallback for single-layout files where the selector token is not present in data.
-            return self.contract.record_types[0]
-        if original_length > 0:
+            fallback = self._compiled[record_types[0].name]
+        elif original_length > 0:
             # For generic multi-layout files, selectors may not be explicit.
             # Use nearest record physical size as best-effort discriminator.
-            candidates = sorted(
-                self.contract.record_types,
-                key=lambda record: abs(record.max_end - original_length),
-            )
-            if candidates:
-                best = candidates[0]
-                ties = [record for record in candidates if abs(record.max_end - original_length) == abs(best.max_end - original_length)]
-                if len(ties) == 1:
-                    return best
-        return None
+            best_gap = min(abs(record.max_end - original_length) for record in record_types)
+            ties = [record for record in record_types if abs(record.max_end - original_length) == best_gap]
+            if len(ties) == 1:
+                fallback = self._compiled[ties[0].name]
+
+        self._fallback_by_length[original_length] = fallback
+        return fallback
+
+    def _dispatch(self, line: str, original_length: int) -> _CompiledRecord | None:
+        groups = self._selector_groups
+        if len(groups) == 1:
+            start, end, table = groups[0]
+            hit = table.get(line[start:end])
+            if hit is not None:
+                return hit[1]
+        else:
+            best: tuple[int, _CompiledRecord] | None = None
+            for start, end, table in groups:
+                hit = table.get(line[start:end])
+                if hit is not None and (best is None or hit[0] < best[0]):
+                    best = hit
+            if best is not None:
+                return best[1]
+        return self._fallback_for_length(original_length)
+
+    def _record_for_line(self, line: str, original_length: int) -> RecordSpec | None:
+        compiled = self._dispatch(line, original_length)
+        return compiled.spec if compiled is not None else None
 
     def parse_line(self, line: str, line_number: int) -> dict[str, Any]:
+        row = self._parse_row(line, line_number)
+        return dict(zip(self._compiled[row[0]].keys, row))
+
+    def try_parse_line(self, line: str, line_number: int) -> tuple[int, dict[str, Any] | None]:
+        # Non-raising parse_line: (LINE_OK, record), or (LINE_BAD_LENGTH /
+        # LINE_UNKNOWN_TYPE, None) for a line parse_line would reject.
+        status, compiled, effective_line = self._dispatch_line(line)
+        if compiled is None:
+            return status, None
+        row = (
+            compiled.name,
+            line_number,
+            *[coerce(effective_line[start:end]) for _, start, end, coerce in compiled.plan],
+        )
+        return LINE_OK, dict(zip(compiled.keys, row))
+
+    # Rows are (record_type, line_number, *field values) in compiled.keys order;
+    # the streaming path carries rows and only builds dicts on output. Raw rows
+    # (record_type, line_number, effective_line) leave decoding to the caller.
+    def _parse_row(self, line: str, line_number: int) -> tuple[Any, ...]:
+        compiled, effective_line = self._prepare_line(line, line_number)
+        return (
+            compiled.name,
+            line_number,
+            *[coerce(effective_line[start:end]) for _, start, end, coerce in compiled.plan],
+        )
+
+    def _prepare_line(self, line: str, line_number: int) -> tuple[_CompiledRecord, str]:
+        status, compiled, effective_line = self._dispatch_line(line)
+        if compiled is None:
+            raise ParsingError(self._line_issue(status, line_number, len(line), line).message)
+        return compiled, effective_line
+
+    # Bad lines come back as a status code (compiled is None) rather than an
+    # exception, so dirty files do not cost one raise/catch per line.
+    def _dispatch_line(self, line: str) -> tuple[int, _CompiledRecord | None, str]:
         effective_line = line
         original_length = len(line)
-        if len(line) != self.contract.line_length:
+        line_length = self._line_length
+        if original_length != line_length:
             if self.contract.strict_length_validation:
-                raise ParsingError(
-                    f"Ligne {line_number}: longueur={len(line)} attendue={self.contract.line_length}"
-                )
-            if len(line) < self.contract.line_length:
-                effective_line = line.ljust(self.contract.line_length)
+                return LINE_BAD_LENGTH, None, line
+            if original_length < line_length:
+                effective_line = line.ljust(line_length)
             else:
-                effective_line = line[: self.contract.line_length]
+                effective_line = line[:line_length]
 
-        record = self._record_for_line(effective_line, original_length)
-        if record is None:
-            raise ParsingError(
-                f"Ligne {line_number}: type d'enregistrement inconnu aux positions configurees."
-            )
-
-        output: dict[str, Any] = {"record_type": record.name, "line_number": line_number}
-        for field in record.fields:
-            start = field.start - 1
-            end = start + field.length
-            raw_value = effective_line[start:end]
-            output[field.name] = _coerce_value(raw_value=raw_value, field=field)
+        compiled = self._dispatch(effective_line, original_length)
+        if compiled is None:
+            return LINE_UNKNOWN_TYPE, None, effective_line
+        return LINE_OK, compiled, effective_line
 
-        return output
-
-    def _structure_rule(self, label: str):
-        for rule in self.contract.structure_rules:
-            if rule.label == label:
-                return rule
-        return None
+    def _line_issue(self, status: int, line_number: int, original_length: int, raw_line: str) -> ParseIssue:
+        if status == LINE_BAD_LENGTH:
+            message = f"Ligne {line_number}: longueur={original_length} attendue={self._line_length}"
+        else:
+            message = f"Ligne {line_number}: type d'enregistrement inconnu aux positions configurees."
+        return ParseIssue(line_number=line_number, message=message, raw_line=raw_line)
 
-    def _check_occurrence(
+    def _text_plans(
         self,
-        *,
-        issues: list[ParseIssue],
-        label: str,
-        count: int,
-        line_number: int,
-    ) -> None:
-        rule = self._structure_rule(label)
-        if rule is None:
-            return
-        if count < rule.min_occurs:
-            issues.append(
-                ParseIssue(
-                    line_number=line_number,
-                    message=(
-                        f"Regle de structure non respectee [{label}]: minimum "
-                        f"{rule.min_occurs}, trouve {count}."
-                    ),
-                    raw_line="",
+        encoding: str | None,
+    ) -> dict[str, tuple[tuple[str, int, int, Callable[[str], Any]], ...]]:
+        # Compiled plans read zoned signs the cp037 way; text decoded from an
+        # EBCDIC code page where the zone characters differ (cp297, cp1147) gets
+        # plans of its own.
+        plans = self._text_plans_by_encoding.get(encoding)
+        if plans is not None:
+            return plans
+        zoned = any(
+            field.usage == FieldUsage.ZONED for compiled in self._compiled.values() for field in compiled.fields
+        )
+        if not zoned or _overpunch_table(encoding) == _overpunch_table(None):
+            plans = {name: compiled.plan for name, compiled in self._compiled.items()}
+        else:
+            plans = {
+                name: tuple(
+                    (
+                        field.name,
+                        field.start - 1,
+                        field.start - 1 + field.length,
+                        _field_coercer(field, self.decimal_mode, encoding),
+                    )
+                    for field in compiled.fields
                 )
+                for name, compiled in self._compiled.items()
+            }
+        self._text_plans_by_encoding[encoding] = plans
+        return plans
+
+    def _byte_layout(self, encoding: str) -> _ByteLayout:
+        layout = self._byte_layouts.get(encoding)
+        if layout is not None:
+            return layout
+        if not _is_single_byte_encoding(encoding):
+            raise ValueError(f"Lecture octets impossible: l'encodage {encoding} n'est pas mono-octet.")
+
+        ascii_digits = "0123456789 +-".encode(encoding) == b"0123456789 +-"
+        selector_groups = tuple(
+            (
+                start,
+                end,
+                {value.encode(encoding): hit for value, hit in table.items()},
             )
-        if rule.max_occurs is not None and count > rule.max_occurs:
-            issues.append(
-                ParseIssue(
-                    line_number=line_number,
-                    message=(
-                        f"Regle de structure non respectee [{label}]: maximum "
-                        f"{rule.max_occurs}, trouve {count}."
-                    ),
-                    raw_line="",
+            for start, end, table in self._selector_groups
+        )
+        plans = {
+            name: tuple(
+                (
+                    field.name,
+                    field.start - 1,
+                    field.start - 1 + field.length,
+                    _bytes_coercer(field, encoding, ascii_digits, self.decimal_mode),
                 )
+                for field in compiled.fields
             )
+            for name, compiled in self._compiled.items()
+        }
+        layout = _ByteLayout(
+            encoding=encoding,
+            pad=" ".encode(encoding),
+            newline="\n".encode(encoding),
+            line_breaks="\r\n".encode(encoding),
+            selector_groups=selector_groups,
+            plans=plans,
+        )
+        self._byte_layouts[encoding] = layout
+        return layout
+
+    def _dispatch_bytes(self, line: bytes, original_length: int, layout: _ByteLayout) -> _CompiledRecord | None:
+        best: tuple[int, _CompiledRecord] | None = None
+        for start, end, table in layout.selector_groups:
+            hit = table.get(line[start:end])
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        if best is not None:
+            return best[1]
+        return self._fallback_for_length(original_length)
 
-    def _validate_structure(self, records: list[dict[str, Any]]) -> list[ParseIssue]:
-        if not self.contract.structure_rules:
-            return []
+    def _dispatch_line_bytes(self, line: bytes, layout: _ByteLayout) -> tuple[int, _CompiledRecord | None, bytes]:
+        effective_line = line
+        original_length = len(line)
+        line_length = self._line_length
+        if original_length != line_length:
+            if self.contract.strict_length_validation:
+                return LINE_BAD_LENGTH, None, line
+            if original_length < line_length:
+                effective_line = line.ljust(line_length, layout.pad)
+            else:
+                effective_line = line[:line_length]
+
+        compiled = self._dispatch_bytes(effective_line, original_length, layout)
+        if compiled is None:
+            return LINE_UNKNOWN_TYPE, None, effective_line
+        return LINE_OK, compiled, effective_line
 
+    def _validate_structure(self, records: Iterable[dict[str, Any]]) -> list[ParseIssue]:
         issues: list[ParseIssue] = []
-        if not records:
-            issues.append(ParseIssue(line_number=0, message="Aucun enregistrement parse.", raw_line=""))
+        validator = StructureValidator(self.contract, on_issue=issues.append)
+        if not validator.enabled:
             return issues
+        for record in records:
+            validator.feed(str(record.get("record_type", "")), int(record.get("line_number", 0) or 0))
+        validator.finish()
+        return issues
+
+    def _iter_parsed_lines(
+        self,
+        lines: Iterable[str],
+        *,
+        first_line_number: int = 1,
+        continue_on_error: bool = False,
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+        encoding: str | None = None,
+    ) -> Iterator[tuple[Any, ...] | ParseIssue]:
+        # Lines of a type outside record_types are only dispatched and come out as
+        # (record_type, line_number), for structure validation.
+        plans = self._text_plans(encoding)
+        for line_number, raw_line in enumerate(lines, start=first_line_number):
+            line = raw_line.rstrip("\r\n")
+            status, compiled, effective_line = self._dispatch_line(line)
+            if compiled is None:
+                yield self._line_issue(status, line_number, len(line), line)
+                if not continue_on_error:
+                    return
+            elif record_types is not None and compiled.name not in record_types:
+                yield (compiled.name, line_number)
+            elif raw:
+                yield (compiled.name, line_number, effective_line)
+            else:
+                yield (
+                    compiled.name,
+                    line_number,
+                    *[coerce(effective_line[start:end]) for _, start, end, coerce in plans[compiled.name]],
+                )
+
+    def _iter_parsed_buffer(
+        self,
+        buffer: bytes | mmap.mmap,
+        layout: _ByteLayout,
+        *,
+        first_line_number: int = 1,
+        continue_on_error: bool = False,
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+    ) -> Iterator[tuple[Any, ...] | ParseIssue]:
+        # Lines are located with find() on the raw buffer and only the emitted
+        # fields are decoded; \n and \r\n terminate a line, a lone \r does not.
+        newline = layout.newline
+        line_breaks = layout.line_breaks
+        plans = layout.plans
+        size = len(buffer)
+        position = 0
+        line_number = first_line_number
+        while position < size:
+            end = buffer.find(newline, position)
+            if end == -1:
+                end = size
+            line = buffer[position:end].rstrip(line_breaks)
+            position = end + 1
+            status, compiled, effective_line = self._dispatch_line_bytes(line, layout)
+            if compiled is None:
+                yield self._line_issue(status, line_number, len(line), line.decode(layout.encoding, errors="replace"))
+                if not continue_on_error:
+                    return
+            elif record_types is not None and compiled.name not in record_types:
+                yield (compiled.name, line_number)
+            elif raw:
+                yield (compiled.name, line_number, effective_line)
+            else:
+                yield (
+                    compiled.name,
+                    line_number,
+                    *[coerce(effective_line[start:end]) for _, start, end, coerce in plans[compiled.name]],
+                )
+            line_number += 1
 
-        fic_positions = [record.get("line_number", 0) for record in records if record.get("record_type") == "FIC"]
-        self._check_occurrence(
-            issues=issues,
-            label="FIC",
-            count=len(fic_positions),
-            line_number=fic_positions[0] if fic_positions else 0,
+    def _parse_byte_record(
+        self,
+        line: bytes,
+        line_number: int,
+        layout: _ByteLayout,
+        raw: bool,
+        record_types: frozenset[str] | None,
+    ) -> tuple[Any, ...] | ParseIssue:
+        status, compiled, effective_line = self._dispatch_line_bytes(line, layout)
+        if compiled is None:
+            return self._line_issue(status, line_number, len(line), line.decode(layout.encoding, errors="replace"))
+        if record_types is not None and compiled.name not in record_types:
+            return (compiled.name, line_number)
+        if raw:
+            return (compiled.name, line_number, effective_line)
+        return (
+            compiled.name,
+            line_number,
+            *[coerce(effective_line[start:end]) for _, start, end, coerce in layout.plans[compiled.name]],
         )
-        if fic_positions and records[0].get("record_type") != "FIC":
-            issues.append(
-                ParseIssue(
-                    line_number=int(records[0].get("line_number", 0) or 0),
-                    message="Ordre de structure non respecte: le premier enregistrement doit etre FIC.",
+
+    def _iter_parsed_fixed(
+        self,
+        buffer: bytes | mmap.mmap,
+        layout: _ByteLayout,
+        *,
+        first_line_number: int = 1,
+        continue_on_error: bool = False,
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+    ) -> Iterator[tuple[Any, ...] | ParseIssue]:
+        # Records without terminators, line_length bytes each: record n starts at
+        # n * line_length, so binary fields may hold any byte value. A short last
+        # record goes through the usual length check.
+        record_length = self._line_length
+        line_number = first_line_number
+        for position in range(0, len(buffer), record_length):
+            line = buffer[position : position + record_length]
+            item = self._parse_byte_record(line, line_number, layout, raw, record_types)
+            yield item
+            if not continue_on_error and isinstance(item, ParseIssue):
+                return
+            line_number += 1
+
+    def _iter_parsed_vb(
+        self,
+        buffer: bytes | mmap.mmap,
+        layout: _ByteLayout,
+        *,
+        first_line_number: int = 1,
+        continue_on_error: bool = False,
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+    ) -> Iterator[tuple[Any, ...] | ParseIssue]:
+        # RECFM=VB: each block starts with a BDW (2-byte big-endian length, BDW
+        # included, then 2 zero bytes; high bit set = 4-byte extended length), and
+        # holds records each prefixed by an RDW (2-byte length, RDW included, then
+        # 2 zero bytes). Payloads are sliced straight from the buffer and their
+        # length drives the usual length check / length-based type fallback. A
+        # broken descriptor ends the read: the following offsets are unknown.
+        size = len(buffer)
+        position = 0
+        line_number = first_line_number
+        while position < size:
+            header = buffer[position : position + 4]
+            block_length = int.from_bytes(header[:2], "big")
+            if block_length & 0x8000:
+                block_length = int.from_bytes(header, "big") & 0x7FFFFFFF
+            elif header[2:] != b"\x00\x00":
+                block_length = 0
+            if len(header) < 4 or block_length < 4 or position + block_length > size:
+                yield ParseIssue(
+                    line_number=line_number,
+                    message=f"Bloc a l'octet {position}: descripteur de bloc (BDW) invalide.",
                     raw_line="",
                 )
-            )
-
-        invoice_blocks: list[list[dict[str, Any]]] = []
-        current_block: list[dict[str, Any]] | None = None
+                return
 
-        for record in records:
-            record_type = str(record.get("record_type", ""))
-            if record_type == "FIC":
-                continue
-            if record_type == "ENT":
-                if current_block:
-                    invoice_blocks.append(current_block)
-                current_block = [record]
-                continue
-
-            if current_block is None:
-                issues.append(
-                    ParseIssue(
-                        line_number=int(record.get("line_number", 0) or 0),
-                        message=(
-                            "Ordre de structure non respecte: enregistrement avant le premier ENT "
-                            f"({record_type})."
-                        ),
+            block_end = position + block_length
+            record_position = position + 4
+            while record_position < block_end:
+                rdw = buffer[record_position : record_position + 4]
+                record_length = int.from_bytes(rdw[:2], "big")
+                record_end = record_position + record_length
+                # Non-zero flag bytes are VBS segments, not supported.
+                if len(rdw) < 4 or rdw[2:] != b"\x00\x00" or record_length < 4 or record_end > block_end:
+                    yield ParseIssue(
+                        line_number=line_number,
+                        message=f"Enregistrement {line_number} (octet {record_position}): descripteur (RDW) invalide.",
                         raw_line="",
                     )
+                    return
+                item = self._parse_byte_record(
+                    buffer[record_position + 4 : record_end],
+                    line_number,
+                    layout,
+                    raw,
+                    record_types,
                 )
-                continue
-            current_block.append(record)
+                yield item
+                if not continue_on_error and isinstance(item, ParseIssue):
+                    return
+                record_position = record_end
+                line_number += 1
+            position = block_end
 
-        if current_block:
-            invoice_blocks.append(current_block)
+    def _iter_parsed_serial(
+        self,
+        input_path: Path,
+        encoding: str,
+        continue_on_error: bool,
+        reader: str = "text",
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+    ) -> Iterator[tuple[Any, ...] | ParseIssue]:
+        if reader in _BYTE_READERS:
+            layout = self._byte_layout(encoding)
+            iter_buffer = {
+                "mmap": self._iter_parsed_buffer,
+                "fixed": self._iter_parsed_fixed,
+                "vb": self._iter_parsed_vb,
+            }[reader]
+            with input_path.open("rb") as handle:
+                if input_path.stat().st_size == 0:
+                    return
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    yield from iter_buffer(
+                        buffer,
+                        layout,
+                        continue_on_error=continue_on_error,
+                        raw=raw,
+                        record_types=record_types,
+                    )
+            return
 
-        if not invoice_blocks:
-            issues.append(
-                ParseIssue(
-                    line_number=0,
-                    message="Regle de structure non respectee [ENT]: aucun bloc facture trouve.",
-                    raw_line="",
-                )
-            )
-            return issues
+        code_page = ebcdic_code_page(encoding)
+        if code_page is not None:
+            yield from self._iter_parsed_transcoded(input_path, code_page, continue_on_error, raw, record_types)
+            return
 
-        order_by_label = {
-            "ENT": 2,
-            "ECH": 3,
-            "COM": 4,
-            "REF(E)": 5,
-            "ADR": 6,
-            "AD2": 7,
-            "LIG": 8,
-            "REF(L)": 9,
-            "LEC": 10,
-            "PIE": 11,
-        }
+        with input_path.open("r", encoding=encoding, newline="") as handle:
+            yield from self._iter_parsed_lines(
+                handle,
+                continue_on_error=continue_on_error,
+                raw=raw,
+                record_types=record_types,
+                encoding=encoding,
+            )
 
-        for block in invoice_blocks:
-            ent_line = int(block[0].get("line_number", 0) or 0)
-            counts = Counter(str(record.get("record_type", "")) for record in block)
-            header_ref_count = 0
-            line_segments: list[dict[str, Any]] = []
-            current_line: dict[str, Any] | None = None
-            seen_lig = False
-            last_order = order_by_label["ENT"]
-
-            for record in block[1:]:
-                record_type = str(record.get("record_type", ""))
-                line_number = int(record.get("line_number", 0) or 0)
-
-                if record_type == "LIG":
-                    seen_lig = True
-                    if current_line is not None:
-                        line_segments.append(current_line)
-                    current_line = {"line_number": line_number, "ref": 0, "lec": 0}
-                    current_order = order_by_label["LIG"]
-                    if last_order not in {order_by_label["LIG"], order_by_label["REF(L)"], order_by_label["LEC"]}:
-                        if current_order < last_order:
-                            issues.append(
-                                ParseIssue(
-                                    line_number=line_number,
-                                    message="Ordre de structure non respecte dans le bloc facture autour de LIG.",
-                                    raw_line="",
-                                )
-                            )
-                    last_order = current_order
+    def _iter_parsed_transcoded(
+        self,
+        input_path: Path,
+        code_page: str,
+        continue_on_error: bool,
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+    ) -> Iterator[tuple[Any, ...] | ParseIssue]:
+        # Text reader for EBCDIC files: blocks are transcoded with one
+        # bytes.translate (NEL and LF both end a line) and split like a text file;
+        # the partial line at the end of a block is carried to the next one.
+        first_line_number = 1
+        carry = ""
+        with input_path.open("rb") as handle:
+            while True:
+                block = handle.read(_TRANSCODE_BLOCK_BYTES)
+                text = carry + transcode(block, code_page) if block else carry
+                if not text:
+                    return
+                cut = text.rfind("\n") + 1 if block else len(text)
+                if cut == 0:
+                    carry = text
                     continue
+                carry = text[cut:]
+                lines = io.StringIO(text[:cut], newline="").readlines()
+                for item in self._iter_parsed_lines(
+                    lines,
+                    first_line_number=first_line_number,
+                    continue_on_error=continue_on_error,
+                    raw=raw,
+                    record_types=record_types,
+                    encoding=code_page,
+                ):
+                    yield item
+                    if isinstance(item, ParseIssue) and not continue_on_error:
+                        return
+                first_line_number += len(lines)
+                if not block:
+                    return
 
-                if record_type == "REF":
-                    if seen_lig:
-                        current_order = order_by_label["REF(L)"]
-                        if current_line is None:
-                            issues.append(
-                                ParseIssue(
-                                    line_number=line_number,
-                                    message="Regle de structure non respectee [REF(L)]: REF sans LIG parent.",
-                                    raw_line="",
-                                )
-                            )
-                        else:
-                            current_line["ref"] += 1
-                    else:
-                        current_order = order_by_label["REF(E)"]
-                        header_ref_count += 1
-                elif record_type == "LEC":
-                    current_order = order_by_label["LEC"]
-                    if current_line is None:
-                        issues.append(
-                            ParseIssue(
-                                line_number=line_number,
-                                message="Regle de structure non respectee [LEC]: LEC sans LIG parent.",
-                                raw_line="",
-                            )
-                        )
-                    else:
-                        current_line["lec"] += 1
-                elif record_type == "ECH":
-                    current_order = order_by_label["ECH"]
-                elif record_type == "COM":
-                    current_order = order_by_label["COM"]
-                elif record_type == "ADR":
-                    current_order = order_by_label["ADR"]
-                elif record_type == "AD2":
-                    current_order = order_by_label["AD2"]
-                elif record_type == "PIE":
-                    current_order = order_by_label["PIE"]
-                else:
-                    continue
+    def _iter_parsed_parallel(
+        self,
+        input_path: Path,
+        encoding: str,
+        continue_on_error: bool,
+        workers: int,
+        reader: str = "text",
+        raw: bool = False,
+        record_types: frozenset[str] | None = None,
+        records: bool = False,
+    ) -> Iterator[tuple[Any, ...] | list[Any] | dict[str, Any] | ParseIssue]:
+        # Workers return rows ready to be yielded: record dicts with records=True
+        # (built in the worker, not in the parent), lists otherwise. Each chunk is
+        # numbered from 1 and, as every line gives exactly one item, the parent
+        # shifts the line numbers in place by the lines of the previous chunks:
+        # no counting pass over the file.
+        if reader == "vb":
+            # Block boundaries are only known by walking the descriptors.
+            LOGGER.debug("Parsing parallele non disponible pour le lecteur vb, lecture sequentielle.")
+            yield from self._iter_parsed_serial(input_path, encoding, continue_on_error, reader, raw, record_types)
+            return
+        newline = b"\n"
+        if reader == "fixed":
+            chunks = _split_fixed_chunks(input_path, workers, self._line_length)
+        elif reader == "mmap":
+            newline = self._byte_layout(encoding).newline
+            chunks = _split_newline_chunks(input_path, workers, newline=newline)
+        else:
+            splittable = _newline_splittable(encoding)
+            chunks = _split_newline_chunks(input_path, workers, newline=newline) if splittable else []
+        if len(chunks) <= 1:
+            LOGGER.debug("Parsing parallele non applicable, lecture sequentielle de %s.", input_path)
+            yield from self._iter_parsed_serial(input_path, encoding, continue_on_error, reader, raw, record_types)
+            return
 
-                if current_order < last_order:
-                    issues.append(
-                        ParseIssue(
-                            line_number=line_number,
-                            message=(
-                                "Ordre de structure non respecte dans le bloc facture: "
-                                f"{record_type} hors sequence attendue."
-                            ),
-                            raw_line="",
+        contract_payload = self.contract.model_dump_json()
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_parse_worker,
+            initargs=(contract_payload, self.decimal_mode, self.fields),
+        )
+        line_key = "line_number" if records else 1
+        try:
+            pending: deque = deque()
+            next_chunk = 0
+            offset = 0
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < workers * 2:
+                    start, end = chunks[next_chunk]
+                    pending.append(
+                        pool.submit(
+                            _parse_chunk,
+                            input_path,
+                            encoding,
+                            start,
+                            end,
+                            continue_on_error,
+                            reader,
+                            raw,
+                            record_types,
+                            records,
                         )
                     )
-                else:
-                    last_order = current_order
+                    next_chunk += 1
 
-            if current_line is not None:
-                line_segments.append(current_line)
+                items = pending.popleft().result()
+                for item in items:
+                    if isinstance(item, ParseIssue):
+                        yield _renumbered_issue(item, offset) if offset else item
+                        if not continue_on_error:
+                            return
+                        continue
+                    if offset:
+                        item[line_key] += offset
+                    yield item
+                offset += len(items)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
 
-            self._check_occurrence(issues=issues, label="ENT", count=1, line_number=ent_line)
-            self._check_occurrence(
-                issues=issues,
-                label="ECH",
-                count=counts.get("ECH", 0),
-                line_number=ent_line,
-            )
-            self._check_occurrence(
-                issues=issues,
-                label="COM",
-                count=counts.get("COM", 0),
-                line_number=ent_line,
-            )
-            self._check_occurrence(
-                issues=issues,
-                label="REF(E)",
-                count=header_ref_count,
-                line_number=ent_line,
-            )
-            self._check_occurrence(
-                issues=issues,
-                label="ADR",
-                count=counts.get("ADR", 0),
-                line_number=ent_line,
-            )
-            self._check_occurrence(
-                issues=issues,
-                label="AD2",
-                count=counts.get("AD2", 0),
-                line_number=ent_line,
+    def iter_records(
+        self,
+        input_path: Path,
+        encoding: str = "latin-1",
+        continue_on_error: bool = False,
+        on_issue: Callable[[ParseIssue], None] | None = None,
+        workers: int = 1,
+        reader: str = "text",
+        lazy: bool = False,
+        record_types: Iterable[str] | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> Iterator[dict[str, Any] | RecordView]:
+        compiled = self._compiled
+        if not lazy:
+            yield from self._iter_rows(
+                input_path,
+                encoding,
+                continue_on_error,
+                on_issue,
+                workers,
+                reader,
+                record_types=record_types,
+                stats=stats,
+                records=True,
             )
-            self._check_occurrence(
-                issues=issues,
-                label="LIG",
-                count=counts.get("LIG", 0),
-                line_number=ent_line,
+            return
+
+        # lazy=True yields RecordView objects: only dispatch runs per line and
+        # each field is decoded when a consumer first reads it.
+        if reader in _BYTE_READERS:
+            plans = self._byte_layout(encoding).plans
+        else:
+            plans = self._text_plans(ebcdic_code_page(encoding) or encoding)
+        rows = self._iter_rows(
+            input_path,
+            encoding,
+            continue_on_error,
+            on_issue,
+            workers,
+            reader,
+            raw=True,
+            record_types=record_types,
+            stats=stats,
+        )
+        for record_type, line_number, line in rows:
+            yield RecordView(compiled[record_type], plans[record_type], line, line_number)
+
+    def _iter_rows(
+        self,
+        input_path: Path,
+        encoding: str,
+        continue_on_error: bool,
+        on_issue: Callable[[ParseIssue], None] | None,
+        workers: int,
+        reader: str,
+        raw: bool = False,
+        record_types: Iterable[str] | None = None,
+        stats: dict[str, Any] | None = None,
+        records: bool = False,
+    ) -> Iterator[Any]:
+        # Streaming variant of parse_file: records are yielded as the file is read,
+        # line issues and structure issues (per ENT block) are handed to on_issue.
+        # With workers > 1, newline-aligned chunks are parsed in a process pool and
+        # merged back in line order before structure validation. reader="mmap" maps
+        # the file and slices fields from the raw bytes (single-byte encodings).
+        # With record_types, other lines are dispatched but never decoded; they are
+        # still fed to the structure validator, so its issues are those of the file.
+        # reader="fixed" maps RECFM=FB datasets (records of line_length bytes, no
+        # line breaks, COMP-3/COMP fields decoded from bytes); its parallel chunks
+        # are cut on record boundaries by offset arithmetic. reader="vb" walks the
+        # BDW/RDW descriptors of RECFM=VB datasets (sequential only).
+        # When a stats dict is given, it receives the line count, the issue
+        # counts and the time spent in structure validation once the file is read.
+        # records=True yields record dicts instead of (record_type, line_number,
+        # ...) rows; with workers > 1 the workers build them.
+        if reader not in SUPPORTED_READERS:
+            allowed = ", ".join(sorted(SUPPORTED_READERS))
+            raise ValueError(f"Lecteur non supporte '{reader}'. Valeurs autorisees: {allowed}")
+        if reader == "text" and self._has_binary_fields and codecs.lookup(encoding).name != "iso8859-1":
+            raise ValueError(
+                "Champs binaires (COMP-3/COMP) dans le contrat: lecteur text possible uniquement en latin-1, "
+                "utiliser le lecteur fixed ou mmap."
             )
-            self._check_occurrence(
-                issues=issues,
-                label="PIE",
-                count=counts.get("PIE", 0),
-                line_number=ent_line,
+        wanted = self._validate_record_types(record_types)
+        validator = StructureValidator(self.contract, on_issue=on_issue or (lambda issue: None))
+        issue_count = 0
+        line_count = 0
+        validation_seconds = 0.0
+        timed = stats is not None
+
+        compiled = self._compiled
+        if workers > 1:
+            parsed = self._iter_parsed_parallel(
+                input_path,
+                encoding,
+                continue_on_error,
+                workers,
+                reader,
+                raw,
+                wanted,
+                records,
             )
+        else:
+            parsed = self._iter_parsed_serial(input_path, encoding, continue_on_error, reader, raw, wanted)
+        try:
+            for item in parsed:
+                line_count += 1
+                if isinstance(item, ParseIssue):
+                    issue_count += 1
+                    if on_issue is not None:
+                        on_issue(item)
+                    if not continue_on_error:
+                        raise ParsingError(item.message)
+                    continue
+                if type(item) is dict:
+                    record_type = item["record_type"]
+                    line_number = item["line_number"]
+                else:
+                    record_type = item[0]
+                    line_number = item[1]
+                if timed:
+                    started = time.perf_counter()
+                    validator.feed(record_type, line_number)
+                    validation_seconds += time.perf_counter() - started
+                else:
+                    validator.feed(record_type, line_number)
+                if wanted is None or record_type in wanted:
+                    if records and type(item) is not dict:
+                        item = dict(zip(compiled[record_type].keys, item))
+                    yield item
+        finally:
+            parsed.close()
 
-            for segment in line_segments:
-                self._check_occurrence(
-                    issues=issues,
-                    label="REF(L)",
-                    count=int(segment["ref"]),
-                    line_number=int(segment["line_number"]),
-                )
-                self._check_occurrence(
-                    issues=issues,
-                    label="LEC",
-                    count=int(segment["lec"]),
-                    line_number=int(segment["line_number"]),
-                )
+        if issue_count:
+            LOGGER.warning("Parsing termine avec %s anomalie(s).", issue_count)
 
-        return issues
+        started = time.perf_counter()
+        validator.finish()
+        if stats is not None:
+            stats.update(
+                lines=line_count,
+                line_issues=issue_count,
+                structure_issues=validator.issue_count,
+                validation_seconds=validation_seconds + time.perf_counter() - started,
+            )
+        if validator.issue_count:
+            LOGGER.warning("Validation de structure terminee avec %s anomalie(s).", validator.issue_count)
+            if self.contract.strict_structure_validation and not continue_on_error:
+                raise ParsingError(validator.first_issue.message)
 
     def parse_file(
         self,
         input_path: Path,
         encoding: str = "latin-1",
         continue_on_error: bool = False,
-    ) -> tuple[list[dict[str, Any]], list[ParseIssue]]:
-        records: list[dict[str, Any]] = []
-        issues: list[ParseIssue] = []
+        workers: int = 1,
+        reader: str = "text",
+        lazy: bool = False,
+        record_types: Iterable[str] | None = None,
+        max_issue_samples: int | None = None,
+        issues_path: Path | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> tuple[list[dict[str, Any] | RecordView], IssueLog]:
+        # Issues are collected in an IssueLog: max_issue_samples bounds the raw
+        # lines held in memory, issues_path receives every issue as JSONL.
+        with IssueLog(max_samples=max_issue_samples, output_path=issues_path) as issues:
+            records = list(
+                self.iter_records(
+                    input_path=input_path,
+                    encoding=encoding,
+                    continue_on_error=continue_on_error,
+                    on_issue=issues.add,
+                    workers=workers,
+                    reader=reader,
+                    lazy=lazy,
+                    record_types=record_types,
+                    stats=stats,
+                )
+            )
+        return records, issues
 
-        with input_path.open("r", encoding=encoding, newline="") as handle:
-            for line_number, raw_line in enumerate(handle, start=1):
-                line = raw_line.rstrip("\r\n")
-                try:
-                    records.append(self.parse_line(line=line, line_number=line_number))
-                except ParsingError as error:
-                    issue = ParseIssue(line_number=line_number, message=str(error), raw_line=line)
-                    issues.append(issue)
-                    if not continue_on_error:
-                        raise
+    def parse_file_columnar(
+        self,
+        input_path: Path,
+        encoding: str = "latin-1",
+        continue_on_error: bool = False,
+        workers: int = 1,
+        reader: str = "text",
+        record_types: Iterable[str] | None = None,
+        max_issue_samples: int | None = None,
+        issues_path: Path | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> tuple[dict[str, ColumnBatch], IssueLog]:
+        # Same dispatch and validation as parse_file, but the dispatched lines go
+        # straight into one ColumnBatch per record type (in contract order), which
+        # decodes them a batch at a time without building per-line dicts.
+        from .columnar import ColumnBatchBuilder
 
-        if issues:
-            LOGGER.warning("Parsing termine avec %s anomalie(s).", len(issues))
+        line_encoding = encoding if reader in _BYTE_READERS else None
+        builders: dict[str, ColumnBatchBuilder] = {}
+        with IssueLog(max_samples=max_issue_samples, output_path=issues_path) as issues:
+            rows = self._iter_rows(
+                input_path,
+                encoding,
+                continue_on_error,
+                issues.add,
+                workers,
+                reader,
+                raw=True,
+                record_types=record_types,
+                stats=stats,
+            )
+            for record_type, line_number, line in rows:
+                builder = builders.get(record_type)
+                if builder is None:
+                    builder = builders[record_type] = ColumnBatchBuilder(
+                        record_type,
+                        self._compiled[record_type].fields,
+                        line_encoding,
+                        source_encoding=ebcdic_code_page(encoding) or encoding,
+                    )
+                builder.append(line_number, line)
+        batches = {name: builders[name].build() for name in self._compiled if name in builders}
+        return batches, issues
 
-        structure_issues = self._validate_structure(records)
-        if structure_issues:
-            issues.extend(structure_issues)
-            LOGGER.warning("Validation de structure terminee avec %s anomalie(s).", len(structure_issues))
-            if self.contract.strict_structure_validation and not continue_on_error:
-                raise ParsingError(structure_issues[0].message)
 
-        return records, issues
+def _newline_splittable(encoding: str) -> bool:
+    # Chunks are cut on raw b"\n" bytes, which is only safe when the encoding
+    # keeps line breaks as single ASCII bytes (latin-1, cp1252, utf-8...).
+    try:
+        return "\r\n".encode(encoding) == b"\r\n"
+    except (LookupError, UnicodeError):
+        return False
 
 
-def save_jsonl(records: list[dict[str, Any]], output_path: Path) -> None:
+def _split_newline_chunks(input_path: Path, workers: int, newline: bytes = b"\n") -> list[tuple[int, int]]:
+    size = input_path.stat().st_size
+    if size == 0:
+        return []
+    chunk_bytes = min(max(size // max(workers, 1), _PARALLEL_MIN_CHUNK_BYTES), _PARALLEL_MAX_CHUNK_BYTES)
+
+    chunks: list[tuple[int, int]] = []
+    start = 0
+    with input_path.open("rb") as handle:
+        while start < size:
+            target = start + chunk_bytes
+            if target >= size:
+                chunks.append((start, size))
+                break
+            handle.seek(target)
+            end = size
+            position = target
+            while position < size:
+                probe = handle.read(_PARALLEL_BOUNDARY_PROBE_BYTES)
+                found = probe.find(newline)
+                if found != -1:
+                    end = position + found + 1
+                    break
+                position += len(probe)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def _split_fixed_chunks(input_path: Path, workers: int, record_length: int) -> list[tuple[int, int]]:
+    # Same chunk sizes as the newline split, rounded to whole records.
+    size = input_path.stat().st_size
+    if size == 0:
+        return []
+    chunk_bytes = min(max(size // max(workers, 1), _PARALLEL_MIN_CHUNK_BYTES), _PARALLEL_MAX_CHUNK_BYTES)
+    step = max(chunk_bytes // record_length, 1) * record_length
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def _read_chunk(input_path: Path, start: int, end: int) -> bytes:
+    with input_path.open("rb") as handle:
+        handle.seek(start)
+        return handle.read(end - start)
+
+
+def _renumbered_issue(issue: ParseIssue, offset: int) -> ParseIssue:
+    # Chunk issues are numbered from the chunk start; the message repeats the
+    # number after "Ligne " (see _line_issue).
+    line_number = issue.line_number + offset
+    message = issue.message
+    prefix = f"Ligne {issue.line_number}:"
+    if message.startswith(prefix):
+        message = f"Ligne {line_number}:{message[len(prefix):]}"
+    return ParseIssue(line_number=line_number, message=message, raw_line=issue.raw_line)
+
+
+_WORKER_PARSER: FixedWidthParser | None = None
+
+
+def _init_parse_worker(
+    contract_payload: str,
+    decimal_mode: str = "decimal",
+    fields: dict[str, list[str]] | None = None,
+) -> None:
+    global _WORKER_PARSER
+    _WORKER_PARSER = FixedWidthParser(
+        ContractSpec.model_validate_json(contract_payload),
+        decimal_mode=decimal_mode,
+        fields=fields,
+    )
+
+
+def _parse_chunk(
+    input_path: Path,
+    encoding: str,
+    start: int,
+    end: int,
+    continue_on_error: bool,
+    reader: str = "text",
+    raw: bool = False,
+    record_types: frozenset[str] | None = None,
+    records: bool = False,
+) -> list[list[Any] | dict[str, Any] | ParseIssue]:
+    # Lines are numbered from 1 within the chunk. Rows come back ready for the
+    # parent to yield: record dicts with records=True, else mutable lists, so the
+    # parent only shifts their line number in place.
+    assert _WORKER_PARSER is not None
+    data = _read_chunk(input_path, start, end)
+    if reader in _BYTE_READERS:
+        iter_buffer = _WORKER_PARSER._iter_parsed_fixed if reader == "fixed" else _WORKER_PARSER._iter_parsed_buffer
+        parsed = iter_buffer(
+            data,
+            _WORKER_PARSER._byte_layout(encoding),
+            continue_on_error=continue_on_error,
+            raw=raw,
+            record_types=record_types,
+        )
+    else:
+        parsed = _WORKER_PARSER._iter_parsed_lines(
+            io.TextIOWrapper(io.BytesIO(data), encoding=encoding, newline=""),
+            continue_on_error=continue_on_error,
+            raw=raw,
+            record_types=record_types,
+            encoding=encoding,
+        )
+    if records:
+        compiled = _WORKER_PARSER._compiled
+        return [item if isinstance(item, ParseIssue) else dict(zip(compiled[item[0]].keys, item)) for item in parsed]
+    return [item if isinstance(item, ParseIssue) else list(item) for item in parsed]
+
+
+def save_jsonl(records: Iterable[Mapping[str, Any]], output_path: Path) -> int:
+    # Written next to the target then renamed, so a stream that fails midway
+    # never leaves a truncated JSONL behind.
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as handle:
-        for record in records:
-            handle.write(json.dumps(record, ensure_ascii=False, default=str))
-            handle.write("\n")
+    temp_path = output_path.with_name(f"{output_path.name}.tmp")
+    count = 0
+    try:
+        with temp_path.open("w", encoding="utf-8") as handle:
+            for record in records:
+                if not isinstance(record, dict):
+                    record = dict(record)
+                handle.write(json.dumps(record, ensure_ascii=False, default=str))
+                handle.write("\n")
+                count += 1
+        temp_path.replace(output_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return count
 
 
 def load_jsonl(input_path: Path) -> list[dict[str, Any]]:
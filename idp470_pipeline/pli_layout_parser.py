@@ -4,7 +4,7 @@ import re
 from dataclasses import dataclass
 from pathlib import Path
 
-from .models import ContractSpec, FieldSpec, FieldType, RecordSpec, SelectorSpec
+from .models import ContractSpec, FieldSpec, FieldType, FieldUsage, RecordSpec, SelectorSpec, SignPosition
 
 
 _DCL_STRUCT_RE = re.compile(r"\bDCL\s+0?1\s+([A-Z0-9_]+)\b", re.IGNORECASE)
@@ -31,6 +31,8 @@ class _ParsedType:
     length: int
     field_type: FieldType
     decimals: int | None
+    usage: FieldUsage = FieldUsage.DISPLAY
+    sign_position: SignPosition = SignPosition.TRAILING
 
 
 def _normalize_source_line(raw_line: str) -> str:
@@ -41,8 +43,8 @@ def _normalize_source_line(raw_line: str) -> str:
     return line.rstrip()
 
 
-def _parse_pic_pattern(pattern: str) -> tuple[int, int]:
-    """Returns (physical_length, decimal_digits)."""
+def _parse_pic_pattern(pattern: str) -> tuple[int, int, SignPosition | None]:
+    """Returns (physical_length, decimal_digits, overpunched_sign_position)."""
     expanded: list[str] = []
     source = pattern.replace(" ", "")
     index = 0
@@ -64,18 +66,29 @@ def _parse_pic_pattern(pattern: str) -> tuple[int, int]:
     physical_length = 0
     decimal_digits = 0
     decimal_part = False
+    overpunches: list[int] = []
 
     for token in expanded:
         upper = token.upper()
         if upper == "V":
             decimal_part = True
             continue
-        if upper in {"9", "Z", "A", "X", "B", ".", ",", "-", "+", "/"}:
+        # T, I and R are digit positions carrying an overpunched sign.
+        if upper in {"T", "I", "R"}:
+            overpunches.append(physical_length)
+        if upper in {"9", "Z", "A", "X", "B", ".", ",", "-", "+", "/", "T", "I", "R"}:
             physical_length += 1
-            if decimal_part and upper in {"9", "Z"}:
+            if decimal_part and upper in {"9", "Z", "T", "I", "R"}:
                 decimal_digits += 1
 
-    return physical_length, decimal_digits
+    # Only a single overpunch at either end of the field is decoded; one in
+    # the middle (or several) leaves the field as DISPLAY text.
+    sign_position = None
+    if overpunches == [physical_length - 1]:
+        sign_position = SignPosition.TRAILING
+    elif overpunches == [0]:
+        sign_position = SignPosition.LEADING
+    return physical_length, decimal_digits, sign_position
 
 
 def _parse_decl_type(remainder: str) -> _ParsedType | None:
@@ -89,9 +102,17 @@ def _parse_decl_type(remainder: str) -> _ParsedType | None:
 
     pic_match = _PIC_RE.search(remainder)
     if pic_match:
-        length, decimals = _parse_pic_pattern(pic_match.group(1))
+        length, decimals, sign_position = _parse_pic_pattern(pic_match.group(1))
         field_type = FieldType.DECIMAL if decimals > 0 else FieldType.INTEGER
-        return _ParsedType(length=length, field_type=field_type, decimals=decimals or None)
+        if sign_position is None:
+            return _ParsedType(length=length, field_type=field_type, decimals=decimals or None)
+        return _ParsedType(
+            length=length,
+            field_type=field_type,
+            decimals=decimals or None,
+            usage=FieldUsage.ZONED,
+            sign_position=sign_position,
+        )
 
     dec_match = _DEC_RE.search(remainder)
     if dec_match:
@@ -149,6 +170,9 @@ def _clone_template_fields(
                 length=field.length,
                 type=field.type,
                 decimals=field.decimals,
+                usage=field.usage,
+                signed=field.signed,
+                sign_position=field.sign_position,
                 description=field.description,
             )
         )
@@ -170,6 +194,9 @@ def _normalize_group_templates(group_fields: dict[str, list[FieldSpec]]) -> dict
                 length=field.length,
                 type=field.type,
                 decimals=field.decimals,
+                usage=field.usage,
+                signed=field.signed,
+                sign_position=field.sign_position,
                 description=field.description,
             )
             for field in ordered
@@ -258,6 +285,8 @@ def _build_record_specs_from_text(
                     length=inline_type.length,
                     type=inline_type.field_type,
                     decimals=inline_type.decimals,
+                    usage=inline_type.usage,
+                    sign_position=inline_type.sign_position,
                     description=None,
                 )
                 current_fields.append(header_field)
@@ -287,6 +316,8 @@ def _build_record_specs_from_text(
                     length=inline_type.length,
                     type=inline_type.field_type,
                     decimals=inline_type.decimals,
+                    usage=inline_type.usage,
+                    sign_position=inline_type.sign_position,
                     description=None,
                 )
                 current_fields.append(header_field)
@@ -373,6 +404,8 @@ def _build_record_specs_from_text(
             length=parsed_type.length,
             type=parsed_type.field_type,
             decimals=parsed_type.decimals,
+            usage=parsed_type.usage,
+            sign_position=parsed_type.sign_position,
             description=field_description,
         )
         current_fields.append(new_field)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+LOGGER = logging.getLogger(__name__)
+
+RUN_METRICS_FILE_NAME = "run_metrics.json"
+
+
+def peak_rss_bytes() -> int | None:
+    # High-water mark of the current process RSS since it started (ru_maxrss is
+    # in KiB on Linux, in bytes on macOS). None where getrusage is missing.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes() -> int | None:
+    # Resident set size right now (Linux /proc only).
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            resident_pages = int(handle.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _cpu_seconds() -> float:
+    # User + system time of this process and of its reaped children (the parse
+    # and export process pools are shut down inside their stage). It is
+    # process-wide: jobs running concurrently in the same web worker add up.
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def count_record_types(records: Iterable[Mapping[str, Any]]) -> dict[str, int]:
+    return dict(Counter(str(record.get("record_type", "")) for record in records))
+
+
+# Measurements of one pipeline stage. peak_rss_bytes is the process high-water
+# mark when the stage ended: it grows during the stage that needed the memory.
+# lines / records_by_type are filled by the stage itself when it has them.
+@dataclass
+class StageMetrics:
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: int | None = None
+    rss_bytes: int | None = None
+    lines: int | None = None
+    records_by_type: dict[str, int] = field(default_factory=dict)
+    details: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def lines_per_second(self) -> float | None:
+        if self.lines is None or self.wall_seconds <= 0:
+            return None
+        return self.lines / self.wall_seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "name": self.name,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "rss_bytes": self.rss_bytes,
+        }
+        if self.lines is not None:
+            payload["lines"] = self.lines
+            rate = self.lines_per_second
+            payload["lines_per_second"] = round(rate, 1) if rate is not None else None
+        if self.records_by_type:
+            payload["records"] = sum(self.records_by_type.values())
+            payload["records_by_type"] = dict(sorted(self.records_by_type.items()))
+        if self.details:
+            payload.update(self.details)
+        return payload
+
+
+def fill_parse_stage(
+    stage: StageMetrics,
+    stats: Mapping[str, Any],
+    records: list[Mapping[str, Any]],
+    issue_count: int,
+) -> None:
+    # stats is the dict filled by FixedWidthParser.parse_file(stats=...); a
+    # cache hit leaves it without line count or validation time.
+    stage.lines = stats.get("lines", len(records) + issue_count)
+    stage.records_by_type = count_record_types(records)
+    stage.details.update(issues=issue_count, cache_hit=bool(stats.get("cache_hit")))
+
+
+def validation_stage(stats: Mapping[str, Any], parent: str = "parsing") -> StageMetrics | None:
+    # Structure validation runs inline while the file is parsed: its time is
+    # part of the parent stage and is reported on its own for comparison. It
+    # is single-threaded Python in the main process, so CPU ~ wall time.
+    seconds = stats.get("validation_seconds")
+    if seconds is None:
+        return None
+    return StageMetrics(
+        "structure_validation",
+        wall_seconds=seconds,
+        cpu_seconds=seconds,
+        lines=stats.get("lines"),
+        details={"included_in": parent, "issues": stats.get("structure_issues", 0)},
+    )
+
+
+@contextmanager
+def measure_stage(name: str) -> Iterator[StageMetrics]:
+    # Times the block in the current process; the yielded StageMetrics can be
+    # completed (lines, records_by_type, details) from inside the block.
+    metrics = StageMetrics(name)
+    wall_start = time.perf_counter()
+    cpu_start = _cpu_seconds()
+    try:
+        yield metrics
+    finally:
+        metrics.wall_seconds = time.perf_counter() - wall_start
+        metrics.cpu_seconds = _cpu_seconds() - cpu_start
+        metrics.peak_rss_bytes = peak_rss_bytes()
+        metrics.rss_bytes = current_rss_bytes()
+
+
+# Per-stage metrics of one run, written as run_metrics.json by `run` and kept
+# in JobState.run_metrics by the web backend:
+#
+#     metrics = RunMetrics()
+#     with metrics.stage("parsing") as stage:
+#         records, issues = parser.parse_file(...)
+#         stage.records_by_type = count_record_types(records)
+#     metrics.save(output_dir / RUN_METRICS_FILE_NAME)
+#
+# Stages measured elsewhere (exporters in worker processes, structure
+# validation timed inside the parser) are appended with add().
+class RunMetrics:
+    def __init__(self) -> None:
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stages: list[StageMetrics] = []
+        self._wall_start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        with measure_stage(name) as metrics:
+            yield metrics
+        self.add(metrics)
+
+    def add(self, metrics: StageMetrics | None) -> None:
+        if metrics is None:
+            return
+        self.stages.append(metrics)
+        LOGGER.info(
+            "Etape %s: %.3f s (CPU %.3f s)%s",
+            metrics.name,
+            metrics.wall_seconds,
+            metrics.cpu_seconds,
+            f", {metrics.lines_per_second:.0f} lignes/s" if metrics.lines_per_second is not None else "",
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "total_wall_seconds": round(time.perf_counter() - self._wall_start, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": [stage.as_dict() for stage in self.stages],
+        }
+
+    def save(self, output_path: Path) -> dict[str, Any]:
+        payload = self.as_dict()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        return payload
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from idp470_pipeline.fixed_point import FixedPoint
+from idp470_pipeline.models import ContractSpec, FieldSpec, FieldType, FieldUsage, RecordSpec, SelectorSpec
+from idp470_pipeline.parsing_engine import FixedWidthParser, _binary_coercer
+
+
+def _packed(length: int = 3, decimals: int | None = 2) -> FieldSpec:
+    field_type = FieldType.DECIMAL if decimals is not None else FieldType.INTEGER
+    return FieldSpec(
+        name="MT",
+        start=1,
+        length=length,
+        type=field_type,
+        decimals=decimals,
+        usage=FieldUsage.PACKED,
+        signed=True,
+    )
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        (b"\x12\x34\x5c", Decimal("123.45")),
+        (b"\x12\x34\x5f", Decimal("123.45")),
+        (b"\x12\x34\x5a", Decimal("123.45")),
+        (b"\x12\x34\x5e", Decimal("123.45")),
+        (b"\x12\x34\x5d", Decimal("-123.45")),
+        (b"\x12\x34\x5b", Decimal("-123.45")),
+        (b"\x00\x00\x0d", Decimal("0")),
+        (b"\x00\x00\x1c", Decimal("0.01")),
+        (b"\x99\x99\x9d", Decimal("-999.99")),
+    ],
+)
+def test_packed_sign_nibbles(raw: bytes, expected: Decimal) -> None:
+    value = _binary_coercer(_packed(), "decimal", b" ")(raw)
+    assert value == expected
+    assert not value.is_signed() or expected < 0
+
+
+def test_packed_negative_zero_is_zero_in_fixed_mode() -> None:
+    value = _binary_coercer(_packed(), "fixed", b" ")(b"\x00\x00\x0d")
+    assert value == FixedPoint(0, 2)
+    assert str(value) == "0"
+
+
+def test_packed_blank_and_invalid_values() -> None:
+    coerce = _binary_coercer(_packed(), "decimal", b"\x40")
+    assert coerce(b"\x40\x40\x40") is None
+    assert coerce(b"\x00\x00\x00") is None
+    assert coerce(b"\x12\x34\x57") == "123457"
+    assert coerce(b"\x1a\x34\x5c") == "1A345C"
+
+
+def test_packed_integer_and_fixed_point() -> None:
+    assert _binary_coercer(_packed(decimals=None), "decimal", b" ")(b"\x01\x23\x4d") == -1234
+    assert _binary_coercer(_packed(), "fixed", b" ")(b"\x01\x23\x4d") == FixedPoint(-1234, 2)
+
+
+@pytest.mark.parametrize(
+    ("signed", "raw", "expected"),
+    [
+        (True, b"\xff\xfe", -2),
+        (False, b"\xff\xfe", 65534),
+        (True, b"\x00\x00\x01\x00", 256),
+        (True, b"\x80\x00\x00\x00", -(2**31)),
+    ],
+)
+def test_comp_binary(signed: bool, raw: bytes, expected: int) -> None:
+    field = FieldSpec(
+        name="N",
+        start=1,
+        length=len(raw),
+        type=FieldType.INTEGER,
+        usage=FieldUsage.BINARY,
+        signed=signed,
+    )
+    assert _binary_coercer(field, "decimal", b" ")(raw) == expected
+
+
+def test_comp_binary_decimal_scale() -> None:
+    field = FieldSpec(name="N", start=1, length=4, type=FieldType.DECIMAL, decimals=3, usage=FieldUsage.BINARY, signed=True)
+    assert _binary_coercer(field, "decimal", b" ")((-12345).to_bytes(4, "big", signed=True)) == Decimal("-12.345")
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        (bytes.fromhex("41100000"), 1.0),
+        (bytes.fromhex("C1100000"), -1.0),
+        (bytes.fromhex("42640000"), 100.0),
+        (bytes.fromhex("40800000"), 0.5),
+        (bytes.fromhex("00000000"), 0.0),
+        (bytes.fromhex("4110000000000000"), 1.0),
+        (bytes.fromhex("C276800000000000"), -118.5),
+    ],
+)
+def test_ibm_hexadecimal_floats(raw: bytes, expected: float) -> None:
+    field = FieldSpec(name="F", start=1, length=len(raw), type=FieldType.DECIMAL, decimals=0, usage=FieldUsage.FLOAT)
+    assert _binary_coercer(field, "decimal", b" ")(raw) == expected
+
+
+def _binary_contract() -> ContractSpec:
+    return ContractSpec(
+        source_program="TEST",
+        line_length=12,
+        record_types=[
+            RecordSpec(
+                name="LIG",
+                selector=SelectorSpec(start=1, length=3, value="LIG"),
+                fields=[
+                    FieldSpec(name="TYPE", start=1, length=3),
+                    FieldSpec(name="CODE", start=4, length=3, type=FieldType.INTEGER),
+                    _packed().model_copy(update={"start": 7}),
+                    FieldSpec(
+                        name="QTE",
+                        start=10,
+                        length=2,
+                        type=FieldType.INTEGER,
+                        usage=FieldUsage.BINARY,
+                        signed=True,
+                    ),
+                    FieldSpec(name="FIN", start=12, length=1),
+                ],
+            )
+        ],
+    )
+
+
+@pytest.mark.parametrize("code_page", ["cp037", "cp297", "cp1147"])
+def test_fixed_reader_decodes_binary_fields(tmp_path: Path, code_page: str) -> None:
+    rows = [("001", b"\x12\x34\x5c", 3, Decimal("123.45")), ("002", b"\x00\x10\x0d", -7, Decimal("-1.00"))]
+    payload = b"".join(
+        "LIG".encode(code_page) + code.encode(code_page) + packed + quantity.to_bytes(2, "big", signed=True) + "X".encode(code_page)
+        for code, packed, quantity, _ in rows
+    )
+    path = tmp_path / "fb.dat"
+    path.write_bytes(payload)
+    records, issues = FixedWidthParser(_binary_contract()).parse_file(path, encoding=code_page, reader="fixed")
+    assert issues.total == 0
+    assert [(record["CODE"], record["MT"], record["QTE"], record["FIN"]) for record in records] == [
+        (int(code), amount, quantity, "X") for code, _, quantity, amount in rows
+    ]
+
+
+def test_text_reader_rejects_binary_fields_outside_latin1(tmp_path: Path) -> None:
+    path = tmp_path / "fb.dat"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        FixedWidthParser(_binary_contract()).parse_file(path, encoding="cp037")
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import pickle
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+from idp470_pipeline.fixed_point import FixedPoint
+from idp470_pipeline.parsing_engine import FixedWidthParser
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SAMPLE = PROJECT_ROOT / "facdemat_test_3_factures_multi_lignes.txt"
+
+
+@pytest.mark.parametrize(
+    ("units", "scale", "text"),
+    [
+        (12345, 2, "123.45"),
+        (12340, 2, "123.4"),
+        (12300, 2, "123"),
+        (-5, 3, "-0.005"),
+        (0, 2, "0"),
+        (-7, 0, "-7"),
+    ],
+)
+def test_str_matches_parsed_decimal(units: int, scale: int, text: str) -> None:
+    value = FixedPoint(units, scale)
+    assert str(value) == text
+    assert str(value.to_decimal()) == text
+    assert FixedPoint.from_decimal(value.to_decimal(), scale) == value
+
+
+def test_arithmetic_aligns_scales() -> None:
+    assert FixedPoint(150, 2) + FixedPoint(25, 1) == FixedPoint(400, 2)
+    assert FixedPoint(150, 2) - FixedPoint(25, 1) == FixedPoint(-100, 2)
+    assert FixedPoint(150, 2) + 3 == FixedPoint(450, 2)
+    assert 3 - FixedPoint(150, 2) == FixedPoint(150, 2)
+    assert sum([FixedPoint(10, 2), FixedPoint(20, 2)]) == FixedPoint(30, 2)
+    assert FixedPoint(150, 2) + Decimal("0.5") == Decimal("2.00")
+    assert -FixedPoint(150, 2) == FixedPoint(-150, 2)
+    assert abs(FixedPoint(-150, 2)) == FixedPoint(150, 2)
+    assert not FixedPoint(0, 2) and FixedPoint(1, 2)
+    assert float(FixedPoint(-150, 2)) == -1.5
+    assert int(FixedPoint(-199, 2)) == -1
+
+
+def test_comparisons_with_int_decimal_and_fixed_point() -> None:
+    value = FixedPoint(150, 2)
+    assert value == Decimal("1.5") and value == FixedPoint(15, 1)
+    assert FixedPoint(200, 2) == 2
+    assert value < 2 and value > 1 and value <= Decimal("1.50") and value >= FixedPoint(15, 1)
+    assert value < FixedPoint(151, 2) and not value > Decimal("1.5")
+    assert sorted([FixedPoint(3, 0), FixedPoint(-1, 1), FixedPoint(25, 1)]) == [
+        FixedPoint(-1, 1),
+        FixedPoint(25, 1),
+        FixedPoint(3, 0),
+    ]
+    assert value != "1.50"
+    with pytest.raises(TypeError):
+        value < "1.50"
+
+
+def test_hash_agrees_with_equality() -> None:
+    assert hash(FixedPoint(150, 2)) == hash(FixedPoint(15, 1)) == hash(Decimal("1.5"))
+    assert len({FixedPoint(200, 2), FixedPoint(2, 0), Decimal(2)}) == 1
+
+
+def test_total_format_and_pickle() -> None:
+    values = [FixedPoint(105, 2), None, FixedPoint(-3, 1), FixedPoint(2, 0)]
+    assert FixedPoint.total(values, 2) == FixedPoint(275, 2)
+    assert FixedPoint.total([], 2) == FixedPoint(0, 2)
+    assert f"{FixedPoint(5, 2):.3f}" == "0.050"
+    assert pickle.loads(pickle.dumps(FixedPoint(-42, 3))) == FixedPoint(-42, 3)
+
+
+def test_fixed_mode_parses_the_same_values_as_decimal_mode() -> None:
+    contract = extract_contract_deterministic(
+        source_path=PROJECT_ROOT / "IDP470RA.pli",
+        source_program="IDP470RA",
+        spec_pdf_path=None,
+    )
+    decimal_records, _ = FixedWidthParser(contract).parse_file(SAMPLE, continue_on_error=True)
+    fixed_records, _ = FixedWidthParser(contract, decimal_mode="fixed").parse_file(SAMPLE, continue_on_error=True)
+    assert fixed_records == decimal_records
+    fixed_values = [value for record in fixed_records for value in record.values() if isinstance(value, FixedPoint)]
+    assert fixed_values
+    assert [str(value) for record in fixed_records for value in record.values()] == [
+        str(value) for record in decimal_records for value in record.values()
+    ]
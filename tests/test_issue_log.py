@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from idp470_pipeline.parsing_engine import IssueLog, ParseIssue
+
+
+def _issue(line_number: int, kind: str = "longueur") -> ParseIssue:
+    return ParseIssue(line_number=line_number, message=f"Ligne {line_number}: {kind}", raw_line=f"raw {line_number}")
+
+
+def test_samples_are_bounded_but_counts_are_complete(tmp_path: Path) -> None:
+    path = tmp_path / "issues.jsonl"
+    with IssueLog(max_samples=2, output_path=path) as issues:
+        for line_number in range(1, 6):
+            issues.add(_issue(line_number, "longueur" if line_number % 2 else "type"))
+    assert [issue.line_number for issue in issues] == [1, 2]
+    assert len(issues) == 5 and issues.truncated
+    assert issues.summary() == {"total": 5, "samples": 2, "by_class": {"Ligne #: longueur": 3, "Ligne #: type": 2}}
+    written = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [item["line_number"] for item in written] == [1, 2, 3, 4, 5]
+
+
+def test_unbounded_log_keeps_every_sample() -> None:
+    issues = IssueLog()
+    for line_number in range(3):
+        issues.add(_issue(line_number))
+    assert len(issues.samples) == 3 and not issues.truncated
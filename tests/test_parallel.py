@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+from idp470_pipeline.models import ContractSpec
+from idp470_pipeline.parsing_engine import FixedWidthParser
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SAMPLE = PROJECT_ROOT / "facdemat_test_3_factures_multi_lignes.txt"
+# Above 2 x _PARALLEL_MIN_CHUNK_BYTES, so two workers get several chunks.
+TARGET_BYTES = 3 * 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def contract() -> ContractSpec:
+    return extract_contract_deterministic(
+        source_path=PROJECT_ROOT / "IDP470RA.pli",
+        source_program="IDP470RA",
+        spec_pdf_path=None,
+    )
+
+
+@pytest.fixture(scope="module")
+def lines() -> list[str]:
+    # The sample repeated, with an unknown record type every 997 lines so that
+    # every chunk reports issues with their file line numbers.
+    sample = SAMPLE.read_text(encoding="latin-1").splitlines()
+    repeated = sample * (TARGET_BYTES // sum(len(line) + 1 for line in sample) + 1)
+    return [f"ZZZ{line[3:]}" if index % 997 == 500 else line for index, line in enumerate(repeated)]
+
+
+def _write(tmp_path: Path, lines: list[str], reader: str) -> Path:
+    path = tmp_path / f"input_{reader}.dat"
+    if reader == "fixed":
+        path.write_bytes("".join(lines).encode("cp037"))
+    else:
+        path.write_bytes(("\n".join(lines) + "\n").encode("latin-1"))
+    return path
+
+
+def _issues(issues) -> list[tuple[int, str]]:
+    return [(issue.line_number, issue.message) for issue in issues.samples]
+
+
+@pytest.mark.parametrize("reader", ["text", "mmap", "fixed"])
+def test_parallel_parse_matches_serial(tmp_path: Path, contract: ContractSpec, lines: list[str], reader: str) -> None:
+    encoding = "cp037" if reader == "fixed" else "latin-1"
+    path = _write(tmp_path, lines, reader)
+    parser = FixedWidthParser(contract)
+    options = {"encoding": encoding, "continue_on_error": True, "reader": reader}
+    records, issues = parser.parse_file(path, **options)
+    stats: dict = {}
+    parallel_records, parallel_issues = parser.parse_file(path, workers=2, stats=stats, **options)
+    assert stats["lines"] == len(lines)
+    assert parallel_records == records
+    assert _issues(parallel_issues) == _issues(issues)
+    unknown = [line_number for line_number, message in _issues(issues) if "inconnu" in message]
+    assert unknown == list(range(501, len(lines) + 1, 997))
+
+    lazy_records, _ = parser.parse_file(path, workers=2, lazy=True, **options)
+    assert [dict(record) for record in lazy_records] == records
+
+    batches, _ = parser.parse_file_columnar(path, **options)
+    parallel_batches, _ = parser.parse_file_columnar(path, workers=2, **options)
+    assert {name: batch.to_records() for name, batch in parallel_batches.items()} == {
+        name: batch.to_records() for name, batch in batches.items()
+    }
+
+
+def test_parallel_parse_stops_on_the_first_issue(tmp_path: Path, contract: ContractSpec, lines: list[str]) -> None:
+    path = _write(tmp_path, lines[:2000] + ["ZZZ"] + lines[2000:], "text")
+    messages = []
+    for workers in (1, 2):
+        with pytest.raises(Exception) as error:
+            FixedWidthParser(contract).parse_file(path, workers=workers)
+        messages.append(str(error.value))
+    assert messages[0] == messages[1]
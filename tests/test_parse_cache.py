@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+from idp470_pipeline.models import ContractSpec
+from idp470_pipeline.parse_cache import ParseCache
+from idp470_pipeline.parsing_engine import FixedWidthParser
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SAMPLE = PROJECT_ROOT / "facdemat_test_3_factures_multi_lignes.txt"
+
+
+@pytest.fixture(scope="module")
+def contract() -> ContractSpec:
+    return extract_contract_deterministic(
+        source_path=PROJECT_ROOT / "IDP470RA.pli",
+        source_program="IDP470RA",
+        spec_pdf_path=None,
+    )
+
+
+@pytest.fixture
+def input_path(tmp_path: Path) -> Path:
+    # The sample followed by short lines: one parse issue each.
+    path = tmp_path / "input.txt"
+    lines = SAMPLE.read_text(encoding="latin-1").splitlines() + [f"XXX{index}" for index in range(5)]
+    path.write_text("\n".join(lines) + "\n", encoding="latin-1")
+    return path
+
+
+def _parse(cache: ParseCache, parser: FixedWidthParser, path: Path, **options) -> tuple:
+    stats: dict = {}
+    records, issues = cache.parse_file(parser, path, continue_on_error=True, stats=stats, **options)
+    return records, issues, stats.get("cache_hit", False)
+
+
+def test_hit_requires_the_same_input_contract_and_options(
+    tmp_path: Path,
+    contract: ContractSpec,
+    input_path: Path,
+) -> None:
+    cache = ParseCache(tmp_path / "cache")
+    parser = FixedWidthParser(contract)
+    records, issues, hit = _parse(cache, parser, input_path)
+    assert not hit
+    cached_records, cached_issues, hit = _parse(cache, parser, input_path)
+    assert hit
+    assert cached_records == records
+    assert cached_issues.samples == issues.samples and cached_issues.counts == issues.counts
+
+    assert not _parse(cache, FixedWidthParser(contract, decimal_mode="fixed"), input_path)[2]
+    assert not _parse(cache, parser, input_path, reader="mmap")[2]
+    assert not _parse(cache, parser, input_path, record_types=["ENT"])[2]
+    assert not _parse(cache, parser, input_path, max_issue_samples=2)[2]
+    assert not _parse(cache, FixedWidthParser(contract.model_copy(update={"source_program": "AUTRE"})), input_path)[2]
+    with input_path.open("a", encoding="latin-1") as handle:
+        handle.write("YYY\n")
+    assert not _parse(cache, parser, input_path)[2]
+    assert not _parse(cache, parser, input_path, reader="mmap")[2]
+    assert _parse(cache, parser, input_path, reader="mmap")[2]
+
+
+def test_truncated_issues_are_cached_with_full_counts(
+    tmp_path: Path,
+    contract: ContractSpec,
+    input_path: Path,
+) -> None:
+    cache = ParseCache(tmp_path / "cache")
+    parser = FixedWidthParser(contract)
+    first_path = tmp_path / "first" / "issues.jsonl"
+    records, issues, hit = _parse(cache, parser, input_path, max_issue_samples=2, issues_path=first_path)
+    assert not hit and issues.truncated
+
+    second_path = tmp_path / "second" / "issues.jsonl"
+    cached_records, cached_issues, hit = _parse(cache, parser, input_path, max_issue_samples=2, issues_path=second_path)
+    assert hit
+    assert cached_records == records
+    assert cached_issues.samples == issues.samples
+    assert (cached_issues.total, cached_issues.counts) == (issues.total, issues.counts)
+    assert cached_issues.truncated
+    assert second_path.read_bytes() == first_path.read_bytes()
+
+
+def test_truncated_entry_without_issue_file_is_reparsed_when_one_is_requested(
+    tmp_path: Path,
+    contract: ContractSpec,
+    input_path: Path,
+) -> None:
+    cache = ParseCache(tmp_path / "cache")
+    parser = FixedWidthParser(contract)
+    _, issues, _ = _parse(cache, parser, input_path, max_issue_samples=2)
+    assert issues.truncated and _parse(cache, parser, input_path, max_issue_samples=2)[2]
+
+    issues_path = tmp_path / "issues.jsonl"
+    _, _, hit = _parse(cache, parser, input_path, max_issue_samples=2, issues_path=issues_path)
+    assert not hit
+    assert len(issues_path.read_text(encoding="utf-8").splitlines()) == issues.total
+    assert _parse(cache, parser, input_path, max_issue_samples=2, issues_path=tmp_path / "again.jsonl")[2]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+from idp470_pipeline.models import ContractSpec
+from idp470_pipeline.parsing_engine import FixedWidthParser
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SAMPLE = PROJECT_ROOT / "facdemat_test_3_factures_multi_lignes.txt"
+
+
+@pytest.fixture(scope="module")
+def contract() -> ContractSpec:
+    return extract_contract_deterministic(
+        source_path=PROJECT_ROOT / "IDP470RA.pli",
+        source_program="IDP470RA",
+        spec_pdf_path=None,
+    )
+
+
+@pytest.fixture(scope="module")
+def text_records(contract: ContractSpec) -> list[dict[str, Any]]:
+    records, issues = FixedWidthParser(contract).parse_file(SAMPLE, continue_on_error=True)
+    assert records and not any(issue.raw_line for issue in issues.samples)
+    return records
+
+
+def _sample_lines() -> list[str]:
+    return SAMPLE.read_text(encoding="latin-1").splitlines()
+
+
+def test_mmap_reader_matches_text_reader(contract: ContractSpec, text_records: list[dict[str, Any]]) -> None:
+    records, _ = FixedWidthParser(contract).parse_file(SAMPLE, continue_on_error=True, reader="mmap")
+    assert records == text_records
+
+
+def test_mmap_reader_handles_crlf_and_missing_final_newline(
+    tmp_path: Path,
+    contract: ContractSpec,
+    text_records: list[dict[str, Any]],
+) -> None:
+    path = tmp_path / "crlf.txt"
+    path.write_bytes("\r\n".join(_sample_lines()).encode("latin-1"))
+    records, _ = FixedWidthParser(contract).parse_file(path, continue_on_error=True, reader="mmap")
+    assert records == text_records
+
+
+@pytest.mark.parametrize("reader", ["text", "mmap", "fixed"])
+@pytest.mark.parametrize("code_page", ["cp037", "cp297", "cp1147"])
+def test_ebcdic_readers_match_text_reader(
+    tmp_path: Path,
+    contract: ContractSpec,
+    text_records: list[dict[str, Any]],
+    code_page: str,
+    reader: str,
+) -> None:
+    separator = "" if reader == "fixed" else "\n"
+    path = tmp_path / f"sample_{code_page}.dat"
+    path.write_bytes(separator.join(_sample_lines()).encode(code_page))
+    records, _ = FixedWidthParser(contract).parse_file(
+        path,
+        encoding=code_page,
+        continue_on_error=True,
+        reader=reader,
+    )
+    assert records == text_records
+
+
+def _vb_dataset(records: list[bytes], per_block: int = 3) -> bytes:
+    blocks = []
+    for index in range(0, len(records), per_block):
+        body = b"".join((len(record) + 4).to_bytes(2, "big") + b"\x00\x00" + record for record in records[index : index + per_block])
+        blocks.append((len(body) + 4).to_bytes(2, "big") + b"\x00\x00" + body)
+    return b"".join(blocks)
+
+
+def test_vb_reader_matches_text_reader(
+    tmp_path: Path,
+    contract: ContractSpec,
+    text_records: list[dict[str, Any]],
+) -> None:
+    path = tmp_path / "sample.vb"
+    path.write_bytes(_vb_dataset([line.encode("cp037") for line in _sample_lines()]))
+    records, _ = FixedWidthParser(contract).parse_file(
+        path,
+        encoding="cp037",
+        continue_on_error=True,
+        reader="vb",
+    )
+    assert records == text_records
+
+
+def test_vb_reader_stops_on_invalid_descriptor(tmp_path: Path, contract: ContractSpec) -> None:
+    lines = [line.encode("cp037") for line in _sample_lines()[:2]]
+    path = tmp_path / "broken.vb"
+    path.write_bytes(_vb_dataset(lines, per_block=1) + b"\x00\x02\x00\x00")
+    records, issues = FixedWidthParser(contract).parse_file(
+        path,
+        encoding="cp037",
+        continue_on_error=True,
+        reader="vb",
+    )
+    assert len(records) == 2
+    descriptor_issues = [issue for issue in issues.samples if "(BDW) invalide" in issue.message]
+    assert [issue.line_number for issue in descriptor_issues] == [3]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+from idp470_pipeline.models import ContractSpec
+from idp470_pipeline.parsing_engine import FixedWidthParser, ParsingError, StructureValidator
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SAMPLES = ("facdemat_20251021_nufac29501954.txt", "facdemat_test_3_factures_multi_lignes.txt")
+_ORDER = {"ENT": 2, "ECH": 3, "COM": 4, "REF(E)": 5, "ADR": 6, "AD2": 7, "LIG": 8, "REF(L)": 9, "LEC": 10, "PIE": 11}
+_FILE_LEVEL = ("[FIC]", "le premier enregistrement doit etre FIC")
+
+
+@pytest.fixture(scope="module")
+def contract() -> ContractSpec:
+    return extract_contract_deterministic(
+        source_path=PROJECT_ROOT / "IDP470RA.pli",
+        source_program="IDP470RA",
+        spec_pdf_path=None,
+    )
+
+
+def _reference(contract: ContractSpec, records: list[dict[str, Any]]) -> list[tuple[int, str]]:
+    # The batch _validate_structure the incremental validator replaced, kept as
+    # the reference for its issues.
+    rules = {}
+    for rule in contract.structure_rules:
+        rules.setdefault(rule.label, rule)
+    issues: list[tuple[int, str]] = []
+
+    def _occurrence(label: str, count: int, line_number: int) -> None:
+        rule = rules.get(label)
+        if rule is None:
+            return
+        prefix = f"Regle de structure non respectee [{label}]"
+        if count < rule.min_occurs:
+            issues.append((line_number, f"{prefix}: minimum {rule.min_occurs}, trouve {count}."))
+        if rule.max_occurs is not None and count > rule.max_occurs:
+            issues.append((line_number, f"{prefix}: maximum {rule.max_occurs}, trouve {count}."))
+
+    if not records:
+        return [(0, "Aucun enregistrement parse.")]
+    fic_positions = [record["line_number"] for record in records if record["record_type"] == "FIC"]
+    _occurrence("FIC", len(fic_positions), fic_positions[0] if fic_positions else 0)
+    if fic_positions and records[0]["record_type"] != "FIC":
+        message = "Ordre de structure non respecte: le premier enregistrement doit etre FIC."
+        issues.append((records[0]["line_number"], message))
+
+    blocks: list[list[dict[str, Any]]] = []
+    for record in records:
+        record_type = record["record_type"]
+        if record_type == "FIC":
+            continue
+        if record_type == "ENT":
+            blocks.append([record])
+        elif not blocks:
+            message = f"Ordre de structure non respecte: enregistrement avant le premier ENT ({record_type})."
+            issues.append((record["line_number"], message))
+        else:
+            blocks[-1].append(record)
+    if not blocks:
+        issues.append((0, "Regle de structure non respectee [ENT]: aucun bloc facture trouve."))
+        return issues
+
+    for block in blocks:
+        ent_line = block[0]["line_number"]
+        counts = Counter(record["record_type"] for record in block)
+        header_refs = 0
+        segments: list[list[int]] = []
+        current: list[int] | None = None
+        seen_lig = False
+        last_order = _ORDER["ENT"]
+        for record in block[1:]:
+            record_type, line_number = record["record_type"], record["line_number"]
+            if record_type == "LIG":
+                seen_lig = True
+                if current is not None:
+                    segments.append(current)
+                current = [line_number, 0, 0]
+                in_lines = last_order in {_ORDER["LIG"], _ORDER["REF(L)"], _ORDER["LEC"]}
+                if not in_lines and _ORDER["LIG"] < last_order:
+                    issues.append((line_number, "Ordre de structure non respecte dans le bloc facture autour de LIG."))
+                last_order = _ORDER["LIG"]
+                continue
+            if record_type == "REF" and seen_lig:
+                order = _ORDER["REF(L)"]
+                if current is None:
+                    issues.append((line_number, "Regle de structure non respectee [REF(L)]: REF sans LIG parent."))
+                else:
+                    current[1] += 1
+            elif record_type == "REF":
+                order = _ORDER["REF(E)"]
+                header_refs += 1
+            elif record_type == "LEC":
+                order = _ORDER["LEC"]
+                if current is None:
+                    issues.append((line_number, "Regle de structure non respectee [LEC]: LEC sans LIG parent."))
+                else:
+                    current[2] += 1
+            elif record_type in {"ECH", "COM", "ADR", "AD2", "PIE"}:
+                order = _ORDER[record_type]
+            else:
+                continue
+            if order < last_order:
+                message = f"Ordre de structure non respecte dans le bloc facture: {record_type} hors sequence attendue."
+                issues.append((line_number, message))
+            else:
+                last_order = order
+        if current is not None:
+            segments.append(current)
+        _occurrence("ENT", 1, ent_line)
+        for label in ("ECH", "COM", "REF(E)", "ADR", "AD2", "LIG", "PIE"):
+            _occurrence(label, header_refs if label == "REF(E)" else counts.get(label, 0), ent_line)
+        for segment_line, ref_count, lec_count in segments:
+            _occurrence("REF(L)", ref_count, segment_line)
+            _occurrence("LEC", lec_count, segment_line)
+    return issues
+
+
+def _types_of(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{"record_type": record["record_type"], "line_number": record["line_number"]} for record in records]
+
+
+def _incremental(contract: ContractSpec, records: list[dict[str, Any]]) -> tuple[list[tuple[int, str]], Any]:
+    issues: list[tuple[int, str]] = []
+    validator = StructureValidator(
+        contract,
+        on_issue=lambda issue: issues.append((issue.line_number, issue.message)),
+    )
+    for record in records:
+        validator.feed(record["record_type"], record["line_number"])
+    validator.finish()
+    first = validator.first_issue
+    return issues, None if first is None else (first.line_number, first.message)
+
+
+def _batch_order(issues: list[tuple[int, str]]) -> list[tuple[int, str]]:
+    # The batch check listed the FIC issues first; the stream reports the FIC
+    # occurrence issue once the file is read.
+    file_level = [issue for issue in issues if any(marker in issue[1] for marker in _FILE_LEVEL)]
+    file_level.sort(key=lambda issue: "[FIC]" not in issue[1])
+    return file_level + [issue for issue in issues if issue not in file_level]
+
+
+def _check(contract: ContractSpec, records: list[dict[str, Any]]) -> list[tuple[int, str]]:
+    expected = _reference(contract, records)
+    issues, first = _incremental(contract, records)
+    assert _batch_order(issues) == expected
+    assert first == (expected[0] if expected else None)
+    return issues
+
+
+@pytest.mark.parametrize("sample", SAMPLES)
+def test_samples_match_batch_validation(contract: ContractSpec, sample: str) -> None:
+    records, _ = FixedWidthParser(contract).parse_file(PROJECT_ROOT / sample, continue_on_error=True)
+    assert _check(contract, _types_of(records))
+
+
+@pytest.mark.parametrize(
+    "types",
+    [
+        [],
+        ["FIC", "ENT", "ECH", "LIG", "REF", "LEC", "PIE"],
+        ["ENT", "ECH", "FIC", "ENT", "LIG"],
+        ["FIC", "FIC", "ENT", "ECH", "LIG"],
+        ["ECH", "LIG", "FIC"],
+        ["FIC", "ENT", "LIG", "ECH", "REF", "ADR", "LIG", "LEC", "LEC"],
+        ["FIC", "ENT", "LEC", "REF", "ECH", "COM", "AD2", "ADR", "ENT"],
+    ],
+)
+def test_sequences_match_batch_validation(contract: ContractSpec, types: list[str]) -> None:
+    _check(contract, [{"record_type": name, "line_number": index} for index, name in enumerate(types, start=1)])
+
+
+def test_first_record_order_issue_is_reported_when_the_first_fic_is_read(contract: ContractSpec) -> None:
+    issues: list[str] = []
+    validator = StructureValidator(contract, on_issue=lambda issue: issues.append(issue.message))
+    for line_number, record_type in enumerate(["ENT", "ECH", "FIC"], start=1):
+        validator.feed(record_type, line_number)
+    assert issues == ["Ordre de structure non respecte: le premier enregistrement doit etre FIC."]
+
+
+def test_strict_mode_raises_the_batch_first_issue(contract: ContractSpec) -> None:
+    strict = contract.model_copy(update={"strict_structure_validation": True})
+    path = PROJECT_ROOT / SAMPLES[1]
+    records, _ = FixedWidthParser(contract).parse_file(path, continue_on_error=True)
+    expected = _reference(contract, _types_of(records))
+    with pytest.raises(ParsingError) as error:
+        FixedWidthParser(strict).parse_file(path)
+    assert str(error.value) == expected[0][1]
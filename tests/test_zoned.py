@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from idp470_pipeline.models import ContractSpec, FieldSpec, FieldType, FieldUsage, RecordSpec, SelectorSpec, SignPosition
+from idp470_pipeline.parsing_engine import FixedWidthParser, _field_coercer
+
+EBCDIC_CODE_PAGES = ("cp037", "cp1140", "cp297", "cp1147")
+READERS = ("text", "mmap", "fixed")
+
+
+def _zoned(sign_position: SignPosition = SignPosition.TRAILING, length: int = 8) -> FieldSpec:
+    return FieldSpec(
+        name="MONTANT",
+        start=4,
+        length=length,
+        type=FieldType.DECIMAL,
+        decimals=2,
+        usage=FieldUsage.ZONED,
+        signed=True,
+        sign_position=sign_position,
+    )
+
+
+def _contract() -> ContractSpec:
+    return ContractSpec(
+        source_program="TEST",
+        line_length=11,
+        record_types=[
+            RecordSpec(
+                name="ENT",
+                selector=SelectorSpec(start=1, length=3, value="ENT"),
+                fields=[FieldSpec(name="TYPE", start=1, length=3), _zoned()],
+            )
+        ],
+    )
+
+
+def _ebcdic_file(tmp_path, code_page: str, reader: str) -> tuple:
+    # Amounts ending in +0 (zone byte 0xC0), -0 (0xD0), +1, -9 and unsigned.
+    endings = [(0xC0, Decimal("123.40")), (0xD0, Decimal("-123.40")), (0xC1, Decimal("123.41"))]
+    endings += [(0xD9, Decimal("-123.49")), (0xF5, Decimal("123.45"))]
+    records = [("ENT0001234".encode(code_page) + bytes([byte])) for byte, _ in endings]
+    separator = b"" if reader == "fixed" else "\n".encode(code_page)
+    path = tmp_path / f"zoned_{code_page}.dat"
+    path.write_bytes(b"".join(record + separator for record in records))
+    return path, [value for _, value in endings]
+
+
+@pytest.mark.parametrize("reader", READERS)
+@pytest.mark.parametrize("code_page", EBCDIC_CODE_PAGES)
+def test_zone_bytes_decode_in_every_code_page(tmp_path, code_page: str, reader: str) -> None:
+    path, expected = _ebcdic_file(tmp_path, code_page, reader)
+    records, issues = FixedWidthParser(_contract()).parse_file(path, encoding=code_page, reader=reader)
+    assert issues.total == 0
+    assert [record["MONTANT"] for record in records] == expected
+
+
+@pytest.mark.parametrize("reader", READERS)
+@pytest.mark.parametrize("code_page", EBCDIC_CODE_PAGES)
+def test_columnar_zone_bytes_match_parse_file(tmp_path, code_page: str, reader: str) -> None:
+    path, expected = _ebcdic_file(tmp_path, code_page, reader)
+    batches, _ = FixedWidthParser(_contract()).parse_file_columnar(path, encoding=code_page, reader=reader)
+    values = [record["MONTANT"] for record in batches["ENT"].to_records()]
+    assert values == pytest.approx([float(value) for value in expected])
+
+
+def test_cp297_positive_and_negative_zero_characters() -> None:
+    # 0xC0 / 0xD0 decode to 'é' / 'è' in cp297 and cp1147, '{' / '}' in cp037.
+    for code_page in ("cp297", "cp1147"):
+        coerce = _field_coercer(_zoned(), encoding=code_page)
+        assert coerce("0001234é") == Decimal("123.40")
+        assert coerce("0001234è") == Decimal("-123.40")
+    assert _field_coercer(_zoned())("0001234}") == Decimal("-123.40")
+
+
+@pytest.mark.parametrize(
+    ("sign_position", "raw", "expected"),
+    [
+        (SignPosition.TRAILING, "0000000}", Decimal("0.00")),
+        (SignPosition.TRAILING, "0001234J", Decimal("-123.41")),
+        (SignPosition.TRAILING, "00012345", Decimal("123.45")),
+        (SignPosition.LEADING, "}0001234", Decimal("-12.34")),
+        (SignPosition.LEADING, "A0001234", Decimal("100012.34")),
+        (SignPosition.LEADING, "00012345", Decimal("123.45")),
+        (SignPosition.LEADING_SEPARATE, "-0012345", Decimal("-123.45")),
+        (SignPosition.LEADING_SEPARATE, "+0012345", Decimal("123.45")),
+        (SignPosition.TRAILING_SEPARATE, "0012345-", Decimal("-123.45")),
+        (SignPosition.TRAILING_SEPARATE, "0000000-", Decimal("0.00")),
+    ],
+)
+def test_sign_positions(sign_position: SignPosition, raw: str, expected: Decimal) -> None:
+    value = _field_coercer(_zoned(sign_position))(raw)
+    assert value == expected
+    assert not value.is_signed() or expected < 0
+
+
+def test_invalid_zoned_value_stays_text() -> None:
+    assert _field_coercer(_zoned())("00A1234}") == "00A1234}"
+
+
+def test_non_trailing_sign_requires_zoned_usage() -> None:
+    with pytest.raises(ValueError):
+        FieldSpec(name="X", start=1, length=3, type=FieldType.INTEGER, sign_position=SignPosition.LEADING)
@@ -19,9 +19,12 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
 from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+from idp470_pipeline.export_stage import PDF_RECORD_TYPES, ExportTask, records_for_types, run_exports
 from idp470_pipeline.exporters import export_accounting_summary_pdf, export_first_invoice_pdf, export_to_excel
 from idp470_pipeline.models import ContractSpec, FieldSpec, FieldType, RecordSpec, SelectorSpec
-from idp470_pipeline.parsing_engine import FixedWidthParser, save_jsonl
+from idp470_pipeline.parse_cache import ParseCache
+from idp470_pipeline.parsing_engine import FixedWidthParser, IssueLog, save_jsonl
+from idp470_pipeline.run_metrics import RUN_METRICS_FILE_NAME, RunMetrics, fill_parse_stage, validation_stage
 
 LOGGER = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -38,6 +41,15 @@ DEFAULT_INPUT_ENCODING = os.getenv("IDP470_WEB_INPUT_ENCODING", "latin-1")
 DEFAULT_CONTINUE_ON_ERROR = os.getenv("IDP470_WEB_CONTINUE_ON_ERROR", "false").strip().lower() == "true"
 DEFAULT_REUSE_CONTRACT = os.getenv("IDP470_WEB_REUSE_CONTRACT", "true").strip().lower() == "true"
 DEFAULT_FAST_EXCEL = os.getenv("IDP470_WEB_FAST_EXCEL", "true").strip().lower() == "true"
+# Opt-in, as --cache-dir in the CLI: entries are pickles, so the cache
+# directory must only be writable by the service.
+PARSE_CACHE_ENABLED = os.getenv("IDP470_WEB_PARSE_CACHE", "false").strip().lower() == "true"
+PARSE_CACHE_DIR = Path(os.getenv("IDP470_WEB_PARSE_CACHE_DIR", JOBS_ROOT / "_parse_cache")).expanduser()
+PARSE_CACHE_MAX_MB = int(os.getenv("IDP470_WEB_PARSE_CACHE_MAX_MB", "512"))
+# Opt-in, as --export-workers in the CLI: above 1, every job starts its own
+# process pool and sends the PDF records to it.
+EXPORT_WORKERS = int(os.getenv("IDP470_WEB_EXPORT_WORKERS", "1"))
+MAX_ISSUE_SAMPLES = int(os.getenv("IDP470_WEB_MAX_ISSUE_SAMPLES", "100"))
 SUPPORTED_ANALYZERS = {"idp470_pli", "cobol_copybook"}
 ALLOWED_SOURCE_SUFFIXES = {".pli", ".cbl", ".cob", ".cpy", ".jcl", ".txt"}
 
@@ -77,6 +89,7 @@ class JobState:
     )
     kpis: list[dict[str, Any]] = field(default_factory=list)
     outputs: dict[str, str] = field(default_factory=dict)
+    run_metrics: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass(frozen=True)
@@ -380,7 +393,7 @@ def _build_kpis(
     *,
     profile: FlowProfile,
     records: list[dict[str, Any]],
-    issues: list[Any],
+    issues: IssueLog,
     contract: Any,
 ) -> list[dict[str, Any]]:
     if profile.view_mode == "invoice":
@@ -1074,72 +1087,129 @@ def _process_job(job_id: str, input_path: Path, program: ProgramRuntime, profile
             )
 
         _set_job(job_id, status="running", progress=10, message="Extraction du contrat en cours")
-        contract = _get_contract(program, profile)
-
-        contract_path = output_dir / f"{program.program_id}_contract.json"
-        contract_path.write_text(
-            json.dumps(contract.model_dump(mode="json"), ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        run_metrics = RunMetrics()
+        with run_metrics.stage("extraction") as stage:
+            contract = _get_contract(program, profile)
+            contract_path = output_dir / f"{program.program_id}_contract.json"
+            contract_path.write_text(
+                json.dumps(contract.model_dump(mode="json"), ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+            stage.details["record_types"] = len(contract.record_types)
 
         _set_job(job_id, progress=35, message=f"Parsing {profile.file_name} en cours")
         parser = FixedWidthParser(contract)
-        records, issues = parser.parse_file(
-            input_path=input_path,
-            encoding=program.source_encoding,
-            continue_on_error=program.continue_on_error,
-        )
+        # Every anomaly goes to issues.jsonl; only MAX_ISSUE_SAMPLES stay in memory.
+        issues_path = output_dir / "issues.jsonl"
+        parse_stats: dict[str, Any] = {}
+        with run_metrics.stage("parsing") as stage:
+            if PARSE_CACHE_ENABLED:
+                # Retries and re-uploads of the same file with the same contract skip parsing.
+                cache = ParseCache(PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_MB * 1024 * 1024)
+                records, issues = cache.parse_file(
+                    parser,
+                    input_path=input_path,
+                    encoding=program.source_encoding,
+                    continue_on_error=program.continue_on_error,
+                    max_issue_samples=MAX_ISSUE_SAMPLES,
+                    issues_path=issues_path,
+                    stats=parse_stats,
+                )
+            else:
+                records, issues = parser.parse_file(
+                    input_path=input_path,
+                    encoding=program.source_encoding,
+                    continue_on_error=program.continue_on_error,
+                    max_issue_samples=MAX_ISSUE_SAMPLES,
+                    issues_path=issues_path,
+                    stats=parse_stats,
+                )
+            fill_parse_stage(stage, parse_stats, records, len(issues))
+        run_metrics.add(validation_stage(parse_stats))
 
         parsed_path = output_dir / "extaction.jsonl"
-        save_jsonl(records=records, output_path=parsed_path)
+        with run_metrics.stage("jsonl") as stage:
+            stage.lines = save_jsonl(records=records, output_path=parsed_path)
 
-        _set_job(
-            job_id,
-            progress=55,
-            message="Generation Excel en cours",
-        )
         excel_path = output_dir / "extaction.xlsx"
-        export_to_excel(
-            records=records,
-            output_path=excel_path,
-            contract=contract,
-            metadata={
-                "title": "IDIL PAPYRUS - Synthese de traitement",
-                "program_id": program.program_id,
-                "source_program": program.source_program,
-                "flow_type": profile.flow_type.upper(),
-                "file_name": profile.file_name,
-                "view_mode": profile.view_mode,
-                "role_label": profile.role_label,
-            },
-            fast_mode=DEFAULT_FAST_EXCEL,
-        )
-
         pdf_factures_path = output_dir / "facture_exemple.pdf"
         pdf_synthese_path = output_dir / "synthese_comptable.pdf"
+        export_tasks = [
+            ExportTask(
+                "excel",
+                export_to_excel,
+                {
+                    "records": records,
+                    "output_path": excel_path,
+                    "contract": contract,
+                    "metadata": {
+                        "title": "IDIL PAPYRUS - Synthese de traitement",
+                        "program_id": program.program_id,
+                        "source_program": program.source_program,
+                        "flow_type": profile.flow_type.upper(),
+                        "file_name": profile.file_name,
+                        "view_mode": profile.view_mode,
+                        "role_label": profile.role_label,
+                    },
+                    "fast_mode": DEFAULT_FAST_EXCEL,
+                },
+            )
+        ]
         if profile.supports_pdf:
-            _set_job(job_id, progress=75, message="Generation PDF factures en cours")
-            try:
-                export_first_invoice_pdf(records=records, output_path=pdf_factures_path, logo_path=_safe_logo_path())
-            except Exception as error:  # noqa: BLE001
-                warnings.append(f"PDF factures non genere: {error}")
-
-            _set_job(job_id, progress=90, message="Generation PDF synthese en cours")
-            try:
-                export_accounting_summary_pdf(
-                    records=records,
-                    output_path=pdf_synthese_path,
-                    logo_path=_safe_logo_path(),
+            pdf_records = records_for_types(records, PDF_RECORD_TYPES) if EXPORT_WORKERS > 1 else records
+            export_tasks.append(
+                ExportTask(
+                    "pdf_factures",
+                    export_first_invoice_pdf,
+                    {"records": pdf_records, "output_path": pdf_factures_path, "logo_path": _safe_logo_path()},
+                    tolerated=(Exception,),
                 )
-            except Exception as error:  # noqa: BLE001
-                warnings.append(f"PDF synthese non genere: {error}")
-        else:
-            _set_job(job_id, progress=90, message="Generation terminee pour ce flux")
+            )
+            export_tasks.append(
+                ExportTask(
+                    "pdf_synthese",
+                    export_accounting_summary_pdf,
+                    {"records": pdf_records, "output_path": pdf_synthese_path, "logo_path": _safe_logo_path()},
+                    tolerated=(Exception,),
+                )
+            )
+
+        export_labels = {
+            "excel": "Excel",
+            "pdf_factures": "PDF factures",
+            "pdf_synthese": "PDF synthese",
+        }
+        pending_exports = [export_labels[task.name] for task in export_tasks]
+        _set_job(job_id, progress=55, message=f"Generation en cours: {', '.join(pending_exports)}")
+
+        def _export_done(name: str) -> None:
+            pending_exports.remove(export_labels[name])
+            done_count = len(export_tasks) - len(pending_exports)
+            progress = 55 + (35 * done_count) // len(export_tasks)
+            if pending_exports:
+                _set_job(job_id, progress=progress, message=f"Generation en cours: {', '.join(pending_exports)}")
+            elif profile.supports_pdf:
+                _set_job(job_id, progress=progress, message="Generation des exports terminee")
+            else:
+                _set_job(job_id, progress=progress, message="Generation terminee pour ce flux")
+
+        with run_metrics.stage("exports"):
+            export_errors = run_exports(
+                export_tasks,
+                workers=EXPORT_WORKERS,
+                on_done=_export_done,
+                metrics=run_metrics,
+            )
+        if "pdf_factures" in export_errors:
+            warnings.append(f"PDF factures non genere: {export_errors['pdf_factures']}")
+        if "pdf_synthese" in export_errors:
+            warnings.append(f"PDF synthese non genere: {export_errors['pdf_synthese']}")
 
         outputs: dict[str, str] = {
             "contract": str(contract_path),
             "jsonl": str(parsed_path),
             "excel": str(excel_path),
+            "issues": str(issues_path),
         }
         if pdf_factures_path.exists():
             outputs["pdf_factures"] = str(pdf_factures_path)
@@ -1154,6 +1224,8 @@ def _process_job(job_id: str, input_path: Path, program: ProgramRuntime, profile
             "records_count": len(records),
         }
         kpis = _build_kpis(profile=profile, records=records, issues=issues, contract=contract)
+        metrics_path = output_dir / RUN_METRICS_FILE_NAME
+        outputs["run_metrics"] = str(metrics_path)
 
         _set_job(
             job_id,
@@ -1164,6 +1236,7 @@ def _process_job(job_id: str, input_path: Path, program: ProgramRuntime, profile
             metrics=metrics,
             kpis=kpis,
             outputs=outputs,
+            run_metrics=run_metrics.save(metrics_path),
         )
     except Exception as error:  # noqa: BLE001
         _set_job(
@@ -1208,6 +1281,7 @@ class JobStatusResponse(BaseModel):
     metrics: dict[str, int] = Field(default_factory=dict)
     kpis: list[dict[str, Any]] = Field(default_factory=list)
     downloads: dict[str, str] = Field(default_factory=dict)
+    run_metrics: dict[str, Any] = Field(default_factory=dict)
 
 
 class CatalogProfileResponse(BaseModel):
@@ -1259,6 +1333,10 @@ def _download_links(job_id: str, job: JobState) -> dict[str, str]:
         links["jsonl"] = f"/api/jobs/{job_id}/download/jsonl"
     if "contract" in job.outputs:
         links["contract"] = f"/api/jobs/{job_id}/download/contract"
+    if "issues" in job.outputs:
+        links["issues"] = f"/api/jobs/{job_id}/download/issues"
+    if "run_metrics" in job.outputs:
+        links["run_metrics"] = f"/api/jobs/{job_id}/download/run-metrics"
     return links
 
 
@@ -1270,6 +1348,8 @@ def _artifact_download_filename(job: JobState, output_key: str, output_path: Pat
         "pdf_synthese": "synthese_comptable.pdf",
         "jsonl": "extaction.jsonl",
         "contract": "contract.json",
+        "issues": "issues.jsonl",
+        "run_metrics": RUN_METRICS_FILE_NAME,
     }
     suffix = suffix_map.get(output_key, output_path.name)
     upper_prefix = f"{prefix}_"
@@ -1298,6 +1378,7 @@ def _to_status_response(job_id: str, job: JobState) -> JobStatusResponse:
         metrics=job.metrics,
         kpis=job.kpis,
         downloads=_download_links(job_id, job),
+        run_metrics=job.run_metrics,
     )
 
 
@@ -1554,6 +1635,8 @@ def download_artifact(job_id: str, artifact: str) -> FileResponse:
         "pdf-synthese": "pdf_synthese",
         "jsonl": "jsonl",
         "contract": "contract",
+        "issues": "issues",
+        "run-metrics": "run_metrics",
     }
     output_key = artifact_map.get(artifact)
     if output_key is None:
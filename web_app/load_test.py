@@ -0,0 +1,574 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from idp470_pipeline.benchmarks.synthetic import (
+    DEFAULT_LIG_PER_INVOICE,
+    DEFAULT_SEED,
+    ensure_dataset,
+    parse_size,
+    size_label,
+)
+from idp470_pipeline.deterministic_extractor import extract_contract_deterministic
+
+LOGGER = logging.getLogger("web_app.load_test")
+
+# Load test of the job backend: starts uvicorn locally (or targets --url),
+# fires concurrent POST /api/jobs uploads of synthetic FACDEMAT files of
+# several sizes, polls GET /api/jobs/{id} until each job ends and reports
+# upload time, queueing delay, time to complete, error rate and the RSS of
+# each uvicorn worker (with its export processes). Standard library only:
+#
+#     python web_app/load_test.py --jobs 20 --sizes 1k,5k
+
+TERMINAL_STATUSES = {"completed", "failed"}
+_HEALTH_TIMEOUT_SECONDS = 90.0
+_MEMORY_SAMPLE_SECONDS = 0.5
+
+
+# Outcome of one upload. status is the final job status, or one of
+# rejected (POST refused), not_found (every poll answered 404: with several
+# uvicorn workers the job lives in another one), lost (never found, other poll errors), timeout, error.
+@dataclass
+class JobResult:
+    index: int
+    size: str
+    bytes: int
+    status: str = "error"
+    http_status: int | None = None
+    job_id: str | None = None
+    error: str | None = None
+    upload_seconds: float | None = None
+    queue_seconds: float | None = None
+    total_seconds: float | None = None
+    processing_seconds: float | None = None
+    polls: int = 0
+    polls_not_found: int = 0
+
+
+@dataclass(frozen=True)
+class Upload:
+    path: Path
+    size: str
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _multipart(fields: dict[str, str], file_field: str, filename: str, payload: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts: list[bytes] = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            "Content-Type: text/plain\r\n\r\n"
+        ).encode()
+    )
+    parts.append(payload)
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _request(
+    url: str,
+    data: bytes | None = None,
+    content_type: str | None = None,
+    timeout: float = 60.0,
+) -> tuple[int, Any]:
+    # (HTTP status, decoded JSON body or text); HTTP errors are returned, not raised.
+    request = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET")
+    if content_type:
+        request.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as error:
+        status, body = error.code, error.read()
+    try:
+        return status, json.loads(body)
+    except ValueError:
+        return status, body.decode("utf-8", errors="replace")
+
+
+def _parse_time(value: Any) -> datetime | None:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _error_detail(body: Any) -> str:
+    if isinstance(body, dict):
+        return str(body.get("detail") or body.get("error") or body)
+    return str(body)[:300]
+
+
+def run_job(index: int, upload: Upload, base_url: str, options: argparse.Namespace) -> JobResult:
+    payload = upload.path.read_bytes()
+    result = JobResult(index=index, size=upload.size, bytes=len(payload))
+    fields = {"flow_type": options.flow_type, "file_name": options.file_name}
+    if options.program_id:
+        fields["program_id"] = options.program_id
+    body, content_type = _multipart(fields, "data_file", upload.path.name, payload)
+
+    started = time.perf_counter()
+    try:
+        status, response = _request(f"{base_url}/api/jobs", body, content_type, timeout=options.timeout)
+    except OSError as error:
+        result.error = f"upload: {error}"
+        return result
+    result.upload_seconds = time.perf_counter() - started
+    result.http_status = status
+    if status != 200 or not isinstance(response, dict):
+        result.status = "rejected"
+        result.error = f"HTTP {status}: {_error_detail(response)}"
+        return result
+    result.job_id = response["job_id"]
+
+    # With several uvicorn workers, the job state lives in the worker that
+    # received the upload: polls served by another worker answer 404.
+    job: dict[str, Any] | None = None
+    seen_running_at: float | None = None
+    deadline = started + options.timeout
+    while time.perf_counter() < deadline:
+        time.sleep(options.poll_interval)
+        try:
+            status, response = _request(f"{base_url}/api/jobs/{result.job_id}", timeout=options.timeout)
+        except OSError as error:
+            result.error = f"poll: {error}"
+            continue
+        result.polls += 1
+        if status == 404:
+            result.polls_not_found += 1
+            continue
+        if status != 200 or not isinstance(response, dict):
+            result.error = f"poll HTTP {status}: {_error_detail(response)}"
+            continue
+        job = response
+        if seen_running_at is None and job.get("status") != "queued":
+            seen_running_at = time.perf_counter()
+        if job.get("status") in TERMINAL_STATUSES:
+            break
+    else:
+        if job is not None:
+            result.status = "timeout"
+        elif result.polls and result.polls_not_found == result.polls:
+            result.status = "not_found"
+        else:
+            result.status = "lost"
+        result.error = result.error or f"job non termine apres {options.timeout:.0f} s"
+        return result
+
+    result.status = str(job["status"])
+    result.total_seconds = time.perf_counter() - started
+    if result.status == "failed":
+        result.error = str(job.get("error") or job.get("message"))
+    # Queueing delay from the server clocks when the run metrics are there
+    # (created_at -> processing start), else from the first non-queued poll.
+    run_metrics = job.get("run_metrics") or {}
+    created_at = _parse_time(job.get("created_at"))
+    processing_started_at = _parse_time(run_metrics.get("started_at"))
+    if created_at is not None and processing_started_at is not None:
+        result.queue_seconds = max(0.0, (processing_started_at - created_at).total_seconds())
+    elif seen_running_at is not None:
+        result.queue_seconds = seen_running_at - started - result.upload_seconds
+    if run_metrics.get("total_wall_seconds") is not None:
+        result.processing_seconds = float(run_metrics["total_wall_seconds"])
+    return result
+
+
+def _proc_children() -> dict[int, list[int]]:
+    children: dict[int, list[int]] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", encoding="ascii", errors="replace") as handle:
+                # The command name (field 2) may contain spaces: split after its ')'.
+                ppid = int(handle.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _descendants(pid: int, children: dict[int, list[int]]) -> list[int]:
+    found: list[int] = []
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(children.get(child, []))
+    return found
+
+
+# Samples the RSS of the uvicorn process tree (Linux /proc). Each direct child
+# of the server process is a worker (with --workers 1 the server process is
+# the worker itself); a worker's tree figure adds its export processes.
+class WorkerMemorySampler:
+    def __init__(self, server_pid: int, interval: float = _MEMORY_SAMPLE_SECONDS) -> None:
+        self.server_pid = server_pid
+        self.interval = interval
+        self.workers: dict[int, dict[str, int]] = {}
+        self.peak_total_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def sample(self) -> None:
+        children = _proc_children()
+        workers = children.get(self.server_pid) or [self.server_pid]
+        total = _rss_bytes(self.server_pid) if workers != [self.server_pid] else 0
+        for pid in workers:
+            own = _rss_bytes(pid)
+            tree = own + sum(_rss_bytes(child) for child in _descendants(pid, children))
+            peaks = self.workers.setdefault(pid, {"peak_rss_bytes": 0, "peak_tree_rss_bytes": 0})
+            peaks["peak_rss_bytes"] = max(peaks["peak_rss_bytes"], own)
+            peaks["peak_tree_rss_bytes"] = max(peaks["peak_tree_rss_bytes"], tree)
+            total += tree
+        self.peak_total_bytes = max(self.peak_total_bytes, total)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        if Path("/proc").exists():
+            self._thread.start()
+        else:
+            LOGGER.warning("Mesure memoire indisponible (pas de /proc sur cette plateforme).")
+
+    def stop(self) -> dict[str, Any]:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        return {
+            "peak_total_rss_bytes": self.peak_total_bytes or None,
+            "workers": {str(pid): peaks for pid, peaks in sorted(self.workers.items())},
+        }
+
+
+def start_server(port: int, workers: int, jobs_dir: Path, parse_cache: bool, log_path: Path) -> subprocess.Popen:
+    # The parse cache is off by default: the same synthetic file is uploaded
+    # many times and cache hits would hide the parsing cost.
+    env = {
+        **os.environ,
+        "IDP470_WEB_JOBS_DIR": str(jobs_dir),
+        "IDP470_WEB_PARSE_CACHE": "true" if parse_cache else "false",
+    }
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "web_app.backend.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+    ]
+    with log_path.open("wb") as log_handle:
+        process = subprocess.Popen(command, cwd=PROJECT_ROOT, env=env, stdout=log_handle, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + _HEALTH_TIMEOUT_SECONDS
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur uvicorn s'est arrete au demarrage (voir {log_path}).")
+        try:
+            if _request(f"{base_url}/api/health", timeout=2.0)[0] == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.5)
+    stop_server(process)
+    raise RuntimeError(f"Le serveur uvicorn ne repond pas apres {_HEALTH_TIMEOUT_SECONDS:.0f} s (voir {log_path}).")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def prepare_uploads(options: argparse.Namespace) -> list[Upload]:
+    contract = extract_contract_deterministic(
+        source_path=PROJECT_ROOT / "IDP470RA.pli",
+        source_program="IDP470RA",
+        spec_pdf_path=None,
+    )
+    uploads: list[Upload] = []
+    for item in options.sizes.split(","):
+        if not item.strip():
+            continue
+        lines = parse_size(item)
+        path = ensure_dataset(
+            contract,
+            Path(options.data_dir),
+            lines,
+            lig_per_invoice=options.lig_per_invoice,
+            seed=options.seed,
+        )
+        uploads.append(Upload(path=path, size=size_label(lines)))
+    if not uploads:
+        raise ValueError("Aucune taille de fichier pour le test de charge (--sizes).")
+    return uploads
+
+
+def _distribution(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def _quantile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(_quantile(0.5), 3),
+        "p90": round(_quantile(0.9), 3),
+        "p95": round(_quantile(0.95), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _timings(results: list[JobResult]) -> dict[str, Any]:
+    metrics = ("upload_seconds", "queue_seconds", "processing_seconds", "total_seconds")
+    return {
+        name: _distribution([value for value in (getattr(item, name) for item in results) if value is not None])
+        for name in metrics
+    }
+
+
+def summarize(results: list[JobResult], wall_seconds: float, single_worker: bool = False) -> dict[str, Any]:
+    by_status: dict[str, int] = {}
+    for item in results:
+        by_status[item.status] = by_status.get(item.status, 0) + 1
+    # With several workers, jobs only ever answered by 404 say nothing of the
+    # backend itself (their polls reached another worker): counted apart,
+    # outside the error rate. With a single worker a 404-only job was lost by
+    # the backend and counts as an error.
+    not_found = 0 if single_worker else by_status.get("not_found", 0)
+    errors = sum(count for status, count in by_status.items() if status != "completed") - not_found
+    counted = len(results) - not_found
+    polls = sum(item.polls for item in results)
+    completed = by_status.get("completed", 0)
+    sizes = list(dict.fromkeys(item.size for item in results))
+    return {
+        "jobs": len(results),
+        "by_status": by_status,
+        "not_found": not_found,
+        "error_rate_pct": round(errors / counted * 100, 2) if counted else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+        "jobs_per_minute": round(completed / wall_seconds * 60, 2) if wall_seconds > 0 else None,
+        "polls": polls,
+        "polls_not_found_pct": round(sum(item.polls_not_found for item in results) / polls * 100, 2) if polls else 0.0,
+        "timings": _timings(results),
+        "by_size": {size: _timings([item for item in results if item.size == size]) for size in sizes},
+    }
+
+
+def _format_distribution(label: str, values: dict[str, float] | None) -> str:
+    if values is None:
+        return f"  {label:<22} -"
+    return (
+        f"  {label:<22} p50 {values['p50']:>8.2f}  p90 {values['p90']:>8.2f}  p95 {values['p95']:>8.2f}"
+        f"  max {values['max']:>8.2f}  (n={values['count']})"
+    )
+
+
+def format_report(report: dict[str, Any]) -> str:
+    summary = report["summary"]
+    config = report["config"]
+    labels = {
+        "upload_seconds": "Upload (s)",
+        "queue_seconds": "Attente file (s)",
+        "processing_seconds": "Traitement (s)",
+        "total_seconds": "Total (s)",
+    }
+    out = [
+        f"Test de charge IDP470 web - {summary['jobs']} jobs, concurrence {config['concurrency']}, "
+        f"{config['workers'] if config['url'] is None else '?'} worker(s) uvicorn, tailles {config['sizes']}",
+        f"Statuts: {', '.join(f'{status}={count}' for status, count in sorted(summary['by_status'].items()))}"
+        f" - taux d'erreur {summary['error_rate_pct']:.1f} %"
+        + (f" (hors {summary['not_found']} job(s) introuvable(s), 404 seulement)" if summary["not_found"] else ""),
+        f"Duree {summary['wall_seconds']:.1f} s - {summary['jobs_per_minute'] or 0:.1f} jobs/min - "
+        f"{summary['polls_not_found_pct']:.1f} % des polls en 404",
+    ]
+    for name, label in labels.items():
+        out.append(_format_distribution(label, summary["timings"][name]))
+    for size, timings in summary["by_size"].items():
+        out.append(f"Taille {size}:")
+        for name in ("queue_seconds", "total_seconds"):
+            out.append(_format_distribution(labels[name], timings[name]))
+    memory = report.get("memory")
+    if memory:
+        total = memory["peak_total_rss_bytes"]
+        out.append(f"Memoire: pic total {'-' if total is None else f'{total / (1024 * 1024):.0f} Mo'}")
+        for pid, peaks in memory["workers"].items():
+            out.append(
+                f"  worker {pid:>8}  pic RSS {peaks['peak_rss_bytes'] / (1024 * 1024):>7.0f} Mo"
+                f"  avec exports {peaks['peak_tree_rss_bytes'] / (1024 * 1024):>7.0f} Mo"
+            )
+    for item in report["jobs"]:
+        if item["status"] != "completed":
+            out.append(f"  job {item['index']} ({item['size']}): {item['status']} - {item['error']}")
+    return "\n".join(out)
+
+
+def run_load_test(options: argparse.Namespace) -> dict[str, Any]:
+    uploads = prepare_uploads(options)
+    temp_dir: tempfile.TemporaryDirectory | None = None
+    process: subprocess.Popen | None = None
+    sampler: WorkerMemorySampler | None = None
+    base_url = options.url.rstrip("/") if options.url else None
+    if base_url is None:
+        if options.jobs_dir:
+            jobs_dir = Path(options.jobs_dir)
+        else:
+            temp_dir = tempfile.TemporaryDirectory(prefix="idp470_load_")
+            jobs_dir = Path(temp_dir.name)
+        port = _free_port()
+        # The server log is kept next to the generated files (the jobs dir is temporary).
+        log_path = Path(options.data_dir) / "load_test_server.log"
+        process = start_server(port, options.workers, jobs_dir, options.parse_cache, log_path)
+        LOGGER.info("Serveur uvicorn demarre (pid %s, %s worker(s)), journal: %s", process.pid, options.workers, log_path)
+        base_url = f"http://127.0.0.1:{port}"
+        sampler = WorkerMemorySampler(process.pid)
+        sampler.start()
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options.concurrency or options.jobs) as pool:
+            futures = [
+                pool.submit(run_job, index, uploads[index % len(uploads)], base_url, options)
+                for index in range(options.jobs)
+            ]
+            results = [future.result() for future in futures]
+        wall_seconds = time.perf_counter() - started
+    finally:
+        memory = sampler.stop() if sampler is not None else None
+        if process is not None:
+            stop_server(process)
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "url": options.url,
+            "workers": options.workers,
+            "jobs": options.jobs,
+            "concurrency": options.concurrency or options.jobs,
+            "sizes": options.sizes,
+            "uploads": {upload.size: str(upload.path) for upload in uploads},
+            "poll_interval": options.poll_interval,
+            "parse_cache": options.parse_cache,
+        },
+        # Only the local server has a known worker count.
+        "summary": summarize(results, wall_seconds, single_worker=options.url is None and options.workers == 1),
+        "memory": memory,
+        "jobs": [asdict(item) for item in results],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test of the IDP470 web job backend.")
+    parser.add_argument("--url", default=None, help="Running server to target (default: start uvicorn locally).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "uvicorn workers of the local server (default 1: job state lives in the memory of the worker "
+            "that took the upload, so with more some polls answer 404)."
+        ),
+    )
+    parser.add_argument("--jobs", type=int, default=20, help="Uploads to send.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Uploads in flight at once (default: --jobs).")
+    parser.add_argument("--sizes", default="1k,5k", help="Upload sizes in lines, used in turn (e.g. 1k,5k,10k).")
+    parser.add_argument("--lig-per-invoice", type=int, default=DEFAULT_LIG_PER_INVOICE, help="LIG lines per ENT block.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the synthetic files.")
+    parser.add_argument("--data-dir", default="bench_data", help="Directory of the generated files (reused across runs).")
+    parser.add_argument("--jobs-dir", default=None, help="IDP470_WEB_JOBS_DIR of the local server (default: temporary).")
+    parser.add_argument("--parse-cache", action="store_true", help="Keep the server parse cache on (off by default).")
+    parser.add_argument("--program-id", default=None, help="program_id form field (default program if omitted).")
+    parser.add_argument("--flow-type", default="output", help="flow_type form field.")
+    parser.add_argument("--file-name", default="FICDEMA", help="file_name form field.")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between two status polls of a job.")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds allowed per job, upload included.")
+    parser.add_argument("--output-json", default=None, help="Write the full report (every job) as JSON.")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=None,
+        help=(
+            "Exit with code 1 if more than this percent of the jobs did not complete "
+            "(not_found jobs excluded unless the local server runs one worker)."
+        ),
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+    options = build_parser().parse_args(argv)
+    if options.jobs < 1 or (options.concurrency is not None and options.concurrency < 1):
+        raise ValueError("--jobs et --concurrency doivent etre positifs.")
+    report = run_load_test(options)
+    print(format_report(report))
+    if options.output_json:
+        output_path = Path(options.output_json)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        LOGGER.info("Rapport de test de charge ecrit dans %s", output_path)
+    if options.max_error_rate is not None and report["summary"]["error_rate_pct"] > options.max_error_rate:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())